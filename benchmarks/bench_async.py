@@ -0,0 +1,63 @@
+# benchmarks/bench_async.py
+
+"""
+The async engine against a serial walk on a simulated high-latency mount.
+
+    python benchmarks/bench_async.py --latency-ms 5 --fanout 6 --depth 3
+
+Both runs use LatencyFS, which adds the given latency to every listing
+and write, so the numbers stand in for NFS or FUSE without needing one.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from pyinitgen.aio import AdaptiveLimiter, LatencyFS, iter_async_events
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.matcher import ExcludeMatcher
+
+
+def make_tree(root: Path, fanout: int, depth: int) -> None:
+    paths = [root]
+    for _ in range(depth):
+        paths = [path / f"d{i}" for path in paths for i in range(fanout)]
+        for path in paths:
+            path.mkdir()
+
+
+def run(root: Path, fs: LatencyFS, limiter: AdaptiveLimiter) -> float:
+    excludes = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+    start = time.perf_counter()
+    for _ in iter_async_events(root, excludes, check=True, fs=fs, limiter=limiter):
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_tree(root, args.fanout, args.depth)
+
+        serial = run(root, LatencyFS(latency), AdaptiveLimiter(initial=1, maximum=1))
+        fs = LatencyFS(latency)
+        limiter = AdaptiveLimiter(maximum=args.max_in_flight)
+        concurrent = run(root, fs, limiter)
+
+    print(f"{'engine':>8} {'seconds':>10} {'dirs':>8} {'peak in flight':>15}")
+    print(f"{'serial':>8} {serial:>10.3f} {fs.calls:>8} {1:>15}")
+    print(f"{'async':>8} {concurrent:>10.3f} {fs.calls:>8} {fs.peak_in_flight:>15}")
+    print(f"speedup: {serial / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
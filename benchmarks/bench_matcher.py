@@ -0,0 +1,67 @@
+# benchmarks/bench_matcher.py
+
+"""
+Per-directory cost of ExcludeMatcher.match as the pattern count grows.
+
+    python benchmarks/bench_matcher.py
+"""
+
+import random
+import timeit
+
+from pyinitgen.matcher import ExcludeMatcher
+
+SIZES = (10, 100, 1000, 5000)
+DIRS = 2000
+
+
+def make_patterns(count: int, rng: random.Random) -> list:
+    # The kinds of patterns real ignore files contain: names, suffix and
+    # prefix globs, anchored paths and a few ** globs and negations
+    patterns = []
+    for i in range(count):
+        kind = i % 10
+        if kind < 4:
+            patterns.append(f"name{i}")
+        elif kind < 6:
+            patterns.append(f"*.ext{i}")
+        elif kind == 6:
+            patterns.append(f"prefix{i}*")
+        elif kind == 7:
+            patterns.append(f"/top{i}/sub{i}")
+        elif kind == 8:
+            patterns.append(f"**/gen{i}/**")
+        else:
+            patterns.append(f"!keep{i}")
+    rng.shuffle(patterns)
+    return patterns
+
+
+def make_dirs(rng: random.Random) -> list:
+    dirs = []
+    for _ in range(DIRS):
+        parts = [f"d{rng.randrange(50)}" for _ in range(rng.randrange(1, 6))]
+        dirs.append(("/".join(parts), parts[-1]))
+    return dirs
+
+
+def main() -> None:
+    rng = random.Random(0)
+    dirs = make_dirs(rng)
+    print(f"{'patterns':>10} {'compile ms':>12} {'ns / dir':>10}")
+    for size in SIZES:
+        patterns = make_patterns(size, rng)
+        start = timeit.default_timer()
+        matcher = ExcludeMatcher(patterns)
+        compile_ms = (timeit.default_timer() - start) * 1000
+
+        def run():
+            for rel, name in dirs:
+                matcher.match(rel, name)
+
+        best = min(timeit.repeat(run, number=5, repeat=5)) / (5 * DIRS)
+        print(f"{size:>10} {compile_ms:>12.1f} {best * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
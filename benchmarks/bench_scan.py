@@ -0,0 +1,184 @@
+# benchmarks/bench_scan.py
+
+"""
+Times create_inits on a synthetic tree in check, dry-run and write mode.
+
+    python benchmarks/bench_scan.py --depth 5 --fanout 10 --output results.json
+    python benchmarks/bench_scan.py --compare old.json new.json
+    python benchmarks/bench_scan.py --low-memory --max-rss-kb 40000
+
+Each mode runs in a fresh interpreter, so the recorded peak RSS belongs
+to that run alone. Write mode changes the tree and always runs last.
+With --max-rss-kb the script exits 1 when a mode goes over that peak.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from treegen import add_arguments, generate_tree, tree_params
+
+MODES = ("check", "dry-run", "write")
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def peak_rss_kb() -> Optional[int]:
+    """
+    Peak resident set size of this process in KiB, if the OS reports it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_mode(tree: str, mode: str, jobs: int, low_memory: bool = False) -> dict:
+    """
+    Child side: one timed create_inits call, with logging silenced.
+    """
+    import logging
+    from pathlib import Path
+
+    from pyinitgen import __version__
+    from pyinitgen.cli import create_inits
+
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    exit_code, created, scanned = create_inits(
+        Path(tree),
+        check=mode == "check",
+        dry_run=mode == "dry-run",
+        jobs=jobs,
+        low_memory=low_memory,
+    )
+    wall = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "pyinitgen_version": __version__,
+        "exit_code": exit_code,
+        "scanned": scanned,
+        "created": created,
+        "wall_s": round(wall, 6),
+        "dirs_per_s": round(scanned / wall, 1) if wall else None,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def spawn_mode(tree: str, mode: str, jobs: int, low_memory: bool = False) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--tree", tree, "--jobs", str(jobs)]
+    if low_memory:
+        command.append("--low-memory")
+    out = subprocess.run(
+        command,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as f:
+        old = {r["mode"]: r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = {r["mode"]: r for r in json.load(f)["results"]}
+
+    print(f"{'mode':<8} {'old dirs/s':>12} {'new dirs/s':>12} {'change':>8} {'old RSS':>10} {'new RSS':>10}")
+    for mode in MODES:
+        if mode not in old or mode not in new:
+            continue
+        a, b = old[mode], new[mode]
+        change = (b["dirs_per_s"] / a["dirs_per_s"] - 1) * 100 if a["dirs_per_s"] else 0.0
+        print(
+            f"{mode:<8} {a['dirs_per_s']:>12.0f} {b['dirs_per_s']:>12.0f} {change:>+7.1f}% "
+            f"{a['peak_rss_kb'] or 0:>10} {b['peak_rss_kb'] or 0:>10}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark create_inits on a synthetic tree.")
+    add_arguments(parser)
+    parser.add_argument("--jobs", type=int, default=1, help="Listing threads (default: 1)")
+    parser.add_argument("--low-memory", action="store_true", help="Use the low-memory walk")
+    parser.add_argument("--max-rss-kb", type=int, help="Exit 1 if a mode's peak RSS goes over this")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each read-only mode; the fastest is kept")
+    parser.add_argument("--tree", help="Where to build the tree (default: a temp dir that is removed)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.child:
+        print(json.dumps(run_mode(args.tree, args.child, args.jobs, args.low_memory)))
+        return
+
+    workdir = None
+    tree = args.tree
+    if tree is None:
+        workdir = tempfile.mkdtemp(prefix="pyinitgen-bench-")
+        tree = os.path.join(workdir, "tree")
+
+    try:
+        start = time.perf_counter()
+        stats = generate_tree(tree, **tree_params(args))
+        print(f"Generated {stats.dirs} dirs in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        results = []
+        modes = [mode for mode in MODES if mode in args.modes.split(",")]
+        for mode in modes:
+            repeat = 1 if mode == "write" else args.repeat
+            runs = [spawn_mode(tree, mode, args.jobs, args.low_memory) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r["wall_s"])
+            best["runs_wall_s"] = [r["wall_s"] for r in runs]
+            results.append(best)
+            print(
+                f"{mode:<8} {best['wall_s']:>9.3f}s {best['dirs_per_s']:>12.0f} dirs/s "
+                f"{best['peak_rss_kb'] or 0:>9} KiB",
+                file=sys.stderr,
+            )
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "pyinitgen_version": results[0]["pyinitgen_version"] if results else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "jobs": args.jobs,
+        "low_memory": args.low_memory,
+        "tree": {**tree_params(args), **stats._asdict()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.max_rss_kb is not None:
+        over = [r["mode"] for r in results if (r["peak_rss_kb"] or 0) > args.max_rss_kb]
+        if over:
+            print(f"Peak RSS over {args.max_rss_kb} KiB in: {', '.join(over)}", file=sys.stderr)
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_startup.py
+
+"""
+Startup cost of the CLI, as seen by hooks and CI jobs that run it often.
+
+    python benchmarks/bench_startup.py --budget-ms 150
+
+Times `import pyinitgen.cli` and a non-interactive `pyinitgen --check`
+on an empty directory, each in fresh interpreters, minus the cost of a
+bare interpreter. Exits 1 when the import goes over the budget or when a
+module that should only load on demand (rich, tarfile, multiprocessing,
+...) was imported.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Modules a plain scan must not import
+LAZY_MODULES = ("rich", "tarfile", "zipfile", "multiprocessing", "ctypes", "cProfile", "pyinitgen.banner")
+
+_REPORT_LAZY = "import sys, json; print(json.dumps([m for m in {modules!r} if m in sys.modules]))"
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    env.pop("PYINITGEN_NO_BANNER", None)
+    return env
+
+
+def best_ms(code: str, repeat: int) -> float:
+    """
+    Fastest wall time of running code in a fresh interpreter, in ms.
+    """
+    env = _env()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def loaded_lazy_modules(code: str) -> List[str]:
+    """
+    Which of LAZY_MODULES are imported after running code.
+    """
+    script = f"{code}\n{_REPORT_LAZY.format(modules=LAZY_MODULES)}"
+    out = subprocess.run(
+        [sys.executable, "-c", script], env=_env(), check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pyinitgen startup time.")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs of each case; the fastest is kept")
+    parser.add_argument(
+        "--budget-ms", type=float, default=150.0, help="Allowed cost of importing pyinitgen.cli (default: 150)"
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="pyinitgen-startup-") as empty:
+        check_run = (
+            "import sys\n"
+            "from pyinitgen.cli import main\n"
+            f"sys.argv = ['pyinitgen', '--check', '-q', '--base-dir', {empty!r}]\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass"
+        )
+        baseline = best_ms("pass", args.repeat)
+        report = {
+            "python": sys.version.split()[0],
+            "baseline_ms": round(baseline, 2),
+            "import_ms": round(best_ms("import pyinitgen.cli", args.repeat) - baseline, 2),
+            "check_ms": round(best_ms(check_run, args.repeat) - baseline, 2),
+            "budget_ms": args.budget_ms,
+            "lazy_modules_loaded": sorted(set(loaded_lazy_modules("import pyinitgen.cli") + loaded_lazy_modules(check_run))),
+        }
+    print(json.dumps(report, indent=2))
+
+    if report["lazy_modules_loaded"]:
+        print(f"Imported on startup: {', '.join(report['lazy_modules_loaded'])}", file=sys.stderr)
+        return 1
+    if report["import_ms"] > args.budget_ms:
+        print(f"Import took {report['import_ms']}ms, over the {args.budget_ms}ms budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
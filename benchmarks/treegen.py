@@ -0,0 +1,115 @@
+# benchmarks/treegen.py
+
+"""
+Deterministic synthetic source trees for benchmarking pyinitgen.
+
+    python benchmarks/treegen.py /tmp/tree --depth 5 --fanout 10
+
+The same parameters and seed always produce the same tree. Directories
+are created depth-first from an explicit stack, so memory stays flat
+even for trees with millions of directories.
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import NamedTuple
+
+# Names pyinitgen excludes by default; excluded subtrees are fully
+# populated so that failing to prune them shows up in the timings
+EXCLUDED_NAMES = ("node_modules", "build", "__pycache__", ".venv", "dist", ".tox")
+
+
+class TreeStats(NamedTuple):
+    dirs: int
+    excluded_dirs: int
+    files: int
+    inits: int
+
+
+def generate_tree(
+    root: str,
+    depth: int = 4,
+    fanout: int = 8,
+    files_per_dir: float = 2.0,
+    excluded_ratio: float = 0.05,
+    init_ratio: float = 0.5,
+    seed: int = 0,
+) -> TreeStats:
+    """
+    Creates a tree under root (which must not exist yet).
+
+    - depth: levels below root; the tree has sum(fanout**k) directories
+    - fanout: subdirectories per directory
+    - files_per_dir: mean number of .py files per directory
+    - excluded_ratio: share of subdirectories given an excluded name
+    - init_ratio: share of directories that already have __init__.py
+    """
+    rng = random.Random(seed)
+    dirs = excluded_dirs = files = inits = 0
+
+    os.makedirs(root)
+    stack = [(root, 0, False)]
+    while stack:
+        path, level, excluded = stack.pop()
+        dirs += 1
+        excluded_dirs += excluded
+
+        if rng.random() < init_ratio:
+            open(os.path.join(path, "__init__.py"), "w").close()
+            inits += 1
+        # Spread the file count around the mean: floor or ceil of it
+        count = int(files_per_dir) + (rng.random() < files_per_dir % 1)
+        for i in range(count):
+            open(os.path.join(path, f"mod{i}.py"), "w").close()
+        files += count
+
+        if level == depth:
+            continue
+        free_names = list(EXCLUDED_NAMES)
+        for i in range(fanout):
+            child_excluded = excluded
+            name = f"d{i}"
+            if free_names and rng.random() < excluded_ratio:
+                name = free_names.pop(rng.randrange(len(free_names)))
+                child_excluded = True
+            child = os.path.join(path, name)
+            os.mkdir(child)
+            stack.append((child, level + 1, child_excluded))
+
+    return TreeStats(dirs, excluded_dirs, files, inits)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--depth", type=int, default=4, help="Levels below the root (default: 4)")
+    parser.add_argument("--fanout", type=int, default=8, help="Subdirectories per directory (default: 8)")
+    parser.add_argument("--files-per-dir", type=float, default=2.0, help="Mean .py files per directory (default: 2)")
+    parser.add_argument("--excluded-ratio", type=float, default=0.05, help="Share of excluded subdirectories (default: 0.05)")
+    parser.add_argument("--init-ratio", type=float, default=0.5, help="Share of directories with __init__.py (default: 0.5)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+
+
+def tree_params(args: argparse.Namespace) -> dict:
+    return {
+        "depth": args.depth,
+        "fanout": args.fanout,
+        "files_per_dir": args.files_per_dir,
+        "excluded_ratio": args.excluded_ratio,
+        "init_ratio": args.init_ratio,
+        "seed": args.seed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic source tree.")
+    parser.add_argument("root", help="Directory to create")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    stats = generate_tree(args.root, **tree_params(args))
+    print(json.dumps(stats._asdict()))
+
+
+if __name__ == "__main__":
+    main()
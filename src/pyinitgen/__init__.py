@@ -1,2 +1,31 @@
 # src/pyinitgen/__init__.py
 
+__version__ = "4.0.1"
+
+# The public API is imported on first use, so `pyinitgen query` and other
+# light entry points do not pay for the walker and config modules.
+_LAZY_EXPORTS = {
+    "iter_events": "events",
+    "iter_missing": "events",
+    "Scanned": "events",
+    "Missing": "events",
+    "Created": "events",
+    "Error": "events",
+    "Synced": "events",
+    "Done": "events",
+    "Scanner": "scanner",
+    "Result": "scanner",
+}
+
+__all__ = ["__version__", *_LAZY_EXPORTS]
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
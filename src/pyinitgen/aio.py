@@ -0,0 +1,248 @@
+# src/pyinitgen/aio.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+from . import throttle
+from .events import Created, Done, Error, Event, Missing, Scanned
+from .matcher import ExcludeMatcher
+from .walker import child_rel, scan_dir
+from .writer import InitWriter
+
+DEFAULT_MAX_IN_FLIGHT = 64
+
+
+class LocalFS:
+    """
+    The blocking filesystem calls of the async engine. They run on
+    executor threads, so they may block for as long as the mount needs.
+    The engine takes the I/O budget before each call, so they do not.
+    """
+
+    def scan(self, path: str, rel: str, excludes: ExcludeMatcher) -> Tuple[List[str], bool]:
+        return scan_dir(path, rel, excludes, throttled=False)
+
+    def create(self, directory: str, init_content: str) -> bool:
+        with InitWriter(init_content, throttled=False) as writer:
+            return writer.create(directory)
+
+
+class LatencyFS(LocalFS):
+    """
+    LocalFS with network-like latency added to every call, for testing and
+    benchmarking the async engine without an NFS or FUSE mount.
+
+    Each call sleeps `latency` seconds plus up to `jitter` more. With
+    `capacity`, the fake server saturates: every call beyond `capacity`
+    in flight adds `congestion` seconds, like a queueing NFS server.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.005,
+        jitter: float = 0.0,
+        capacity: Optional[int] = None,
+        congestion: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.capacity = capacity
+        self.congestion = congestion
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay(self, call, *args):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            delay = self.latency + self._rng.random() * self.jitter
+            if self.capacity is not None and self.in_flight > self.capacity:
+                delay += (self.in_flight - self.capacity) * self.congestion
+        try:
+            time.sleep(delay)
+            return call(*args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def scan(self, path: str, rel: str, excludes: ExcludeMatcher) -> Tuple[List[str], bool]:
+        return self._delay(super().scan, path, rel, excludes)
+
+    def create(self, directory: str, init_content: str) -> bool:
+        return self._delay(super().create, directory, init_content)
+
+
+class AdaptiveLimiter:
+    """
+    Caps the filesystem calls in flight, adjusting the cap from observed
+    latencies. While a call takes no longer than `tolerance` times the
+    fastest one seen, the mount keeps up and the limit grows: by one per
+    call until the first slowdown (like TCP slow start), then by one per
+    limit's worth of calls. When calls slow down, requests are queueing
+    on the server, and the limit is cut by `backoff`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = DEFAULT_MAX_IN_FLIGHT,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.best_latency: Optional[float] = None
+        self.peak_limit = self.limit
+        self.slow_start = True
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self.in_flight += 1
+
+    def release(self, latency: float) -> None:
+        self.in_flight -= 1
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        if latency <= self.best_latency * self.tolerance:
+            step = 1 if self.slow_start else 1 / self.limit
+            self.limit = min(self.limit + step, self.maximum)
+        else:
+            self.slow_start = False
+            self.limit = max(self.limit * self.backoff, self.minimum)
+        self.peak_limit = max(self.peak_limit, self.limit)
+
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.pop(0)
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+async def aiter_events(
+    base_dir: Path,
+    excludes: ExcludeMatcher,
+    dry_run: bool = False,
+    check: bool = False,
+    init_content: str = "",
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    fs: Optional[LocalFS] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+) -> AsyncIterator[Event]:
+    """
+    The async engine behind iter_events(engine="async"). Listing and
+    writing run on a thread pool, with as many calls in flight as the
+    limiter allows, so a mount with milliseconds of latency per call is
+    kept busy. Records arrive in completion order, not walk order.
+
+    Stopping early cancels the queued calls; the ones already running on
+    the executor still complete.
+    """
+    fs = fs if fs is not None else LocalFS()
+    limiter = limiter if limiter is not None else AdaptiveLimiter(maximum=max_in_flight)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=limiter.maximum)
+
+    async def call(take: Callable[..., float], func, *args):
+        budget = throttle.ACTIVE
+        if budget is not None:
+            # Waiting for the I/O budget is not mount latency, so it is
+            # done before the call is timed and without holding a slot
+            wait = take(budget, wait=False)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        await limiter.acquire()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+    async def scan(root: str, rel: str):
+        try:
+            return "scan", root, rel, await call(throttle.IOBudget.listing, fs.scan, root, rel, excludes)
+        except OSError:
+            # Same as os.walk: unreadable directories are skipped
+            return "skip", root, rel, None
+
+    async def create(root: str):
+        try:
+            return "create", root, None, await call(throttle.IOBudget.write, fs.create, root, init_content)
+        except OSError as e:
+            return "error", root, None, e
+
+    scanned = missing = created = 0
+    pending = {asyncio.ensure_future(scan(os.fspath(base_dir), ""))}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                kind, root, rel, result = task.result()
+                if kind == "skip":
+                    continue
+                if kind == "error":
+                    init_file = Path(root) / "__init__.py"
+                    yield Error(str(init_file), f"Failed to create {init_file}: {result}")
+                    continue
+                if kind == "create":
+                    if result:
+                        created += 1
+                        yield Created(str(Path(root) / "__init__.py"))
+                    continue
+
+                subdirs, has_init = result
+                scanned += 1
+                yield Scanned(root, has_init)
+                for name in subdirs:
+                    pending.add(asyncio.ensure_future(scan(os.path.join(root, name), child_rel(rel, name))))
+                if has_init:
+                    continue
+                missing += 1
+                yield Missing(root)
+                if not (check or dry_run):
+                    pending.add(asyncio.ensure_future(create(root)))
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        executor.shutdown(wait=False)
+
+    yield Done(scanned, missing, created)
+
+
+def iter_async_events(base_dir: Path, excludes: ExcludeMatcher, **options) -> Iterator[Event]:
+    """
+    Runs aiter_events on a private event loop, one record at a time, so
+    that synchronous callers get the same lazy, stoppable stream.
+    """
+    loop = asyncio.new_event_loop()
+    events = aiter_events(base_dir, excludes, **options)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(events.aclose())
+        loop.close()
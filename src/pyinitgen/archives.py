@@ -0,0 +1,135 @@
+# src/pyinitgen/archives.py
+
+import logging
+import os
+import posixpath
+import tarfile
+import zipfile
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from .matcher import ExcludeMatcher
+from .walker import walk_dir_set
+
+# Packaging metadata directories that never need an __init__.py
+METADATA_SUFFIXES = (".dist-info", ".data", ".egg-info")
+
+# Clear tarfile's member cache every this many members so memory stays
+# flat on multi-GB archives
+_TAR_FLUSH_EVERY = 1024
+
+
+class ArchiveError(Exception):
+    """
+    Raised when a file is not a readable zip, wheel or tar archive.
+    """
+
+
+def iter_members(path: str) -> Iterator[Tuple[str, bool]]:
+    """
+    Yields (name, is_dir) for every member of a zip/wheel or tar/sdist
+    without extracting anything. Zip files are read from their central
+    directory; tar files are streamed member by member.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                yield info.filename, info.is_dir()
+        return
+
+    try:
+        tar = tarfile.open(path, mode="r|*")
+    except (OSError, tarfile.TarError) as e:
+        raise ArchiveError(f"{path} is not a zip or tar archive: {e}")
+
+    with tar:
+        try:
+            for count, member in enumerate(tar, 1):
+                yield member.name, member.isdir()
+                if count % _TAR_FLUSH_EVERY == 0:
+                    tar.members = []
+        except tarfile.TarError as e:
+            raise ArchiveError(f"{path} is corrupt: {e}")
+
+
+def archive_dirs(
+    members: Iterable[Tuple[str, bool]]
+) -> Tuple[Set[Tuple[str, ...]], Set[Tuple[str, ...]]]:
+    """
+    Builds the directory set of an archive from its member names.
+    Returns (dirs, init_dirs) as relative path tuples. A lone top-level
+    directory that cannot be a package, like an sdist's `name-1.0/`, is
+    treated as the archive root.
+    """
+    dirs: Set[Tuple[str, ...]] = set()
+    init_dirs: Set[Tuple[str, ...]] = set()
+    top_level_files = False
+    for name, is_dir in members:
+        name = posixpath.normpath(name.lstrip("/"))
+        if name == "." or name == ".." or name.startswith("../"):
+            continue
+        parts = tuple(name.split("/"))
+        if not is_dir:
+            top_level_files = top_level_files or len(parts) == 1
+            if parts[-1] == "__init__.py":
+                init_dirs.add(parts[:-1])
+
+        end = len(parts) if is_dir else len(parts) - 1
+        for i in range(1, end + 1):
+            dirs.add(parts[:i])
+
+    top_level = {parts[0] for parts in dirs}
+    if len(top_level) == 1 and not top_level_files:
+        (root,) = top_level
+        if not root.isidentifier():
+            dirs = {parts[1:] for parts in dirs if len(parts) > 1}
+            init_dirs = {parts[1:] for parts in init_dirs if len(parts) > 1}
+    return dirs, init_dirs
+
+
+def check_archive(path: str, excludes: ExcludeMatcher) -> Tuple[int, List[str]]:
+    """
+    Returns (scanned, missing) for one archive, applying the same
+    exclusion rules as create_inits. The archive root itself is not a
+    package and is never reported.
+    """
+    dirs, init_dirs = archive_dirs(iter_members(path))
+    dirs = {
+        parts
+        for parts in dirs
+        if parts and not any(part.endswith(METADATA_SUFFIXES) for part in parts)
+    }
+
+    scanned = 0
+    missing = []
+    for root, has_init in walk_dir_set(f"{path}!", dirs, init_dirs, excludes):
+        scanned += 1
+        if not has_init:
+            missing.append(root)
+    return scanned, missing
+
+
+def check_archives(
+    paths: Iterable[str], excludes: ExcludeMatcher, use_emoji: bool = True
+) -> int:
+    """
+    Checks each archive and logs every directory missing __init__.py.
+    Returns the exit code: 1 if anything is missing or unreadable.
+    """
+    exit_code = 0
+    for path in paths:
+        try:
+            scanned, missing = check_archive(os.fspath(path), excludes)
+        except (OSError, ArchiveError, zipfile.BadZipFile) as e:
+            logging.error(f"Failed to read {path}: {e}")
+            exit_code = 1
+            continue
+
+        for root in missing:
+            logging.error(f"Missing __init__.py in {root}")
+        if missing:
+            logging.error(f"Found {len(missing)} missing __init__.py files in {path}.")
+            exit_code = 1
+        else:
+            checkmark = "✅ " if use_emoji else ""
+            logging.info(f"{checkmark}{path}: all {scanned} directories have __init__.py files.")
+    return exit_code
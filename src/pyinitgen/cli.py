@@ -2,12 +2,30 @@
 # src/pyinitgen/cli.py
 
 import argparse
+import importlib
 import logging
 import os
+import sys
+import time
 from pathlib import Path
-from .banner import print_logo
-from .config import EXCLUDE_DIRS, IGNORE_FILE_NAME, load_config
-from .ignores import load_ignore_patterns
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, TextIO, Tuple
+from . import __version__, profiling, throttle
+from .throttle import IOBudget, parse_io_budget
+
+# The scan machinery (events, walker, config and tomllib, ...) is imported
+# inside the functions that use it: `pyinitgen query` is dispatched from
+# main() and must not pay for it.
+if TYPE_CHECKING:
+    from .events import Event
+
+
+def __getattr__(name):
+    # Still importable from here, as before the imports became lazy
+    if name == "load_ignore_patterns":
+        from .ignores import load_ignore_patterns
+
+        return load_ignore_patterns
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def create_inits(
@@ -17,52 +35,129 @@ def create_inits(
     use_emoji: bool = True,
     init_content: str = "",
     check: bool = False,
+    jobs: int = 1,
+    processes: int = 0,
+    cache: bool = False,
+    changed: Optional[Iterable[str]] = None,
+    source: str = "walk",
+    gitignore: bool = False,
+    only_python: bool = False,
+    stats_json: Optional[Path] = None,
+    stats_openmetrics: Optional[Path] = None,
+    durable: bool = False,
+    engine: str = "threads",
+    max_in_flight: int = 64,
+    io_budget: Optional[IOBudget] = None,
+    low_memory: bool = False,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
 ):
-    created_count = 0
-    scanned_dirs = 0
-    missing_count = 0
-    
-    user_excludes = load_ignore_patterns(base_dir)
-    config_excludes = load_config(base_dir)
-    all_excludes = EXCLUDE_DIRS.union(user_excludes).union(config_excludes)
+    from .events import iter_events
+    from .ignores import collect_ignores
+    from .stats import PruneCounter, RunStats, export_stats, peak_rss_bytes
 
-    for root, dirs, files in os.walk(base_dir):
-        # Filter out unwanted dirs
-        dirs[:] = [d for d in dirs if d not in all_excludes]
-        scanned_dirs += 1
+    start = time.perf_counter()
+    counter = None
+    if stats_json is not None or stats_openmetrics is not None:
+        # Pruning happens inside the walk, so count it at the matcher
+        with profiling.span("loading config"):
+            counter = PruneCounter(collect_ignores(base_dir, gitignore))
 
-        if verbose:
-            logging.debug(f"Scanning: {root}")
+    events = iter_events(
+        base_dir,
+        dry_run=dry_run,
+        check=check,
+        init_content=init_content,
+        jobs=jobs,
+        processes=processes,
+        cache=cache,
+        changed=changed,
+        source=source,
+        gitignore=gitignore,
+        only_python=only_python,
+        excludes=counter,
+        durable=durable,
+        engine=engine,
+        max_in_flight=max_in_flight,
+        low_memory=low_memory,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+    )
+    with throttle.throttled(io_budget):
+        exit_code, created_count, scanned_dirs, missing_count, failures = _report_events(
+            events, verbose, use_emoji, check, dry_run
+        )
+    throttled_seconds = io_budget.throttled_seconds if io_budget is not None else 0.0
+    if throttled_seconds:
+        logging.info(f"Throttled for {throttled_seconds:.2f}s to stay within {io_budget.describe()}")
+
+    if counter is not None:
+        stats = RunStats(
+            str(base_dir),
+            scanned_dirs,
+            counter.pruned,
+            missing_count,
+            created_count,
+            failures,
+            time.perf_counter() - start,
+            time.time(),
+            throttled_seconds,
+            peak_rss_bytes(),
+        )
+        try:
+            export_stats(stats, stats_json, stats_openmetrics)
+        except OSError as e:
+            logging.warning(f"Could not write run statistics: {e}")
+
+    return exit_code, created_count, scanned_dirs
 
-        if "__init__.py" not in files:
-            init_file = Path(root) / "__init__.py"
 
+def _report_events(
+    events: Iterator["Event"], verbose: bool, use_emoji: bool, check: bool, dry_run: bool
+) -> Tuple[int, int, int, int, int]:
+    """
+    Logs the records of a run as they arrive.
+    Returns (exit code, created, scanned, missing, failures).
+    """
+    from .events import Created, Done, Error, Missing, Scanned, Synced
+
+    created_count = 0
+    scanned_dirs = 0
+    missing_count = 0
+
+    for event in events:
+        if isinstance(event, Scanned):
+            scanned_dirs += 1
+            if verbose:
+                logging.debug(f"Scanning: {event.path}")
+        elif isinstance(event, Missing):
+            missing_count += 1
             if check:
-                logging.error(f"Missing __init__.py in {root}")
-                missing_count += 1
-                continue
-
-            if dry_run:
-                logging.info(f"[DRY-RUN] Would create {init_file}")
-            else:
-                try:
-                    with open(init_file, "w") as f:
-                        f.write(init_content)
-                    init_file.chmod(0o644) # Set permissions after writing
-                    logging.info(f"Created {init_file}")
-                    created_count += 1
-                except Exception as e:
-                    logging.error(f"Failed to create {init_file}: {e}")
-                    return 1, created_count, scanned_dirs
+                logging.error(f"Missing __init__.py in {event.path}")
+            elif dry_run:
+                logging.info(f"[DRY-RUN] Would create {Path(event.path) / '__init__.py'}")
+        elif isinstance(event, Created):
+            created_count += 1
+            logging.info(f"Created {event.path}")
+        elif isinstance(event, Error):
+            logging.error(event.message)
+            events.close()
+            return 1, created_count, scanned_dirs, missing_count, 1
+        elif isinstance(event, Synced):
+            logging.info(
+                f"Synced {event.files} files and {event.dirs} directories to disk in {event.seconds:.2f}s"
+            )
+        elif isinstance(event, Done):
+            scanned_dirs = event.scanned
 
     if check:
         if missing_count > 0:
             logging.error(f"Found {missing_count} missing __init__.py files.")
-            return 1, created_count, scanned_dirs
+            return 1, created_count, scanned_dirs, missing_count, 0
         else:
             checkmark = "✅ " if use_emoji else ""
             logging.info(f"{checkmark}All directories have __init__.py files.")
-            return 0, created_count, scanned_dirs
+            return 0, created_count, scanned_dirs, missing_count, 0
 
     if dry_run:
         logging.info("Dry-run complete. No files created.")
@@ -73,11 +168,131 @@ def create_inits(
             f"Scanned {scanned_dirs} dirs, created {created_count} new __init__.py files."
         )
 
-    return 0, created_count, scanned_dirs
+    return 0, created_count, scanned_dirs, missing_count, 0
+
+
+def read_paths(stream: TextIO, null_separated: bool = False) -> List[str]:
+    """
+    Reads a list of paths, one per line or NUL-separated (`git diff -z`).
+    """
+    if null_separated:
+        data = getattr(stream, "buffer", None)
+        raw = data.read() if data is not None else stream.read().encode()
+        return [os.fsdecode(p) for p in raw.split(b"\0") if p]
+    return [line for line in stream.read().splitlines() if line]
+
+
+# Subcommands and the module whose main(argv) implements them, or
+# "module:function" for another entry point. They are dispatched before
+# the banner, the flag parser and the scan modules are loaded, so that
+# `pyinitgen query` stays cheap to start.
+SUBCOMMANDS = {
+    "daemon": "pyinitgen.daemon",
+    "query": "pyinitgen.client",
+    "plan": "pyinitgen.plan:plan_main",
+    "apply": "pyinitgen.plan:apply_main",
+}
+
+NO_BANNER_ENV = "PYINITGEN_NO_BANNER"
+
+
+def show_banner(argv: List[str]) -> bool:
+    """
+    The logo is for people: it is skipped when stdout is not a terminal,
+    with --no-banner, or when PYINITGEN_NO_BANNER is set. The flags are
+    not parsed yet when the banner is printed, hence the argv check.
+    """
+    if "--no-banner" in argv or os.environ.get(NO_BANNER_ENV):
+        return False
+    return sys.stdout.isatty()
+
+
+def run(args: argparse.Namespace, changed: Optional[List[str]]) -> int:
+    """
+    Runs the mode selected on the command line and returns the exit code.
+    """
+    if args.ionice and not throttle.lower_io_priority():
+        logging.warning("Could not lower the I/O priority, ioprio_set is not available")
+
+    from .ignores import collect_excludes, collect_ignores
+    from .walker import default_jobs
+
+    # The archive and watch modes import their modules (tarfile, zipfile,
+    # ctypes) only when used, to keep the startup of plain scans short
+    if args.archive:
+        from .archives import check_archives
+
+        base_dir = args.base_dir.resolve()
+        return check_archives(args.archive, collect_excludes(base_dir), use_emoji=not args.no_emoji)
+
+    if args.watch:
+        from .watch import Watcher
+
+        base_dir = args.base_dir.resolve()
+        try:
+            watcher = Watcher(
+                base_dir,
+                collect_ignores(base_dir, args.gitignore),
+                dry_run=args.dry_run,
+                check=args.check,
+                init_content=args.init_content,
+            )
+        except OSError as e:
+            logging.error(f"Watch mode is unavailable: {e}")
+            return 1
+
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    exit_code, _, _ = create_inits(
+        args.base_dir.resolve(),
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+        use_emoji=not args.no_emoji,
+        init_content=args.init_content,
+        check=args.check,
+        jobs=args.jobs or default_jobs(),
+        processes=args.processes,
+        cache=args.cache,
+        changed=changed,
+        source=args.source,
+        gitignore=args.gitignore,
+        only_python=args.only_python,
+        stats_json=args.stats_json,
+        stats_openmetrics=args.stats_openmetrics,
+        durable=args.durable,
+        engine=args.engine,
+        max_in_flight=args.max_in_flight,
+        io_budget=args.io_budget,
+        low_memory=args.low_memory,
+        follow_symlinks=args.follow_symlinks,
+        one_file_system=args.one_file_system,
+    )
+    return exit_code
 
 
 def main():
-    print_logo()
+    argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        module_name, _, function = SUBCOMMANDS[argv[0]].partition(":")
+        module = importlib.import_module(module_name)
+        raise SystemExit(getattr(module, function or "main")(argv[1:]))
+
+    from .stats import peak_rss_bytes
+
+    startup = ()
+    if show_banner(argv):
+        # Timed unconditionally: --profile is only known once the flags are parsed
+        start = time.perf_counter()
+        from .banner import print_logo
+
+        imported = time.perf_counter()
+        print_logo()
+        startup = (("importing rich", imported - start), ("banner", time.perf_counter() - imported))
+
     parser = argparse.ArgumentParser(
         description="Ensure all directories have __init__.py files."
     )
@@ -99,6 +314,11 @@ def main():
     parser.add_argument(
         "--no-emoji", action="store_true", help="Disable emoji in output"
     )
+    parser.add_argument(
+        "--no-banner",
+        action="store_true",
+        help=f"Do not print the logo (also skipped when stdout is not a terminal or {NO_BANNER_ENV} is set)",
+    )
     parser.add_argument(
         "--init-content",
         type=str,
@@ -111,10 +331,220 @@ def main():
         help="Check for missing __init__.py files without creating them",
     )
     parser.add_argument(
-        "--version", action="version", version=f"%(prog)s 4.0.0", help="Show program's version number and exit"
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of threads used to list directories (default: based on CPU count)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "async"],
+        default="threads",
+        help="threads (default) or async: an asyncio engine that adapts how many "
+        "filesystem calls are in flight, for high-latency NFS/FUSE mounts",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=64,
+        metavar="N",
+        help="Upper bound on concurrent filesystem calls for --engine async (default: 64)",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Walk on one thread with compact records, so memory does not grow with "
+        "directory width (for trees with tens of millions of directories)",
+    )
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Descend into symlinked directories; each directory is walked once, "
+        "however many links lead to it",
+    )
+    parser.add_argument(
+        "--one-file-system",
+        action="store_true",
+        help="Do not enter directories on other mounts than --base-dir",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Scan with N worker processes instead of threads (for very large trees)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Keep an index in the user cache dir and skip directories that have not changed",
+    )
+    parser.add_argument(
+        "--changed",
+        nargs="*",
+        metavar="PATH",
+        default=None,
+        help="Only validate the directories leading to these changed paths "
+        "(read from stdin when none are given)",
+    )
+    parser.add_argument(
+        "-z",
+        "--null",
+        action="store_true",
+        help="Changed paths on stdin are NUL-separated (git diff --name-only -z)",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["walk", "git-index"],
+        default="walk",
+        help="Where directories come from: walk the tree (default) or read the "
+        "tracked paths from .git/index",
+    )
+    parser.add_argument(
+        "--gitignore",
+        action="store_true",
+        help="Also skip directories ignored by .gitignore files at any level",
+    )
+    parser.add_argument(
+        "--only-python",
+        action="store_true",
+        help="Only add __init__.py to directories that lead to Python sources, "
+        "and skip trees that contain none",
+    )
+    parser.add_argument(
+        "--archive",
+        nargs="+",
+        metavar="FILE",
+        help="Check wheels, sdists or zip/tar archives without extracting them",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and fix new directories as they appear (Linux only)",
+    )
+    parser.add_argument(
+        "--durable",
+        action="store_true",
+        help="fsync the new files and their directories before exiting, so they survive a crash",
+    )
+    parser.add_argument(
+        "--io-budget",
+        metavar="SPEC",
+        help="Cap directory listings and writes per second, e.g. 500 (listings) or "
+        "listings=500,writes=50, so scans do not hurt co-located workloads",
+    )
+    parser.add_argument(
+        "--ionice",
+        action="store_true",
+        help="Run at the lowest best-effort I/O priority, like ionice -c2 -n7 (Linux only)",
+    )
+    parser.add_argument(
+        "--stats-json",
+        type=Path,
+        metavar="FILE",
+        help="Write run statistics (scanned, pruned, missing, created, failures, duration) as JSON",
+    )
+    parser.add_argument(
+        "--stats-openmetrics",
+        type=Path,
+        metavar="FILE",
+        help="Write run statistics in OpenMetrics text format, e.g. for the node exporter "
+        "textfile collector",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print how long each phase took and what was scanned, to stderr",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        help="Also dump cProfile stats to FILE for pstats or snakeviz (implies --profile)",
+    )
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {__version__}", help="Show program's version number and exit"
     )
 
     args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.processes < 0:
+        parser.error("--processes must not be negative")
+    if args.cache and args.processes:
+        parser.error("--cache cannot be combined with --processes")
+    if args.only_python:
+        for flag, value in (
+            ("--processes", args.processes),
+            ("--changed", args.changed is not None),
+            ("--source git-index", args.source == "git-index"),
+            ("--watch", args.watch),
+            ("--archive", args.archive),
+        ):
+            if value:
+                parser.error(f"--only-python cannot be combined with {flag}")
+
+    if (args.stats_json or args.stats_openmetrics) and (args.watch or args.archive):
+        parser.error("--stats-json and --stats-openmetrics only apply to scans, not --watch or --archive")
+    if args.max_in_flight < 1:
+        parser.error("--max-in-flight must be at least 1")
+    if args.engine == "async":
+        for flag, value in (
+            ("--processes", args.processes),
+            ("--cache", args.cache),
+            ("--changed", args.changed is not None),
+            ("--source git-index", args.source == "git-index"),
+            ("--only-python", args.only_python),
+            ("--watch", args.watch),
+            ("--archive", args.archive),
+        ):
+            if value:
+                parser.error(f"--engine async cannot be combined with {flag}")
+    if args.durable and args.watch:
+        parser.error("--durable cannot be combined with --watch")
+    if args.low_memory:
+        for flag, value in (
+            ("--jobs", args.jobs is not None and args.jobs > 1),
+            ("--processes", args.processes),
+            ("--engine async", args.engine == "async"),
+            ("--cache", args.cache),
+            ("--only-python", args.only_python),
+            ("--changed", args.changed is not None),
+            ("--source git-index", args.source == "git-index"),
+            ("--watch", args.watch),
+            ("--archive", args.archive),
+        ):
+            if value:
+                parser.error(f"--low-memory cannot be combined with {flag}")
+    for option, enabled in (
+        ("--follow-symlinks", args.follow_symlinks),
+        ("--one-file-system", args.one_file_system),
+    ):
+        if not enabled:
+            continue
+        for flag, value in (
+            ("--processes", args.processes),
+            ("--engine async", args.engine == "async"),
+            ("--cache", args.cache),
+            ("--only-python", args.only_python),
+            ("--changed", args.changed is not None),
+            ("--source git-index", args.source == "git-index"),
+            ("--watch", args.watch),
+            ("--archive", args.archive),
+        ):
+            if value:
+                parser.error(f"{option} cannot be combined with {flag}")
+    if args.io_budget is not None:
+        for flag, value in (
+            ("--processes", args.processes),
+            ("--watch", args.watch),
+            ("--archive", args.archive),
+        ):
+            if value:
+                parser.error(f"--io-budget cannot be combined with {flag}")
+        try:
+            args.io_budget = parse_io_budget(args.io_budget)
+        except ValueError as e:
+            parser.error(f"--io-budget: {e}")
 
     logging.basicConfig(
         level=logging.ERROR
@@ -125,14 +555,23 @@ def main():
         format="%(message)s",
     )
 
-    exit_code, _, _ = create_inits(
-        args.base_dir.resolve(),
-        dry_run=args.dry_run,
-        verbose=args.verbose,
-        use_emoji=not args.no_emoji,
-        init_content=args.init_content,
-        check=args.check,
-    )
+    changed = None
+    if args.changed is not None:
+        changed = args.changed or read_paths(sys.stdin, args.null)
+
+    if not (args.profile or args.profile_output):
+        raise SystemExit(run(args, changed))
+
+    with profiling.profiling(args.profile_output) as profiler:
+        for name, seconds in startup:
+            profiler.add_time(name, seconds)
+        exit_code = run(args, changed)
+        rss = peak_rss_bytes()
+        if rss:
+            profiler.count("peak RSS (KiB)", rss // 1024)
+    print(profiler.format_summary(), file=sys.stderr)
+    if args.profile_output:
+        print(f"cProfile stats written to {args.profile_output}", file=sys.stderr)
     raise SystemExit(exit_code)
 
 
@@ -0,0 +1,130 @@
+# src/pyinitgen/client.py
+
+# Thin client for `pyinitgen daemon`. It is run from hooks many times a
+# day, so it only imports the standard library modules it needs.
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+from typing import List, Optional
+
+
+def _uid() -> int:
+    return os.getuid() if hasattr(os, "getuid") else 0
+
+
+def socket_path(base_dir: str) -> str:
+    """
+    Path of the Unix socket served by the daemon for base_dir. It lives
+    in XDG_RUNTIME_DIR, which only the user can access, or else in a
+    pyinitgen-<uid> directory of the temp dir that the daemon creates
+    with mode 0700.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        tempfile.gettempdir(), f"pyinitgen-{_uid()}"
+    )
+    digest = hashlib.sha1(os.fsencode(base_dir)).hexdigest()[:16]
+    return os.path.join(runtime_dir, f"pyinitgen-{_uid()}-{digest}.sock")
+
+
+def request(base_dir: str, message: dict, timeout: float = 5.0) -> Optional[dict]:
+    """
+    Sends one JSON request to the daemon serving base_dir.
+    Returns the decoded reply, or None if no daemon answered: none is
+    listening, it timed out or dropped the connection, or its reply was
+    not a JSON object. A socket owned by another user is never trusted
+    and counts as none.
+    """
+    path = socket_path(base_dir)
+    try:
+        if os.stat(path).st_uid != _uid():
+            return None
+    except OSError:
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        # Includes timeouts, e.g. while the daemon reloads a large tree
+        return None
+    finally:
+        sock.close()
+    try:
+        reply = json.loads(b"".join(chunks))
+    except ValueError:
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def query_missing(base_dir: str, path: str) -> Optional[List[str]]:
+    """
+    Asks the daemon which directories under path lack __init__.py.
+    Returns None if no daemon is running for base_dir, or if it answered
+    with an error.
+    """
+    reply = request(base_dir, {"cmd": "missing", "path": path})
+    if reply is None or not isinstance(reply.get("missing"), list):
+        return None
+    return reply["missing"]
+
+
+def spawn_daemon(base_dir: str) -> None:
+    """
+    Starts a detached daemon for base_dir in the background.
+    """
+    subprocess.Popen(
+        [sys.executable, "-m", "pyinitgen.cli", "daemon", "--base-dir", base_dir, "--quiet"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pyinitgen query",
+        description="Ask a running pyinitgen daemon which directories lack __init__.py.",
+    )
+    parser.add_argument("path", nargs="?", help="Directory to check (default: --base-dir)")
+    parser.add_argument(
+        "--base-dir",
+        default=".",
+        help="Base directory the daemon serves (default: current dir)",
+    )
+    parser.add_argument(
+        "--spawn",
+        action="store_true",
+        help="Start a daemon in the background if none is running",
+    )
+    args = parser.parse_args(argv)
+
+    base_dir = os.path.realpath(args.base_dir)
+    path = os.path.realpath(args.path) if args.path else base_dir
+
+    missing = query_missing(base_dir, path)
+    if missing is None:
+        if args.spawn:
+            spawn_daemon(base_dir)
+        # No daemon yet: answer this one in-process
+        from .daemon import scan_missing
+
+        missing = scan_missing(base_dir, path)
+
+    for root in missing:
+        print(f"Missing __init__.py in {root}", file=sys.stderr)
+    return 1 if missing else 0
@@ -1,7 +1,8 @@
 # src/pyinitgen/config.py
+import os
 import sys
 from pathlib import Path
-from typing import Set
+from typing import Iterable, List, Set
 
 if sys.version_info >= (3, 11):
     import tomllib
@@ -35,7 +36,7 @@ EXCLUDE_DIRS = {
     "build",
     "dist",
     "eggs",
-    ".egg-info",
+    "*.egg-info",
 
     # Docs
     "docs",
@@ -60,12 +61,67 @@ EXCLUDE_DIRS = {
 }
 
 IGNORE_FILE_NAME = ".pyinitgenignore"
+GITIGNORE_FILE_NAME = ".gitignore"
+
+# Files in the base dir whose changes alter the compiled configuration
+CONFIG_FILE_NAMES = (".pyinitgen.toml", "pyproject.toml", IGNORE_FILE_NAME)
+
+# A directory holding one of these files is known to contain no Python
+# code, so --only-python does not descend into it. CACHEDIR.TAG marks
+# cache directories (https://bford.info/cachedir/).
+PYTHON_FREE_MARKERS = ("CACHEDIR.TAG",)
+
+def cache_dir() -> Path:
+    """
+    pyinitgen's directory in the user's cache (XDG_CACHE_HOME, or
+    ~/.cache), for files that must not go into the scanned tree.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "pyinitgen"
+
+
+def config_stamp(base_dir: Path, names: Iterable[str] = CONFIG_FILE_NAMES) -> tuple:
+    """
+    The (mtime, size) of each config file in base_dir, None for missing
+    ones, so long-lived callers can tell when to reload.
+    """
+    stamp = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(base_dir, name))
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((st.st_mtime_ns, st.st_size))
+    return tuple(stamp)
+
 
 def load_config(base_dir: Path) -> Set[str]:
     """
     Loads configuration from pyproject.toml or .pyinitgen.toml.
     Returns a set of exclude dirs found in the config.
     """
+    return set(load_config_patterns(base_dir))
+
+
+def load_config_patterns(base_dir: Path) -> List[str]:
+    """
+    Same as load_config, but keeps the configured order, which matters
+    for `!` negations.
+    """
+    return _load_list_setting(base_dir, "exclude_dirs")
+
+
+def load_python_free_markers(base_dir: Path) -> List[str]:
+    """
+    File names that mark a directory tree as free of Python code for
+    --only-python: the built-in markers plus `python_free_markers` from
+    the config.
+    """
+    return list(PYTHON_FREE_MARKERS) + _load_list_setting(base_dir, "python_free_markers")
+
+
+def _load_list_setting(base_dir: Path, key: str) -> List[str]:
     config_files = [".pyinitgen.toml", "pyproject.toml"]
 
     for filename in config_files:
@@ -78,11 +134,11 @@ def load_config(base_dir: Path) -> Set[str]:
                 # Check for [tool.pyinitgen]
                 if "tool" in data and "pyinitgen" in data["tool"]:
                     config = data["tool"]["pyinitgen"]
-                    exclude_dirs = config.get("exclude_dirs", [])
-                    if isinstance(exclude_dirs, list):
-                        return set(exclude_dirs)
+                    values = config.get(key, [])
+                    if isinstance(values, list):
+                        return [str(value) for value in values]
             except Exception:
                 # If parsing fails, just ignore
                 pass
 
-    return set()
+    return []
@@ -0,0 +1,319 @@
+# src/pyinitgen/daemon.py
+
+import argparse
+import json
+import logging
+import os
+import select
+import socket
+import time
+from pathlib import Path
+from typing import Iterable, List
+
+from .client import socket_path
+from .config import IGNORE_FILE_NAME, config_stamp
+from .ignores import IgnoreTree, collect_ignores
+from .index import DirIndex, index_key
+from .matcher import ExcludeMatcher
+from .walker import walk
+from .watch import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_DELETE,
+    IN_ISDIR,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    IN_Q_OVERFLOW,
+    WATCH_MASK,
+    Watcher,
+)
+
+# Seconds without a request before the daemon exits on its own
+DEFAULT_IDLE_TIMEOUT = 900.0
+
+
+def _under(root: str, path: str) -> bool:
+    return root == path or root.startswith(path + os.sep)
+
+
+def _in_walk_order(roots: Iterable[str]) -> List[str]:
+    return sorted(roots, key=lambda root: root.split(os.sep))
+
+
+def scan_missing(base_dir: str, path: str) -> List[str]:
+    """
+    One-off scan of path used when no daemon is running.
+    Returns nothing if path is outside base_dir or inside an excluded dir.
+    """
+    excludes = collect_ignores(Path(base_dir))
+    if not _under(path, base_dir):
+        return []
+    rel = "" if path == base_dir else os.path.relpath(path, base_dir).replace(os.sep, "/")
+    if excludes.excludes_path(rel):
+        return []
+    return [root for root, has_init in walk(Path(path), excludes, rel=rel) if not has_init]
+
+
+class TreeModel(Watcher):
+    """
+    In-memory set of directories missing __init__.py, kept current by
+    inotify events instead of re-walking the tree. Any change to an
+    ignore file sets config_changed, since the excludes it was built
+    with no longer hold.
+    """
+
+    mask = WATCH_MASK | IN_DELETE | IN_CLOSE_WRITE
+
+    def __init__(self, base_dir: str, excludes: ExcludeMatcher):
+        self.missing = set()
+        self.config_changed = False
+        super().__init__(Path(base_dir), excludes, check=True)
+
+    def _fix(self, root: str) -> None:
+        self.missing.add(root)
+
+    def _forget(self, path: str) -> None:
+        self.missing = {root for root in self.missing if not _under(root, path)}
+
+    def rescan_unwatched(self) -> None:
+        for top in self.unwatched:
+            self._forget(top)
+        super().rescan_unwatched()
+
+    def handle(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self.missing.clear()
+
+        parent = self.paths.get(wd)
+        if parent is not None:
+            if not mask & IN_ISDIR:
+                if name == IGNORE_FILE_NAME:
+                    self.config_changed = True
+                elif name == "__init__.py":
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self.missing.discard(parent)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self.missing.add(parent)
+                return
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self._forget(os.path.join(parent, name))
+
+        super().handle(wd, mask, name)
+
+    def missing_under(self, path: str) -> List[str]:
+        self.drain()
+        if self.unwatched:
+            self.rescan_unwatched()
+        return _in_walk_order(root for root in self.missing if _under(root, path))
+
+    def close(self) -> None:
+        self.inotify.close()
+
+
+class IndexModel:
+    """
+    Fallback model for systems without inotify: an in-memory DirIndex
+    that is revalidated by directory mtimes on every query. Nested ignore
+    files are read again on every query too.
+    """
+
+    config_changed = False
+
+    def __init__(self, base_dir: str, excludes: ExcludeMatcher):
+        self.base_dir = Path(base_dir)
+        self.excludes = excludes
+        self.index = DirIndex(index_key(excludes))
+
+    def missing_under(self, path: str) -> List[str]:
+        seen = {}
+        excludes = self.excludes
+        if isinstance(excludes, IgnoreTree):
+            excludes = excludes.fresh()
+        missing = [
+            root
+            for root, has_init in self.index.walk(self.base_dir, excludes, seen)
+            if not has_init and _under(root, path)
+        ]
+        self.index.entries = DirIndex.settle(seen)
+        return missing
+
+    def close(self) -> None:
+        pass
+
+
+class Daemon:
+    """
+    Serves "what is missing under X" queries for one base dir over a Unix
+    domain socket, and exits after idle_timeout seconds without requests.
+    """
+
+    def __init__(self, base_dir: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.base_dir = base_dir
+        self.idle_timeout = idle_timeout
+        self.path = socket_path(base_dir)
+        self.reloads = 0
+        self._load()
+
+    def _load(self) -> None:
+        """
+        Builds the model under the current configuration.
+        """
+        self._stamp = config_stamp(Path(self.base_dir))
+        excludes = collect_ignores(Path(self.base_dir))
+        try:
+            self.model = TreeModel(self.base_dir, excludes)
+            self.model.add_tree(self.base_dir)
+        except OSError as e:
+            logging.warning(f"inotify is unavailable ({e}); revalidating by mtime instead")
+            self.model = IndexModel(self.base_dir, excludes)
+            self.model.missing_under(self.base_dir)
+
+    def refresh(self) -> bool:
+        """
+        Rebuilds the model if the TOML config or an ignore file changed
+        since it was built, like Scanner reloads its config. Returns True
+        if it did.
+        """
+        if isinstance(self.model, TreeModel):
+            self.model.drain()
+        if not self.model.config_changed and config_stamp(Path(self.base_dir)) == self._stamp:
+            return False
+        logging.info("Configuration changed, rebuilding the tree model")
+        self.model.close()
+        self._load()
+        self.reloads += 1
+        return True
+
+    def _bind(self) -> socket.socket:
+        # Without XDG_RUNTIME_DIR the socket lives in a shared temp dir,
+        # so its directory must exist and belong to us alone
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.stat(directory)
+        if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+            raise RuntimeError(f"{directory} must be private to the current user")
+
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.unlink(self.path)  # Left behind by a daemon that died
+            else:
+                raise RuntimeError(f"A daemon is already serving {self.base_dir}")
+            finally:
+                probe.close()
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # Socket is private to the current user
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(16)
+        return sock
+
+    def _handle(self, conn: socket.socket) -> bool:
+        """
+        Answers one request. Returns False if the daemon was asked to stop.
+        """
+        conn.settimeout(1.0)
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+
+        message = json.loads(data or b"{}")
+        cmd = message.get("cmd", "missing") if isinstance(message, dict) else None
+        if cmd is None:
+            reply = {"error": "A request must be a JSON object with a cmd"}
+        elif cmd == "missing":
+            path = message.get("path") or self.base_dir
+            if isinstance(path, str):
+                self.refresh()
+                reply = {"missing": self.model.missing_under(os.path.realpath(path))}
+            else:
+                reply = {"error": f"Invalid path {path!r}"}
+        elif cmd == "stop":
+            reply = {"ok": True}
+        else:
+            reply = {"error": f"Unknown command {cmd!r}"}
+
+        conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+        return cmd != "stop"
+
+    def serve(self) -> None:
+        sock = self._bind()
+        logging.info(f"Serving {self.base_dir} on {self.path}")
+
+        last_request = time.monotonic()
+        try:
+            while True:
+                remaining = self.idle_timeout - (time.monotonic() - last_request)
+                if remaining <= 0:
+                    logging.info("Idle timeout reached, shutting down.")
+                    break
+
+                # The model, and its inotify fd, is replaced on reloads
+                fds = [sock]
+                if isinstance(self.model, TreeModel):
+                    fds.append(self.model.inotify.fd)
+                ready, _, _ = select.select(fds, [], [], remaining)
+                if sock not in ready:
+                    if ready:
+                        self.model.drain()
+                    continue
+
+                conn, _ = sock.accept()
+                last_request = time.monotonic()
+                with conn:
+                    try:
+                        keep_running = self._handle(conn)
+                    except (OSError, ValueError) as e:
+                        logging.error(f"Bad request: {e}")
+                        keep_running = True
+                if not keep_running:
+                    break
+        finally:
+            sock.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.model.close()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pyinitgen daemon",
+        description="Keep a model of the package tree in memory and answer queries from `pyinitgen query`.",
+    )
+    parser.add_argument(
+        "--base-dir",
+        default=".",
+        help="Base directory to serve (default: current dir)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help=f"Exit after this many seconds without requests (default: {DEFAULT_IDLE_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Suppress non-error logs"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.ERROR if args.quiet else logging.INFO,
+        format="%(message)s",
+    )
+
+    try:
+        Daemon(os.path.realpath(args.base_dir), idle_timeout=args.idle_timeout).serve()
+    except RuntimeError as e:
+        logging.error(str(e))
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
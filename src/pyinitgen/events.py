@@ -0,0 +1,307 @@
+# src/pyinitgen/events.py
+
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from . import profiling
+from .config import load_python_free_markers
+from .durability import sync_inits
+from .gitindex import GitIndexError, walk_git_index
+from .ignores import IgnoreTree, collect_ignores
+from .index import DirIndex, index_key, index_path
+from .walker import DirGuard, scan_sharded, walk, walk_changed, walk_python
+from .writer import InitWriter
+
+# A named logger: library callers such as Scanner must not trigger the
+# root logger's implicit basicConfig()
+logger = logging.getLogger(__name__)
+
+
+class Scanned(NamedTuple):
+    """
+    A directory was visited; has_init tells whether it has an __init__.py.
+    """
+
+    path: str
+    has_init: bool
+
+
+class Missing(NamedTuple):
+    """
+    A directory lacks __init__.py. Reported in every mode, before anything
+    is written.
+    """
+
+    path: str
+
+
+class Created(NamedTuple):
+    """
+    An __init__.py was written; path is the new file.
+    """
+
+    path: str
+
+
+class Error(NamedTuple):
+    """
+    Something failed; path is the file or directory concerned.
+    """
+
+    path: str
+    message: str
+
+
+class Synced(NamedTuple):
+    """
+    With durable=True, the created files and their directories were
+    fsynced, taking `seconds`.
+    """
+
+    files: int
+    dirs: int
+    seconds: float
+
+
+class Done(NamedTuple):
+    """
+    Last record of a run that was not stopped early.
+    """
+
+    scanned: int
+    missing: int
+    created: int
+
+
+Event = Union[Scanned, Missing, Created, Error, Synced, Done]
+
+
+def iter_events(
+    base_dir: Path,
+    dry_run: bool = False,
+    check: bool = False,
+    init_content: str = "",
+    jobs: int = 1,
+    processes: int = 0,
+    cache: bool = False,
+    changed: Optional[Iterable[str]] = None,
+    source: str = "walk",
+    gitignore: bool = False,
+    only_python: bool = False,
+    excludes: Optional[IgnoreTree] = None,
+    markers: Optional[List[str]] = None,
+    durable: bool = False,
+    engine: str = "threads",
+    max_in_flight: int = 64,
+    low_memory: bool = False,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+) -> Iterator[Event]:
+    """
+    Walks base_dir and yields a record for everything that happens, as it
+    happens: Scanned for each directory, Missing for each directory
+    without __init__.py, then Created or Error once it has been written
+    (unless dry_run or check is set), and finally Done.
+
+    Records are produced lazily and nothing is accumulated, so the caller
+    can act on the first results right away or stop at any point; a
+    stopped run writes nothing more. With processes > 0 the workers only
+    report what is missing, so no Scanned records are produced and Done
+    carries the count.
+
+    excludes and markers default to the configuration of base_dir; Scanner
+    passes precompiled ones instead.
+
+    With durable=True, the created files and their directories are fsynced
+    in batches once everything is written (using jobs threads), reported by
+    a Synced record before Done.
+
+    engine="async" walks and writes with the asyncio engine of
+    pyinitgen.aio, which keeps up to max_in_flight calls going on
+    high-latency mounts (NFS, FUSE). It applies to full walks only, and
+    its records arrive in completion order.
+
+    low_memory=True walks on a single thread with walk_compact, whose
+    memory does not grow with the width of directories (full walks only).
+
+    follow_symlinks descends into symlinked directories; each directory is
+    still walked once, at its first path, however many links or bind
+    mounts lead to it. one_file_system does not enter other mounts. Both
+    apply to full walks on the thread engine only.
+    """
+    scanned_dirs = 0
+    missing_count = 0
+    created_count = 0
+
+    profiler = profiling.ACTIVE
+    with profiling.span("loading config"):
+        all_excludes = excludes if excludes is not None else collect_ignores(base_dir, gitignore)
+        if markers is None:
+            markers = load_python_free_markers(base_dir)
+
+    from_index = source == "git-index"
+    cache = cache and changed is None and not from_index
+    sharded = bool(processes) and not cache and changed is None and not from_index
+    if profiler is not None and not sharded:
+        # Worker processes get the plain matcher, it has to be pickled
+        all_excludes = profiling.TimedMatcher(all_excludes, profiler)
+    # Python-aware mode only exists for full (or cached) walks
+    only_python = only_python and changed is None and not from_index and not sharded
+    if engine == "async" and not (from_index or changed is not None or cache or sharded or only_python):
+        # Imported here: asyncio is only needed by this engine
+        from .aio import iter_async_events
+
+        created_roots = []
+        async_events = iter_async_events(
+            base_dir,
+            all_excludes,
+            dry_run=dry_run,
+            check=check,
+            init_content=init_content,
+            max_in_flight=max_in_flight,
+        )
+        try:
+            for event in async_events:
+                if isinstance(event, Done):
+                    yield from _sync_events(created_roots, jobs)
+                elif durable and isinstance(event, Created):
+                    created_roots.append(os.path.dirname(event.path))
+                yield event
+        finally:
+            async_events.close()
+            _sync_remaining(created_roots, jobs)
+        return
+
+    guard = None
+    if from_index:
+        # Directories come from the tracked paths, not from listing the tree
+        dirs = walk_git_index(base_dir, all_excludes)
+    elif changed is not None:
+        # Only the ancestors of the changed paths need validating
+        dirs = walk_changed(base_dir, changed, all_excludes)
+    elif cache:
+        cache_file = index_path(base_dir)
+        index = DirIndex.load(cache_file, index_key(all_excludes, markers))
+        seen = {}
+        if only_python:
+            dirs = index.walk_python(base_dir, all_excludes, seen, markers)
+        else:
+            dirs = index.walk(base_dir, all_excludes, seen, markers)
+    elif sharded:
+        # Workers only report the directories that need attention
+        scanned_dirs, missing_roots = scan_sharded(base_dir, all_excludes, processes)
+        dirs = ((root, False) for root in missing_roots)
+    elif only_python:
+        # Only directories leading to Python sources need __init__.py
+        dirs = walk_python(base_dir, all_excludes, markers)
+    else:
+        if follow_symlinks or one_file_system:
+            guard = DirGuard(follow_symlinks, one_file_system)
+        dirs = walk(base_dir, all_excludes, jobs, low_memory=low_memory, guard=guard)
+    if profiler is not None:
+        dirs = profiler.timed("walking", dirs)
+
+    writer = InitWriter(init_content)
+    created_roots: List[str] = []
+    try:
+        for entry in dirs:
+            root, has_init = entry[0], entry[1]
+            if not sharded:
+                scanned_dirs += 1
+                yield Scanned(root, has_init)
+
+            # The Python-only walk also reports the directories it listed
+            # but that lead to no Python sources
+            if has_init or (only_python and not entry[2]):
+                continue
+
+            missing_count += 1
+            yield Missing(root)
+            if check or dry_run:
+                continue
+
+            init_file = Path(root) / "__init__.py"
+            try:
+                with profiling.span("writing"):
+                    created = writer.create(root)
+            except Exception as e:
+                profiling.count("errors")
+                yield Error(str(init_file), f"Failed to create {init_file}: {e}")
+                continue
+            if not created:
+                # A concurrent run got there first
+                continue
+            profiling.count("writes")
+            created_count += 1
+            if durable:
+                created_roots.append(root)
+            yield Created(str(init_file))
+        yield from _sync_events(created_roots, jobs)
+    except GitIndexError as e:
+        profiling.count("errors")
+        yield Error(str(base_dir), str(e))
+        return
+    finally:
+        writer.close()
+        _sync_remaining(created_roots, jobs)
+
+    if guard is not None:
+        logger.debug(
+            f"Skipped {guard.revisits} directories reached again and {guard.other_mounts} on other mounts"
+        )
+        profiling.count("dirs reached again", guard.revisits)
+        profiling.count("other mounts skipped", guard.other_mounts)
+    if cache:
+        logger.debug(f"Reused {index.reused} of {len(seen)} directories from {cache_file}")
+        profiling.count("dirs from cache", index.reused)
+        try:
+            with profiling.span("saving cache"):
+                index.save(cache_file, seen)
+        except OSError as e:
+            logger.warning(f"Could not write {cache_file}: {e}")
+
+    yield Done(scanned_dirs, missing_count, created_count)
+
+
+def _sync_events(created_roots: List[str], jobs: int) -> Iterator[Event]:
+    """
+    Syncs created_roots and reports the outcome as events. The list is
+    emptied first, so _sync_remaining does not sync them again.
+    """
+    if not created_roots:
+        return
+    roots = created_roots[:]
+    created_roots.clear()
+    with profiling.span("syncing"):
+        report = sync_inits(roots, jobs)
+    for path, message in report.errors:
+        profiling.count("errors")
+        yield Error(path, message)
+    yield Synced(report.files, report.dirs, report.seconds)
+
+
+def _sync_remaining(created_roots: List[str], jobs: int) -> None:
+    """
+    Syncs what was created before the walk stopped early, because of an
+    error or a caller closing the generator. No more events can be
+    yielded by then, so the outcome is logged instead.
+    """
+    if not created_roots:
+        return
+    report = sync_inits(created_roots, jobs)
+    for _, message in report.errors:
+        logger.error(message)
+    logger.info(f"Synced {report.files} files and {report.dirs} directories to disk before stopping")
+
+
+def iter_missing(base_dir: Path, **options) -> Iterator[str]:
+    """
+    Yields each directory under base_dir that lacks __init__.py, without
+    writing anything. Accepts the same options as iter_events; errors are
+    skipped, use iter_events to see them.
+    """
+    for event in iter_events(base_dir, check=True, **options):
+        if isinstance(event, Missing):
+            yield event.path
@@ -0,0 +1,153 @@
+# src/pyinitgen/gitindex.py
+
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Iterator, Set, Tuple
+
+from .matcher import ExcludeMatcher
+from .walker import walk_dir_set
+
+_HEADER = struct.Struct(">4sII")
+
+# ctime, mtime (seconds + nanoseconds each), dev, ino, mode, uid, gid, size
+_STAT_SIZE = 40
+_MODE_OFFSET = 24
+_EXTENDED_FLAG = 0x4000
+_SPARSE_DIR_MODE = 0o040000
+
+
+class GitIndexError(Exception):
+    """
+    Raised when no usable git index can be found or parsed.
+    """
+
+
+def find_git_dir(start: Path) -> Tuple[Path, Path]:
+    """
+    Finds the repository containing start.
+    Returns (work_tree, git_dir); git_dir follows `gitdir:` files used by
+    worktrees and submodules.
+    """
+    current = Path(os.path.abspath(start))
+    for candidate in (current, *current.parents):
+        dot_git = candidate / ".git"
+        if dot_git.is_dir():
+            return candidate, dot_git
+        if dot_git.is_file():
+            content = dot_git.read_text(encoding="utf-8").strip()
+            if content.startswith("gitdir:"):
+                git_dir = Path(content[len("gitdir:") :].strip())
+                if not git_dir.is_absolute():
+                    git_dir = candidate / git_dir
+                return candidate, git_dir
+    raise GitIndexError(f"{start} is not inside a git repository")
+
+
+def _hash_size(git_dir: Path) -> int:
+    """
+    Object id length in bytes: 20 for SHA-1, 32 for SHA-256 repositories.
+    """
+    # Linked worktrees keep their config in the common git dir
+    commondir = git_dir / "commondir"
+    if commondir.is_file():
+        git_dir = git_dir / commondir.read_text(encoding="utf-8").strip()
+    try:
+        config = (git_dir / "config").read_text(encoding="utf-8")
+    except OSError:
+        return 20
+    if re.search(r"^\s*objectformat\s*=\s*sha256\s*$", config, re.IGNORECASE | re.MULTILINE):
+        return 32
+    return 20
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    # Offset encoding used by index v4 (see git's varint.c)
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def read_index_paths(git_dir: Path) -> Iterator[Tuple[bytes, int]]:
+    """
+    Parses git_dir/index (versions 2, 3 and 4) in one sequential read.
+    Yields (path, mode) for every entry; paths are raw bytes relative to
+    the work tree.
+    """
+    index_path = git_dir / "index"
+    try:
+        with open(index_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise GitIndexError(f"Cannot read {index_path}: {e}")
+
+    try:
+        signature, version, count = _HEADER.unpack_from(data, 0)
+    except struct.error:
+        raise GitIndexError(f"{index_path} is truncated")
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise GitIndexError(f"{index_path} is not a supported git index (version {version})")
+
+    flags_offset = _STAT_SIZE + _hash_size(git_dir)
+    pos = _HEADER.size
+    previous = b""
+    try:
+        for _ in range(count):
+            entry_start = pos
+            (mode,) = struct.unpack_from(">I", data, pos + _MODE_OFFSET)
+            (flags,) = struct.unpack_from(">H", data, pos + flags_offset)
+            pos += flags_offset + 2
+            if version >= 3 and flags & _EXTENDED_FLAG:
+                pos += 2
+
+            if version == 4:
+                strip, pos = _varint(data, pos)
+                end = data.index(b"\0", pos)
+                path = previous[: len(previous) - strip] + data[pos:end]
+                pos = end + 1
+            else:
+                end = data.index(b"\0", pos)
+                path = data[pos:end]
+                # Entries are NUL-padded to a multiple of 8 bytes
+                pos = entry_start + ((end - entry_start + 8) & ~7)
+
+            previous = path
+            yield path, mode
+    except (struct.error, ValueError):
+        raise GitIndexError(f"{index_path} is truncated or corrupt")
+
+
+def walk_git_index(
+    base_dir: Path, excludes: ExcludeMatcher
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Yields (root, has_init) for every directory that holds tracked files
+    under base_dir, derived from the git index alone. Untracked
+    directories are never seen, and excluded directories are pruned
+    as they would be in the full walk. Output is in sorted pre-order.
+    """
+    work_tree, git_dir = find_git_dir(base_dir)
+    rel_base = os.path.relpath(os.path.abspath(base_dir), work_tree)
+    prefix = b"" if rel_base == os.curdir else os.fsencode(rel_base).replace(os.sep.encode(), b"/") + b"/"
+
+    dirs: Set[Tuple[str, ...]] = set()
+    init_dirs: Set[Tuple[str, ...]] = set()
+    for path, mode in read_index_paths(git_dir):
+        if not path.startswith(prefix):
+            continue
+        parts = os.fsdecode(path[len(prefix) :]).rstrip("/").split("/")
+        if parts[-1] == "__init__.py" and mode != _SPARSE_DIR_MODE:
+            init_dirs.add(tuple(parts[:-1]))
+
+        # Only the ancestors count; for a sparse-index directory entry the
+        # directory itself is not checked out
+        for i in range(len(parts)):
+            dirs.add(tuple(parts[:i]))
+
+    yield from walk_dir_set(os.fspath(base_dir), dirs, init_dirs, excludes)
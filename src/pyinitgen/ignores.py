@@ -1,20 +1,147 @@
 # src/pyinitgen/ignores.py
 
+import copy
+import os
 from pathlib import Path
-from .config import IGNORE_FILE_NAME
+from typing import Dict, Iterable, List, Optional, Tuple
+from .config import EXCLUDE_DIRS, GITIGNORE_FILE_NAME, IGNORE_FILE_NAME, load_config_patterns
+from .matcher import ExcludeMatcher
 
 def load_ignore_patterns(base_dir: Path) -> set[str]:
     """
     Loads ignore patterns from a .pyinitgenignore file in the base_dir.
     """
-    ignore_file_path = base_dir / IGNORE_FILE_NAME
-    if not ignore_file_path.is_file():
-        return set()
+    return set(read_ignore_patterns(base_dir))
 
-    patterns = set()
-    with open(ignore_file_path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#"):
-                patterns.add(line)
+
+def read_ignore_patterns(base_dir: Path, file_name: str = IGNORE_FILE_NAME) -> List[str]:
+    """
+    Reads the patterns of an ignore file in base_dir in file order.
+    Blank lines and comments are dropped.
+    """
+    return _read_pattern_file(os.path.join(base_dir, file_name)) or []
+
+
+def _read_pattern_file(path: str) -> Optional[List[str]]:
+    # Opening directly costs one syscall for the common "no such file" case
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    patterns = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            patterns.append(line)
     return patterns
+
+
+def collect_excludes(base_dir: Path) -> ExcludeMatcher:
+    """
+    Compiles the built-in excludes, the [tool.pyinitgen] config and
+    .pyinitgenignore of base_dir into one matcher. Later patterns win, so
+    a `!pattern` in .pyinitgenignore can re-include a built-in exclude.
+    """
+    return ExcludeMatcher(
+        sorted(EXCLUDE_DIRS) + load_config_patterns(base_dir) + read_ignore_patterns(base_dir)
+    )
+
+
+def collect_ignores(base_dir: Path, gitignore: bool = False) -> "IgnoreTree":
+    """
+    Like collect_excludes, but also honours the ignore files found in
+    subdirectories during the walk. With gitignore=True, .gitignore files
+    are read as well; .pyinitgenignore wins where both match.
+    """
+    patterns = sorted(EXCLUDE_DIRS) + load_config_patterns(base_dir)
+    if gitignore:
+        patterns += read_ignore_patterns(base_dir, GITIGNORE_FILE_NAME)
+    patterns += read_ignore_patterns(base_dir)
+    return IgnoreTree(base_dir, patterns, gitignore)
+
+
+class IgnoreTree(ExcludeMatcher):
+    """
+    The base dir's matcher stacked with the ignore files of the directories
+    below it. An ignore file applies to everything under its directory,
+    with anchored patterns relative to that directory, and deeper files
+    take precedence over shallower ones.
+
+    Each directory's ignore files are read once, the first time one of its
+    children is matched, so an ignored subtree is pruned before it is
+    listed. The layer stack of a directory is shared by all its children,
+    and identical ignore files are compiled only once. Walks that release
+    finished directories keep only the layers of the current path.
+    """
+
+    def __init__(self, base_dir: Path, patterns: Iterable[str] = (), gitignore: bool = False):
+        super().__init__(patterns)
+        self.base_dir = os.fspath(base_dir)
+        self.gitignore = gitignore
+        # .pyinitgenignore comes last so its patterns win
+        self.file_names: Tuple[str, ...] = (IGNORE_FILE_NAME,)
+        if gitignore:
+            self.file_names = (GITIGNORE_FILE_NAME, IGNORE_FILE_NAME)
+
+        self._compiled: Dict[Tuple[str, ...], ExcludeMatcher] = {}
+        # Directory rel path -> (dir rel path, matcher) layers applying to
+        # its children, outermost first. The base dir's files are already
+        # part of the base patterns.
+        self._layers: Dict[str, Tuple[Tuple[str, ExcludeMatcher], ...]] = {"": ()}
+
+    def _load(self, rel_dir: str) -> Optional[ExcludeMatcher]:
+        directory = os.path.join(self.base_dir, *rel_dir.split("/"))
+        patterns: List[str] = []
+        for file_name in self.file_names:
+            patterns += _read_pattern_file(os.path.join(directory, file_name)) or []
+        if not patterns:
+            return None
+
+        key = tuple(patterns)
+        matcher = self._compiled.get(key)
+        if matcher is None:
+            matcher = self._compiled[key] = ExcludeMatcher(key)
+        return matcher
+
+    def layers(self, rel_dir: str) -> Tuple[Tuple[str, ExcludeMatcher], ...]:
+        """
+        The nested ignore layers that apply to the children of rel_dir.
+        """
+        layers = self._layers.get(rel_dir)
+        if layers is None:
+            parent = rel_dir.rpartition("/")[0]
+            layers = self.layers(parent)
+            local = self._load(rel_dir)
+            if local is not None:
+                layers = layers + ((rel_dir, local),)
+            self._layers[rel_dir] = layers
+        return layers
+
+    def verdict(self, rel_path: str, name: str) -> Optional[bool]:
+        for rel_dir, matcher in reversed(self.layers(rel_path.rpartition("/")[0])):
+            verdict = matcher.verdict(rel_path[len(rel_dir) + 1 :], name)
+            if verdict is not None:
+                return verdict
+        return super().verdict(rel_path, name)
+
+    def match(self, rel_path: str, name: str) -> bool:
+        return bool(self.verdict(rel_path, name))
+
+    def release(self, rel_dir: str) -> None:
+        # The base dir's entry ends the recursion in layers()
+        if rel_dir:
+            self._layers.pop(rel_dir, None)
+
+    def fresh(self) -> "IgnoreTree":
+        """
+        A copy that shares the compiled base patterns and ignore files but
+        reads the nested ignore files again, for the next scan.
+        """
+        clone = copy.copy(self)
+        clone._layers = {"": ()}
+        return clone
+
+    def __reduce__(self):
+        return (IgnoreTree, (self.base_dir, self.patterns, self.gitignore))
@@ -0,0 +1,165 @@
+# src/pyinitgen/index.py
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Collection, Dict, Iterator, List, Optional, Tuple
+
+from . import __version__
+from .config import cache_dir
+from .matcher import ExcludeMatcher
+from .walker import child_rel, scan_python_dir, walk_python
+from .writer import write_atomic
+
+# Bump when the on-disk layout changes
+INDEX_FORMAT = 4
+
+# Directory mtimes this close to the time the index is written may still
+# change within the same timestamp tick, so they are never trusted.
+RACY_WINDOW_NS = 2_000_000_000
+
+# (mtime, has_init, subdirs, python) where python is a walker.PY_* value
+Entry = Tuple[Optional[int], bool, List[str], int]
+
+# Subdirectories are recorded unfiltered, so an edited ignore file below
+# the base dir takes effect without invalidating the index
+_KEEP_ALL = ExcludeMatcher()
+
+
+def index_path(base_dir: Path) -> Path:
+    """
+    Where the --cache index of base_dir is kept: in the user's cache dir,
+    keyed by base_dir's real path. Writing it into the tree would change
+    the base dir's mtime on every run, and invalidate its own entry.
+    """
+    digest = hashlib.sha256(os.fsencode(os.path.realpath(base_dir))).hexdigest()[:32]
+    return cache_dir() / "index" / f"{digest}.json"
+
+
+def index_key(excludes: ExcludeMatcher, markers: Collection[str] = ()) -> str:
+    """
+    Fingerprint of everything that decides what a scan sees.
+    An index written under a different key is discarded. Pattern order is
+    kept since it decides which negations win.
+    """
+    payload = json.dumps([INDEX_FORMAT, __version__, list(excludes.patterns), sorted(markers)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DirIndex:
+    """
+    Persistent record of scanned directories, keyed by path relative to
+    the base dir. Each entry holds the directory mtime (in ns), whether it
+    had an __init__.py, and its subdirectories before exclusion.
+    """
+
+    def __init__(self, key: str, entries: Optional[Dict[str, Entry]] = None):
+        self.key = key
+        self.entries = entries or {}
+        self.reused = 0
+
+    @classmethod
+    def load(cls, path: Path, key: str) -> "DirIndex":
+        """
+        Loads the index at path. A missing, unreadable or stale index
+        yields an empty one.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(key)
+
+        if not isinstance(data, dict) or data.get("key") != key:
+            return cls(key)
+        return cls(key, data.get("entries", {}))
+
+    @staticmethod
+    def settle(entries: Dict[str, Entry]) -> Dict[str, Entry]:
+        """
+        Returns entries with racy mtimes cleared, so those directories are
+        listed again next time.
+        """
+        cutoff = time.time_ns() - RACY_WINDOW_NS
+        return {
+            rel: (mtime if mtime is not None and mtime < cutoff else None, *rest)
+            for rel, (mtime, *rest) in entries.items()
+        }
+
+    def save(self, path: Path, entries: Dict[str, Entry]) -> None:
+        """
+        Atomically writes entries as the new index at path.
+        """
+        data = {"key": self.key, "entries": self.settle(entries)}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, json.dumps(data, separators=(",", ":")))
+
+    def scan(
+        self, root: str, rel: str, seen: Dict[str, Entry], markers: Collection[str] = ()
+    ) -> Tuple[List[str], bool, int]:
+        """
+        Lists root, or only stats it if its mtime matches the index.
+        Returns (unfiltered subdirs, has_init, python) and records the
+        entry in `seen` for the next save.
+        """
+        mtime = os.stat(root).st_mtime_ns
+        cached = self.entries.get(rel)
+        if cached is not None and cached[0] == mtime:
+            _, has_init, subdirs, python = cached
+            self.reused += 1
+        else:
+            subdirs, has_init, python = scan_python_dir(root, rel, _KEEP_ALL, markers)
+
+        seen[rel] = (mtime, has_init, subdirs, python)
+        return subdirs, has_init, python
+
+    def walk(
+        self,
+        base_dir: Path,
+        excludes: ExcludeMatcher,
+        seen: Dict[str, Entry],
+        markers: Collection[str] = (),
+    ) -> Iterator[Tuple[str, bool]]:
+        """
+        Walks base_dir like walker.walk, but only stats directories whose
+        mtime matches the index instead of listing them again.
+        Every visited directory is recorded in `seen` for the next save.
+        """
+        stack = [(os.fspath(base_dir), "")]
+        while stack:
+            root, rel = stack.pop()
+            try:
+                subdirs, has_init, _ = self.scan(root, rel, seen, markers)
+            except OSError:
+                continue
+
+            yield root, has_init
+
+            for name in reversed(subdirs):
+                sub_rel = child_rel(rel, name)
+                if not excludes.match(sub_rel, name):
+                    stack.append((os.path.join(root, name), sub_rel))
+
+    def walk_python(
+        self,
+        base_dir: Path,
+        excludes: ExcludeMatcher,
+        seen: Dict[str, Entry],
+        markers: Collection[str] = (),
+    ) -> Iterator[Tuple[str, bool]]:
+        """
+        walker.walk_python on top of the index: unchanged directories are
+        only stat'ed, and their recorded Python state is reused.
+        """
+
+        def scan(root: str, rel: str) -> Tuple[List[str], bool, int]:
+            subdirs, has_init, python = self.scan(root, rel, seen, markers)
+            return (
+                [name for name in subdirs if not excludes.match(child_rel(rel, name), name)],
+                has_init,
+                python,
+            )
+
+        return walk_python(base_dir, excludes, markers, scan)
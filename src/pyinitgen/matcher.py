@@ -0,0 +1,235 @@
+# src/pyinitgen/matcher.py
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_GLOB_CHARS = re.compile(r"[*?\[\\]")
+
+# Index of the last pattern that matched; -1 if none did
+_NO_MATCH = -1
+
+
+def translate(pattern: str) -> str:
+    """
+    Translates a gitignore-style glob into a regex body.
+    `*` and `?` never cross a `/`; `**` spans any number of directories.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            j = i
+            while j < n and pattern[j] == "*":
+                j += 1
+            at_start = i == 0 or pattern[i - 1] == "/"
+            if j - i >= 2 and at_start and (j == n or pattern[j] == "/"):
+                if j == n:
+                    out.append(".*")  # "dir/**": everything inside
+                    i = j
+                else:
+                    out.append("(?:.*/)?")  # "**/": zero or more dirs
+                    i = j + 1
+                continue
+            out.append("[^/]*")
+            i = j
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            start = i + 1
+            if pattern[start : start + 1] in ("!", "^"):
+                start += 1
+            if pattern[start : start + 1] == "]":
+                start += 1  # A leading "]" is part of the class
+            j = pattern.find("]", start)
+            if j == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1 : j].replace("\\", "\\\\")
+            if body[0] in "!^":
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = j + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def _is_literal(pattern: str) -> bool:
+    return not _GLOB_CHARS.search(pattern)
+
+
+class _Alternation:
+    """
+    Many globs folded into one regex. Alternatives are tried newest
+    first, so the first one that matches is the last matching pattern.
+    """
+
+    def __init__(self, regexes: List[Tuple[int, str]]):
+        self.indexes = [idx for idx, _ in sorted(regexes, reverse=True)]
+        body = "|".join(f"({regex})" for _, regex in sorted(regexes, reverse=True))
+        self.regex = re.compile(body) if regexes else None
+
+    def match(self, text: str) -> int:
+        if self.regex is None:
+            return _NO_MATCH
+        m = self.regex.fullmatch(text)
+        # translate() only emits non-capturing groups, so lastindex is the
+        # alternative that matched
+        return self.indexes[m.lastindex - 1] if m else _NO_MATCH
+
+
+def _by_length(table: Dict[str, int]) -> List[Tuple[int, Dict[str, int]]]:
+    grouped: Dict[int, Dict[str, int]] = {}
+    for key, idx in table.items():
+        grouped.setdefault(len(key), {})[key] = idx
+    return sorted(grouped.items())
+
+
+class ExcludeMatcher:
+    """
+    Compiled gitignore-style exclude patterns for directories.
+
+    - `name` matches a directory with that name at any depth
+    - `/path` and `a/b` are anchored to the base dir; a trailing `/` is ignored
+    - `*`, `?` and `[...]` match within one path segment, `**` across segments
+    - `!pattern` re-includes what an earlier pattern excluded; the last
+      matching pattern wins
+
+    Patterns are compiled once. Literal names and paths, `*suffix` and
+    `prefix*` globs, `**/name` and `dir/**` are answered by dict lookups,
+    so their number does not affect the cost of a match; the remaining
+    globs share one regex for names and one for paths.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self._negated: List[bool] = []
+
+        names: Dict[str, int] = {}
+        paths: Dict[str, int] = {}
+        suffixes: Dict[str, int] = {}
+        prefixes: Dict[str, int] = {}
+        inside_names: Dict[str, int] = {}
+        inside_paths: Dict[str, int] = {}
+        name_regexes: List[Tuple[int, str]] = []
+        path_regexes: List[Tuple[int, str]] = []
+
+        for raw in self.patterns:
+            pattern = raw.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            negated = pattern.startswith("!")
+            if negated or pattern.startswith(("\\!", "\\#")):
+                pattern = pattern[1:]
+
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            pattern = pattern.lstrip("/")
+            if not pattern:
+                continue
+
+            idx = len(self._negated)
+            self._negated.append(negated)
+
+            if anchored and pattern.startswith("**/"):
+                rest = pattern[3:]
+                if "/" not in rest:
+                    # "**/name" is the same as an unanchored "name"
+                    anchored, pattern = False, rest
+                elif rest.endswith("/**") and _is_literal(rest[:-3]) and "/" not in rest[:-3]:
+                    inside_names[rest[:-3]] = idx
+                    continue
+
+            if anchored:
+                if pattern.endswith("/**") and _is_literal(pattern[:-3]):
+                    inside_paths[pattern[:-3]] = idx
+                elif _is_literal(pattern):
+                    paths[pattern] = idx
+                else:
+                    path_regexes.append((idx, translate(pattern)))
+            elif _is_literal(pattern):
+                names[pattern] = idx
+            elif pattern[0] == "*" and _is_literal(pattern[1:]):
+                suffixes[pattern[1:]] = idx
+            elif pattern[-1] == "*" and _is_literal(pattern[:-1]):
+                prefixes[pattern[:-1]] = idx
+            else:
+                name_regexes.append((idx, translate(pattern)))
+
+        self._names = names
+        self._paths = paths
+        self._suffixes = _by_length(suffixes)
+        self._prefixes = _by_length(prefixes)
+        self._inside_names = inside_names
+        self._inside_paths = inside_paths
+        self._name_regex = _Alternation(name_regexes)
+        self._path_regex = _Alternation(path_regexes)
+
+    def _last_match(self, rel_path: str, name: str) -> int:
+        best = max(self._names.get(name, _NO_MATCH), self._paths.get(rel_path, _NO_MATCH))
+        for length, table in self._suffixes:
+            best = max(best, table.get(name[-length:], _NO_MATCH))
+        for length, table in self._prefixes:
+            best = max(best, table.get(name[:length], _NO_MATCH))
+
+        if self._inside_names or self._inside_paths:
+            # "dir/**" matches everything below dir, at any depth
+            prefix = ""
+            for part in rel_path.split("/")[:-1]:
+                prefix = f"{prefix}/{part}" if prefix else part
+                best = max(
+                    best,
+                    self._inside_names.get(part, _NO_MATCH),
+                    self._inside_paths.get(prefix, _NO_MATCH),
+                )
+
+        return max(best, self._name_regex.match(name), self._path_regex.match(rel_path))
+
+    def verdict(self, rel_path: str, name: str) -> Optional[bool]:
+        """
+        True if the directory is excluded, False if a negation re-includes
+        it, None if no pattern mentions it.
+        rel_path is relative to the base dir and uses `/` separators.
+        """
+        idx = self._last_match(rel_path, name)
+        if idx == _NO_MATCH:
+            return None
+        return not self._negated[idx]
+
+    def match(self, rel_path: str, name: str) -> bool:
+        """
+        True if the directory at rel_path (named name) is excluded.
+        """
+        idx = self._last_match(rel_path, name)
+        return idx != _NO_MATCH and not self._negated[idx]
+
+    def excludes_path(self, rel_path: str) -> bool:
+        """
+        True if rel_path or any directory above it is excluded, i.e. the
+        walk would never reach it.
+        """
+        prefix = ""
+        for part in rel_path.split("/"):
+            if not part or part == ".":
+                continue
+            prefix = f"{prefix}/{part}" if prefix else part
+            if self.match(prefix, part):
+                return True
+        return False
+
+    def release(self, rel_dir: str) -> None:
+        """
+        Called by walks that are done with everything below rel_dir, so
+        matchers that keep per-directory state can drop it.
+        """
+
+    def __reduce__(self):
+        # Recompile on unpickling instead of shipping compiled state
+        return (ExcludeMatcher, (self.patterns,))
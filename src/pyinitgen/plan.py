@@ -0,0 +1,469 @@
+# src/pyinitgen/plan.py
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Collection, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import __version__
+from .config import load_python_free_markers
+from .events import Created, Done, Error, Event, Missing, iter_events
+from .ignores import IgnoreTree, collect_ignores
+from .index import RACY_WINDOW_NS, index_key
+from .walker import default_jobs, walk_changed
+from .writer import InitWriter, write_atomic
+
+# Bump when the on-disk layout changes
+PLAN_FORMAT = 2
+PLAN_MAGIC = b"PYIPLAN\0"
+
+# magic, format, length of the JSON header that follows
+_HEADER = struct.Struct("<8sHI")
+_CHECKSUM = struct.Struct("<I")
+
+
+class PlanError(Exception):
+    """
+    Raised when a plan cannot be read, or no longer fits its tree.
+    """
+
+
+class PlanEntry(NamedTuple):
+    """
+    A directory to create __init__.py in, relative to the plan's base dir
+    ("" for the base dir itself), and its own and its parent's mtime when
+    it was planned. Its own mtime changes when an __init__.py appears in
+    it; the parent's when it is removed, renamed or replaced. A mtime of
+    None was too recent to be trusted, so the directory is always
+    revalidated. The base dir's parent is outside the tree and not
+    recorded.
+    """
+
+    rel: str
+    mtime_ns: Optional[int]
+    parent_mtime_ns: Optional[int] = None
+
+
+class Plan(NamedTuple):
+    base_dir: str
+    key: str
+    gitignore: bool
+    init_content: str
+    created: float
+    entries: List[PlanEntry]
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _put_mtime(out: bytearray, mtime_ns: Optional[int], previous: int) -> int:
+    if mtime_ns is None:
+        _put_varint(out, 0)
+        return previous
+    delta = mtime_ns - previous
+    zigzag = delta << 1 if delta >= 0 else (-delta << 1) - 1
+    _put_varint(out, (zigzag << 1) | 1)
+    return mtime_ns
+
+
+def _get_mtime(data: bytes, pos: int, previous: int) -> Tuple[Optional[int], int, int]:
+    value, pos = _get_varint(data, pos)
+    if not value & 1:
+        return None, previous, pos
+    zigzag = value >> 1
+    previous += zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+    return previous, previous, pos
+
+
+def encode_plan(plan: Plan) -> bytes:
+    """
+    Serializes plan: a small JSON header, then one record per directory,
+    then a CRC-32 of everything before it.
+
+    Entries are sorted and prefix-compressed like git index v4 paths:
+    each stores how many bytes to keep from the previous path and the
+    rest, NUL-terminated. Mtimes are stored as the zigzag-encoded
+    difference from the previous known one of their kind, since
+    directories planned together tend to change together. The low bit
+    marks a known mtime.
+    """
+    header = json.dumps(
+        {
+            "version": __version__,
+            "base_dir": plan.base_dir,
+            "key": plan.key,
+            "gitignore": plan.gitignore,
+            "init_content": plan.init_content,
+            "created": plan.created,
+            "count": len(plan.entries),
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    out = bytearray(_HEADER.pack(PLAN_MAGIC, PLAN_FORMAT, len(header)))
+    out += header
+
+    previous = b""
+    previous_mtime = previous_parent = 0
+    for rel, mtime_ns, parent_mtime_ns in sorted(plan.entries):
+        path = os.fsencode(rel)
+        common = 0
+        limit = min(len(path), len(previous))
+        while common < limit and path[common] == previous[common]:
+            common += 1
+        _put_varint(out, len(previous) - common)
+        out += path[common:] + b"\0"
+        previous = path
+        previous_mtime = _put_mtime(out, mtime_ns, previous_mtime)
+        previous_parent = _put_mtime(out, parent_mtime_ns, previous_parent)
+
+    out += _CHECKSUM.pack(zlib.crc32(out))
+    return bytes(out)
+
+
+def decode_plan(data: bytes) -> Plan:
+    if len(data) < _HEADER.size + _CHECKSUM.size:
+        raise PlanError("the plan is truncated")
+    magic, version, header_len = _HEADER.unpack_from(data, 0)
+    if magic != PLAN_MAGIC:
+        raise PlanError("not a pyinitgen plan")
+    if version != PLAN_FORMAT:
+        raise PlanError(f"plan format {version} is not supported (expected {PLAN_FORMAT})")
+    (checksum,) = _CHECKSUM.unpack_from(data, len(data) - _CHECKSUM.size)
+    body = data[: len(data) - _CHECKSUM.size]
+    if zlib.crc32(body) != checksum:
+        raise PlanError("the plan is corrupt (checksum mismatch)")
+
+    try:
+        pos = _HEADER.size + header_len
+        header = json.loads(body[_HEADER.size : pos].decode("utf-8"))
+        entries = []
+        previous = b""
+        previous_mtime = previous_parent = 0
+        for _ in range(header["count"]):
+            strip, pos = _get_varint(body, pos)
+            end = body.index(b"\0", pos)
+            path = previous[: len(previous) - strip] + body[pos:end]
+            pos = end + 1
+            previous = path
+
+            mtime_ns, previous_mtime, pos = _get_mtime(body, pos, previous_mtime)
+            parent_mtime_ns, previous_parent, pos = _get_mtime(body, pos, previous_parent)
+            entries.append(PlanEntry(os.fsdecode(path), mtime_ns, parent_mtime_ns))
+        return Plan(
+            header["base_dir"],
+            header["key"],
+            header["gitignore"],
+            header["init_content"],
+            header["created"],
+            entries,
+        )
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        raise PlanError(f"the plan is corrupt ({e})") from None
+
+
+def write_plan(path: Path, plan: Plan) -> int:
+    """
+    Atomically writes plan to path and returns its size in bytes.
+    """
+    data = encode_plan(plan)
+    write_atomic(path, data)
+    return len(data)
+
+
+def read_plan(path: Path) -> Plan:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise PlanError(f"Cannot read {path}: {e}")
+    return decode_plan(data)
+
+
+def _plan_key(excludes: IgnoreTree, markers: Collection[str], rels: Collection[str]) -> str:
+    """
+    index_key of the base-level configuration, extended with the nested
+    ignore files that decide whether the planned directories are excluded:
+    the ones in their ancestors below the base dir.
+    """
+    nested = set()
+    for rel in rels:
+        if rel:
+            parent = rel.replace(os.sep, "/").rpartition("/")[0]
+            nested.update((rel_dir, matcher.patterns) for rel_dir, matcher in excludes.layers(parent))
+    payload = json.dumps([index_key(excludes, markers), sorted((d, list(p)) for d, p in nested)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def config_key(base_dir: Path, gitignore: bool = False, rels: Collection[str] = ()) -> str:
+    """
+    Fingerprint of the configuration a plan was made under, so a plan is
+    never applied with other excludes than it was made with. rels are
+    the planned directories, whose nested ignore files are included.
+    """
+    return _plan_key(collect_ignores(base_dir, gitignore), load_python_free_markers(base_dir), rels)
+
+
+def make_plan(
+    base_dir: Path, init_content: str = "", gitignore: bool = False, **options
+) -> Tuple[Plan, int]:
+    """
+    Scans base_dir like --dry-run and returns (plan, scanned dirs). Takes
+    the scan options of iter_events. Each planned directory's mtime, and
+    its parent's, is recorded right after it was found to lack
+    __init__.py; mtimes within the racy window of now are left out, as in
+    the --cache index.
+    Entries are sorted, so siblings are written one after the other.
+    """
+    base_dir = Path(os.path.abspath(base_dir))
+    excludes = collect_ignores(base_dir, gitignore)
+    markers = load_python_free_markers(base_dir)
+    top = os.fspath(base_dir)
+
+    missing = []
+    scanned = 0
+    for event in iter_events(
+        base_dir, check=True, gitignore=gitignore, excludes=excludes, markers=markers, **options
+    ):
+        if isinstance(event, Missing):
+            rel = os.path.relpath(event.path, top)
+            try:
+                mtime_ns = os.stat(event.path).st_mtime_ns
+                parent_mtime_ns = None
+                if rel != os.curdir:
+                    parent_mtime_ns = os.stat(os.path.dirname(event.path)).st_mtime_ns
+            except OSError:
+                # Gone already; applying will find out too
+                mtime_ns = parent_mtime_ns = None
+            missing.append((rel, mtime_ns, parent_mtime_ns))
+        elif isinstance(event, Error):
+            raise PlanError(event.message)
+        elif isinstance(event, Done):
+            scanned = event.scanned
+
+    cutoff = time.time_ns() - RACY_WINDOW_NS
+    trusted = lambda mtime_ns: mtime_ns if mtime_ns is not None and mtime_ns < cutoff else None
+    entries = [
+        PlanEntry("" if rel == os.curdir else rel, trusted(mtime_ns), trusted(parent_mtime_ns))
+        for rel, mtime_ns, parent_mtime_ns in sorted(missing, key=lambda item: item[0])
+    ]
+    key = _plan_key(excludes, markers, [entry.rel for entry in entries])
+    plan = Plan(top, key, gitignore, init_content, time.time(), entries)
+    return plan, scanned
+
+
+def stale_entries(plan: Plan) -> List[Tuple[PlanEntry, str]]:
+    """
+    Stats every planned directory and its parent, without listing any.
+    Returns the entries whose directory changed since the plan was made,
+    with the reason. Raises PlanError if the configuration changed.
+    """
+    rels = [entry.rel for entry in plan.entries]
+    if config_key(Path(plan.base_dir), plan.gitignore, rels) != plan.key:
+        raise PlanError(
+            "the configuration (excludes, ignore files, markers or pyinitgen version) "
+            "changed since the plan was made"
+        )
+
+    stale = []
+    for entry in plan.entries:
+        path = os.path.join(plan.base_dir, entry.rel)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            stale.append((entry, "no longer exists"))
+            continue
+        if entry.mtime_ns is None:
+            stale.append((entry, "was modified just before the plan was made"))
+            continue
+        if mtime_ns != entry.mtime_ns:
+            stale.append((entry, "changed since the plan was made"))
+            continue
+        if not entry.rel:
+            continue
+        try:
+            parent_mtime_ns = os.stat(os.path.dirname(path)).st_mtime_ns
+        except OSError:
+            parent_mtime_ns = None
+        if entry.parent_mtime_ns is None:
+            stale.append((entry, "has a parent that was modified just before the plan was made"))
+        elif parent_mtime_ns != entry.parent_mtime_ns:
+            stale.append((entry, "has a parent that changed since the plan was made"))
+    return stale
+
+
+def iter_apply(plan: Plan, revalidate: Collection[str] = ()) -> Iterator[Event]:
+    """
+    Writes the planned __init__.py files in one loop, without walking the
+    tree. Directories in revalidate (relative paths) are checked first
+    like --changed does: the chain from the base dir down to each must
+    still be real, non-excluded directories, and it must still lack an
+    __init__.py. Files that exist by now are left alone. Yields Created
+    and Error records, then Done with the planned directories as both
+    scanned and missing.
+    """
+    valid = set()
+    if revalidate:
+        base_dir = Path(plan.base_dir)
+        stale_paths = [os.path.join(plan.base_dir, rel) for rel in revalidate]
+        excludes = collect_ignores(base_dir, plan.gitignore)
+        valid = {root for root, has_init in walk_changed(base_dir, stale_paths, excludes) if not has_init}
+
+    created = 0
+    with InitWriter(plan.init_content) as writer:
+        for rel, *_ in plan.entries:
+            root = os.path.join(plan.base_dir, rel) if rel else plan.base_dir
+            if rel in revalidate and root not in valid:
+                continue
+            init_file = os.path.join(root, "__init__.py")
+            try:
+                if not writer.create(root):
+                    continue
+            except OSError as e:
+                yield Error(init_file, f"Failed to create {init_file}: {e}")
+                continue
+            created += 1
+            yield Created(init_file)
+    yield Done(len(plan.entries), len(plan.entries), created)
+
+
+def _configure_logging(quiet: bool, verbose: bool = False) -> None:
+    logging.basicConfig(
+        level=logging.ERROR if quiet else logging.DEBUG if verbose else logging.INFO,
+        format="%(message)s",
+    )
+
+
+def plan_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pyinitgen plan",
+        description="Scan the tree once and write the __init__.py files to create to a plan file "
+        "for `pyinitgen apply`.",
+    )
+    parser.add_argument(
+        "--base-dir",
+        default=".",
+        type=Path,
+        help="Base directory to scan (default: current dir)",
+    )
+    parser.add_argument("--out", required=True, type=Path, metavar="FILE", help="Where to write the plan")
+    parser.add_argument(
+        "--init-content",
+        default="",
+        help="Content the planned __init__.py files get (default: empty file)",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of listing threads")
+    parser.add_argument(
+        "--gitignore", action="store_true", help="Also skip directories ignored by .gitignore files"
+    )
+    parser.add_argument(
+        "--only-python", action="store_true", help="Only plan directories that lead to Python sources"
+    )
+    parser.add_argument("--follow-symlinks", action="store_true", help="Descend into symlinked directories")
+    parser.add_argument("--one-file-system", action="store_true", help="Do not enter other mounts")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress non-error logs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List the planned directories")
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.only_python and (args.follow_symlinks or args.one_file_system):
+        parser.error("--only-python cannot be combined with --follow-symlinks or --one-file-system")
+    _configure_logging(args.quiet, args.verbose)
+
+    try:
+        plan, scanned = make_plan(
+            args.base_dir,
+            init_content=args.init_content,
+            gitignore=args.gitignore,
+            jobs=args.jobs or default_jobs(),
+            only_python=args.only_python,
+            follow_symlinks=args.follow_symlinks,
+            one_file_system=args.one_file_system,
+        )
+        size = write_plan(args.out, plan)
+    except (PlanError, OSError) as e:
+        logging.error(f"Could not make a plan: {e}")
+        return 1
+
+    for entry in plan.entries:
+        logging.debug(f"Planned {os.path.join(plan.base_dir, entry.rel, '__init__.py')}")
+    logging.info(
+        f"Scanned {scanned} dirs, planned {len(plan.entries)} new __init__.py files. "
+        f"Wrote {args.out} ({size} bytes)."
+    )
+    return 0
+
+
+def apply_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pyinitgen apply",
+        description="Create the __init__.py files of a plan made by `pyinitgen plan`, without scanning.",
+    )
+    parser.add_argument("plan", type=Path, help="Plan file written by `pyinitgen plan --out`")
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Instead of refusing a plan whose directories changed, check those directories "
+        "again and apply the rest",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress non-error logs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show revalidated directories")
+    parser.add_argument("--no-emoji", action="store_true", help="Disable emoji in output")
+    args = parser.parse_args(argv)
+    _configure_logging(args.quiet, args.verbose)
+
+    try:
+        plan = read_plan(args.plan)
+        stale = stale_entries(plan)
+    except PlanError as e:
+        logging.error(f"Cannot apply {args.plan}: {e}")
+        return 1
+
+    if stale and not args.revalidate:
+        for entry, reason in stale:
+            logging.error(f"{os.path.join(plan.base_dir, entry.rel)} {reason}")
+        logging.error(
+            f"{len(stale)} of {len(plan.entries)} planned directories changed since the plan was made. "
+            "Run `pyinitgen plan` again, or apply with --revalidate."
+        )
+        return 1
+    for entry, reason in stale:
+        logging.debug(f"Revalidating {os.path.join(plan.base_dir, entry.rel)}: {reason}")
+
+    failures = 0
+    created = 0
+    for event in iter_apply(plan, {entry.rel for entry, _ in stale}):
+        if isinstance(event, Created):
+            logging.info(f"Created {event.path}")
+        elif isinstance(event, Error):
+            failures += 1
+            logging.error(event.message)
+        elif isinstance(event, Done):
+            created = event.created
+
+    checkmark = "✅ " if not args.no_emoji and not failures else ""
+    logging.info(
+        f"{checkmark}Applied plan: created {created} of {len(plan.entries)} planned __init__.py files."
+    )
+    return 1 if failures else 0
+
@@ -0,0 +1,149 @@
+# src/pyinitgen/profiling.py
+
+import contextlib
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# The profiler of the current run, or None. Hot paths check this once per
+# directory, so a run without --profile pays for a single comparison.
+ACTIVE: Optional["Profiler"] = None
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Profiler:
+    """
+    Timing spans and counters for one run.
+    Spans with the same name add up; both keep their first-seen order.
+    Listing threads report here too; process-pool workers do not.
+    """
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Yields from iterable, adding the time spent producing each item
+        (but not the time the consumer holds it) to span `name`.
+        """
+        it = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    self.add_time(name, time.perf_counter() - start)
+                yield item
+        finally:
+            # Stopping early must still stop the wrapped walker
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    def listing(self, entries: Iterable[T]) -> Iterator[T]:
+        """
+        Counts one listed directory and the entries it holds.
+        """
+        self.count("dirs listed")
+        seen = 0
+        try:
+            for entry in entries:
+                seen += 1
+                yield entry
+        finally:
+            self.count("entries seen", seen)
+
+    def format_summary(self) -> str:
+        rows = [("Phase", "ms")]
+        rows += [(name, f"{seconds * 1000:.1f}") for name, seconds in self.spans.items()]
+        rows += [("", ""), ("Counter", "value")]
+        rows += [(name, str(value)) for name, value in self.counters.items()]
+
+        width = max(len(name) for name, _ in rows)
+        value_width = max(len(value) for _, value in rows)
+        return "\n".join(
+            f"{name:<{width}}  {value:>{value_width}}" if name else "" for name, value in rows
+        )
+
+
+class TimedMatcher:
+    """
+    Wraps an exclude matcher so every match() is timed, and every
+    excluded directory is counted as a pruned subtree.
+    """
+
+    def __init__(self, matcher, profiler: Profiler):
+        self.matcher = matcher
+        self.profiler = profiler
+
+    def match(self, rel_path: str, name: str) -> bool:
+        start = time.perf_counter()
+        excluded = self.matcher.match(rel_path, name)
+        self.profiler.add_time("exclude matching", time.perf_counter() - start)
+        if excluded:
+            self.profiler.count("pruned subtrees")
+        return excluded
+
+    def __getattr__(self, name):
+        return getattr(self.matcher, name)
+
+
+def span(name: str):
+    """
+    A span of the active profiler, or a no-op when profiling is off.
+    """
+    return ACTIVE.span(name) if ACTIVE is not None else _NULL_SPAN
+
+
+def count(name: str, n: int = 1) -> None:
+    if ACTIVE is not None:
+        ACTIVE.count(name, n)
+
+
+@contextlib.contextmanager
+def profiling(stats_file: Optional[str] = None) -> Iterator[Profiler]:
+    """
+    Profiles everything pyinitgen does inside the block and yields the
+    Profiler. With stats_file, a cProfile of the block is also dumped
+    there (read it with pstats or snakeviz). Profiling is process-wide.
+    """
+    global ACTIVE
+    profiler = Profiler()
+    previous, ACTIVE = ACTIVE, profiler
+    cprofile = None
+    if stats_file:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    try:
+        yield profiler
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(stats_file)
+        ACTIVE = previous
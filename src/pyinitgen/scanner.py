@@ -0,0 +1,158 @@
+# src/pyinitgen/scanner.py
+
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .config import CONFIG_FILE_NAMES, GITIGNORE_FILE_NAME, config_stamp, load_python_free_markers
+from .events import Created, Done, Error, Event, Missing, Scanned, iter_events
+from .ignores import IgnoreTree, collect_ignores
+
+
+class Result(NamedTuple):
+    """
+    Outcome of Scanner.check() or Scanner.apply().
+    """
+
+    scanned: int
+    missing: List[str]
+    created: List[str]
+    errors: List[Error]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and len(self.missing) == len(self.created)
+
+
+class Scanner:
+    """
+    A reusable scan session for one base dir, for long-lived callers.
+
+    The configuration (TOML files and ignore files in the base dir) is
+    loaded and compiled once, and only reloaded when one of those files
+    changes mtime or size. Nested ignore files are read again on every
+    scan, but identical ones are still compiled only once.
+
+    check() and apply() may be called repeatedly and from several threads
+    at once. Nothing here configures logging.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path,
+        init_content: str = "",
+        jobs: int = 1,
+        processes: int = 0,
+        cache: bool = False,
+        source: str = "walk",
+        gitignore: bool = False,
+        only_python: bool = False,
+        durable: bool = False,
+        engine: str = "threads",
+        max_in_flight: int = 64,
+        low_memory: bool = False,
+        follow_symlinks: bool = False,
+        one_file_system: bool = False,
+    ):
+        self.base_dir = Path(base_dir)
+        self.init_content = init_content
+        self.jobs = jobs
+        self.processes = processes
+        self.cache = cache
+        self.source = source
+        self.gitignore = gitignore
+        self.only_python = only_python
+        self.durable = durable
+        self.engine = engine
+        self.max_in_flight = max_in_flight
+        self.low_memory = low_memory
+        self.follow_symlinks = follow_symlinks
+        self.one_file_system = one_file_system
+
+        self.config_files = CONFIG_FILE_NAMES
+        if gitignore:
+            self.config_files += (GITIGNORE_FILE_NAME,)
+
+        self._lock = threading.Lock()
+        self._stamp: Optional[tuple] = None
+        self._excludes: Optional[IgnoreTree] = None
+        self._markers: List[str] = []
+        self.reloads = 0
+
+    def _config_stamp(self) -> tuple:
+        return config_stamp(self.base_dir, self.config_files)
+
+    def config(self) -> Tuple[IgnoreTree, List[str]]:
+        """
+        Returns the compiled excludes and Python-free markers, reloading
+        them if a config file changed since the last call.
+        """
+        stamp = self._config_stamp()
+        with self._lock:
+            if stamp != self._stamp:
+                self._excludes = collect_ignores(self.base_dir, self.gitignore)
+                self._markers = load_python_free_markers(self.base_dir)
+                self._stamp = stamp
+                self.reloads += 1
+            # Each scan gets its own nested-layer cache
+            return self._excludes.fresh(), self._markers
+
+    def iter_events(
+        self, dry_run: bool = False, check: bool = False, changed: Optional[Iterable[str]] = None
+    ) -> Iterator[Event]:
+        """
+        iter_events() with this session's options and compiled config.
+        """
+        excludes, markers = self.config()
+        return iter_events(
+            self.base_dir,
+            dry_run=dry_run,
+            check=check,
+            init_content=self.init_content,
+            jobs=self.jobs,
+            processes=self.processes,
+            cache=self.cache,
+            changed=changed,
+            source=self.source,
+            gitignore=self.gitignore,
+            only_python=self.only_python,
+            excludes=excludes,
+            markers=markers,
+            durable=self.durable,
+            engine=self.engine,
+            max_in_flight=self.max_in_flight,
+            low_memory=self.low_memory,
+            follow_symlinks=self.follow_symlinks,
+            one_file_system=self.one_file_system,
+        )
+
+    def _collect(self, events: Iterator[Event]) -> Result:
+        scanned = 0
+        missing: List[str] = []
+        created: List[str] = []
+        errors: List[Error] = []
+        for event in events:
+            if isinstance(event, Scanned):
+                scanned += 1
+            elif isinstance(event, Missing):
+                missing.append(event.path)
+            elif isinstance(event, Created):
+                created.append(event.path)
+            elif isinstance(event, Error):
+                errors.append(event)
+            elif isinstance(event, Done):
+                scanned = event.scanned
+        return Result(scanned, missing, created, errors)
+
+    def check(self, changed: Optional[Iterable[str]] = None) -> Result:
+        """
+        Finds the directories missing __init__.py without writing anything.
+        """
+        return self._collect(self.iter_events(check=True, changed=changed))
+
+    def apply(self, changed: Optional[Iterable[str]] = None, dry_run: bool = False) -> Result:
+        """
+        Creates the missing __init__.py files. Unlike create_inits, a failed
+        write does not stop the run; it is recorded in Result.errors.
+        """
+        return self._collect(self.iter_events(dry_run=dry_run, changed=changed))
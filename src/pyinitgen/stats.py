@@ -0,0 +1,138 @@
+# src/pyinitgen/stats.py
+
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from . import __version__
+from .writer import write_atomic
+
+
+class RunStats(NamedTuple):
+    """
+    Statistics of one create_inits run, for export to monitoring.
+    """
+
+    base_dir: str
+    scanned: int
+    pruned: int
+    missing: int
+    created: int
+    failures: int
+    duration_seconds: float
+    timestamp: float
+    throttled_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+
+    @property
+    def dirs_per_second(self) -> float:
+        return self.scanned / self.duration_seconds if self.duration_seconds > 0 else 0.0
+
+
+# (metric name, RunStats attribute, help text)
+OPENMETRICS_GAUGES = (
+    ("pyinitgen_scanned_dirs", "scanned", "Directories scanned."),
+    ("pyinitgen_pruned_dirs", "pruned", "Excluded directories whose subtree was skipped."),
+    ("pyinitgen_missing_inits", "missing", "Directories found without __init__.py."),
+    ("pyinitgen_created_inits", "created", "__init__.py files created."),
+    ("pyinitgen_failures", "failures", "Directories that could not be fixed."),
+    ("pyinitgen_duration_seconds", "duration_seconds", "Wall time of the run."),
+    ("pyinitgen_dirs_per_second", "dirs_per_second", "Scan throughput."),
+    ("pyinitgen_last_run_timestamp_seconds", "timestamp", "Unix time the run finished."),
+    ("pyinitgen_throttled_seconds", "throttled_seconds", "Time spent waiting for the I/O budget."),
+    ("pyinitgen_peak_rss_bytes", "peak_rss_bytes", "Peak resident set size of the process."),
+)
+
+_UNITS = {
+    "pyinitgen_duration_seconds": "seconds",
+    "pyinitgen_throttled_seconds": "seconds",
+    "pyinitgen_peak_rss_bytes": "bytes",
+}
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident set size of this process so far, or 0 where the OS
+    does not report it (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class PruneCounter:
+    """
+    Wraps an exclude matcher and counts the directories it excludes.
+    A copy pickled for a process-pool worker counts from zero, and
+    scan_sharded adds the workers' counts back with add_pruned().
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.pruned = 0
+        self._lock = threading.Lock()
+
+    def match(self, rel_path: str, name: str) -> bool:
+        if self.matcher.match(rel_path, name):
+            with self._lock:
+                self.pruned += 1
+            return True
+        return False
+
+    def add_pruned(self, n: int) -> None:
+        with self._lock:
+            self.pruned += n
+
+    def __getattr__(self, name):
+        return getattr(self.matcher, name)
+
+    def __reduce__(self):
+        return PruneCounter, (self.matcher,)
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_openmetrics(stats: RunStats) -> str:
+    """
+    Renders stats in the OpenMetrics text format, which the node exporter
+    textfile collector also reads.
+    """
+    labels = f'{{base_dir="{_label_value(stats.base_dir)}",version="{__version__}"}}'
+    lines = []
+    for name, attr, help_text in OPENMETRICS_GAUGES:
+        lines.append(f"# TYPE {name} gauge")
+        if name in _UNITS:
+            lines.append(f"# UNIT {name} {_UNITS[name]}")
+        lines += [f"# HELP {name} {help_text}", f"{name}{labels} {getattr(stats, attr)}"]
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def format_json(stats: RunStats) -> str:
+    data = {"version": __version__, **stats._asdict(), "dirs_per_second": stats.dirs_per_second}
+    return json.dumps(data, indent=2) + "\n"
+
+
+def write_stats(path: Path, text: str) -> None:
+    """
+    Atomically replaces path with text, so a collector never reads a
+    half-written file. The temp name has no extension for it to pick up.
+    """
+    write_atomic(path, text)
+
+
+def export_stats(
+    stats: RunStats, json_path: Optional[Path] = None, openmetrics_path: Optional[Path] = None
+) -> None:
+    if json_path is not None:
+        write_stats(json_path, format_json(stats))
+    if openmetrics_path is not None:
+        write_stats(openmetrics_path, format_openmetrics(stats))
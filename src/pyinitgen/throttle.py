@@ -0,0 +1,202 @@
+# src/pyinitgen/throttle.py
+
+import contextlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+# The I/O budget of the current run, or None. Like profiling.ACTIVE, hot
+# paths check this once per directory listed or file written.
+ACTIVE: Optional["IOBudget"] = None
+
+# ioprio_set(2) has no wrapper in the standard library
+_IOPRIO_SET_SYSCALLS: Dict[str, int] = {
+    "x86_64": 251,
+    "amd64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "arm64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+    "ppc64": 273,
+    "s390x": 282,
+}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_CLASS_BE = 2
+_IOPRIO_LOWEST_LEVEL = 7
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second on average, and bursts of up to
+    `burst` (default: one second's worth). take() blocks until the
+    operation fits the budget. Callers on several threads reserve their
+    tokens under a lock and sleep outside it, so they queue up fairly.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Takes one token without waiting for it. Returns the seconds until
+        it is available, which the caller must wait before its operation.
+        """
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def take(self) -> float:
+        """
+        Takes one token, sleeping until it is available. Returns the
+        seconds slept.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class IOBudget:
+    """
+    Caps directory listings and __init__.py writes per second, each with
+    its own token bucket (None leaves that kind unlimited), and adds up
+    the time spent waiting for either.
+    """
+
+    def __init__(self, listings: Optional[float] = None, writes: Optional[float] = None, **bucket_options):
+        self.listings = TokenBucket(listings, **bucket_options) if listings else None
+        self.writes = TokenBucket(writes, **bucket_options) if writes else None
+        self.throttled_seconds = 0.0
+        self.waits = 0
+        self._lock = threading.Lock()
+
+    def _take(self, bucket: Optional[TokenBucket], wait: bool) -> float:
+        if bucket is None:
+            return 0.0
+        waited = bucket.take() if wait else bucket.reserve()
+        if waited > 0:
+            with self._lock:
+                self.throttled_seconds += waited
+                self.waits += 1
+            if profiling.ACTIVE is not None:
+                profiling.ACTIVE.add_time("throttled", waited)
+        return waited
+
+    def listing(self, wait: bool = True) -> float:
+        """
+        Takes a listing token and returns the seconds waited for it. With
+        wait=False the caller does the waiting, e.g. with asyncio.sleep.
+        """
+        return self._take(self.listings, wait)
+
+    def write(self, wait: bool = True) -> float:
+        return self._take(self.writes, wait)
+
+    def describe(self) -> str:
+        parts = []
+        if self.listings is not None:
+            parts.append(f"{self.listings.rate:g} listings/s")
+        if self.writes is not None:
+            parts.append(f"{self.writes.rate:g} writes/s")
+        return ", ".join(parts)
+
+
+def parse_io_budget(spec: str) -> IOBudget:
+    """
+    Parses an --io-budget value: a number of directory listings per
+    second ("500"), or comma-separated "listings=N" and "writes=N".
+    """
+    rates = {}
+    for part in spec.split(","):
+        key, sep, value = part.strip().rpartition("=")
+        key = key.strip() if sep else "listings"
+        if key not in ("listings", "writes") or key in rates:
+            raise ValueError(f"invalid I/O budget {spec!r}, expected e.g. 'listings=500,writes=50'")
+        try:
+            rate = float(value)
+        except ValueError:
+            raise ValueError(f"invalid rate {value.strip()!r} in I/O budget {spec!r}") from None
+        if not rate > 0:
+            raise ValueError(f"the {key} rate must be positive")
+        rates[key] = rate
+    return IOBudget(**rates)
+
+
+def listing() -> None:
+    """
+    Waits for a directory listing to fit the active budget, if any.
+    """
+    if ACTIVE is not None:
+        ACTIVE.listing()
+
+
+def write() -> None:
+    if ACTIVE is not None:
+        ACTIVE.write()
+
+
+@contextlib.contextmanager
+def throttled(budget: Optional[IOBudget]) -> Iterator[Optional[IOBudget]]:
+    """
+    Applies budget to every listing and write inside the block; None
+    keeps the budget already in force. Like profiling, it is process-wide,
+    and process-pool workers do not see it.
+    """
+    global ACTIVE
+    previous = ACTIVE
+    if budget is not None:
+        ACTIVE = budget
+    try:
+        yield budget
+    finally:
+        ACTIVE = previous
+
+
+def lower_io_priority() -> bool:
+    """
+    Moves this process, and the threads it starts afterwards, to the
+    lowest best-effort I/O priority (as `ionice -c2 -n7`), so the kernel
+    serves co-located workloads first. Returns False where ioprio_set is
+    unavailable; only Linux has it.
+    """
+    # Imported here: ctypes and platform cost every other run startup time
+    import platform
+
+    number = _IOPRIO_SET_SYSCALLS.get(platform.machine().lower())
+    if platform.system() != "Linux" or number is None:
+        return False
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    priority = (_IOPRIO_CLASS_BE << _IOPRIO_CLASS_SHIFT) | _IOPRIO_LOWEST_LEVEL
+    if libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, priority) != 0:
+        logger.debug(f"ioprio_set failed: {os.strerror(ctypes.get_errno())}")
+        return False
+    return True
@@ -0,0 +1,559 @@
+# src/pyinitgen/walker.py
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Collection, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from . import profiling, throttle
+from .matcher import ExcludeMatcher
+
+# Directories a worker process lists before handing its unfinished
+# subtrees back to the coordinator. Small shards are used while workers
+# sit idle so the tree is split up quickly.
+SHARD_BUDGET = 4096
+SPLIT_BUDGET = 64
+
+# What scan_python_dir found among a directory's own files
+PY_NONE = 0  # no .py files
+PY_FILES = 1  # at least one .py file
+PY_MARKED = 2  # a Python-free marker file; the subtree is not descended into
+
+
+def default_jobs() -> int:
+    """
+    Number of listing threads used when --jobs is not given.
+    Listing is I/O bound, so the CPU count is oversubscribed a little.
+    """
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def child_rel(rel: str, name: str) -> str:
+    """
+    Relative path of a child directory, as matched by ExcludeMatcher.
+    The base dir itself is "".
+    """
+    return f"{rel}/{name}" if rel else name
+
+
+def scan_dir(
+    path: str,
+    rel: str,
+    excludes: ExcludeMatcher,
+    follow_symlinks: bool = False,
+    throttled: bool = True,
+) -> Tuple[List[str], bool]:
+    """
+    Lists a single directory with os.scandir.
+    Returns the sorted names of the subdirectories to descend into and
+    whether an __init__.py is present, using the same rules as os.walk.
+    rel is the directory's path relative to the base dir. Symlinked
+    directories are only descended into with follow_symlinks. Callers
+    that take the I/O budget themselves pass throttled=False.
+    """
+    subdirs = []
+    has_init = False
+    if throttled:
+        throttle.listing()
+    with os.scandir(path) as it:
+        if profiling.ACTIVE is not None:
+            it = profiling.ACTIVE.listing(it)
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                # os.walk lists symlinked dirs but does not descend into them
+                name = entry.name
+                if follow_symlinks or not entry.is_symlink():
+                    if not excludes.match(child_rel(rel, name), name):
+                        subdirs.append(name)
+            elif not has_init and entry.name == "__init__.py":
+                # File names are neither kept nor compared once this is known
+                has_init = True
+
+    subdirs.sort()
+    return subdirs, has_init
+
+
+def scan_python_dir(
+    path: str, rel: str, excludes: ExcludeMatcher, markers: Collection[str] = ()
+) -> Tuple[List[str], bool, int]:
+    """
+    Like scan_dir, but also reports whether the directory itself holds
+    Python sources (PY_FILES), none (PY_NONE), or one of the Python-free
+    marker files (PY_MARKED).
+    """
+    subdirs = []
+    has_init = False
+    has_py = False
+    marked = False
+    throttle.listing()
+    with os.scandir(path) as it:
+        if profiling.ACTIVE is not None:
+            it = profiling.ACTIVE.listing(it)
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            name = entry.name
+            if is_dir:
+                if not entry.is_symlink() and not excludes.match(child_rel(rel, name), name):
+                    subdirs.append(name)
+            elif name in markers:
+                marked = True
+            elif name.endswith(".py"):
+                has_py = True
+                has_init = has_init or name == "__init__.py"
+
+    subdirs.sort()
+    python = PY_MARKED if marked else PY_FILES if has_py else PY_NONE
+    return subdirs, has_init, python
+
+
+def walk_python(
+    base_dir: Path,
+    excludes: ExcludeMatcher,
+    markers: Collection[str] = (),
+    scan: Optional[Callable[[str, str], Tuple[List[str], bool, int]]] = None,
+) -> Iterator[Tuple[str, bool, bool]]:
+    """
+    Yields (root, has_init, wanted) for every directory listed, where
+    wanted says it has Python sources somewhere below it. The wanted ones
+    come in sorted pre-order.
+    "Contains Python" is aggregated bottom-up in one depth-first pass;
+    subtrees with a marker file are listed but never descended. scan
+    defaults to scan_python_dir and may be replaced, e.g. by a cached
+    listing.
+    """
+    if scan is None:
+        def scan(path: str, rel: str) -> Tuple[List[str], bool, int]:
+            return scan_python_dir(path, rel, excludes, markers)
+
+    # Only the directories still being walked are buffered. Once Python
+    # is found, all of them are wanted and flushed; a finished Python-free
+    # subtree is the tail of the buffer and is flushed as unwanted.
+    # [root, has_init, wanted]
+    kept: List[list] = []
+    # Entries flushed from the front of the buffer, so a frame's index in
+    # the walk maps to its index in the buffer
+    offset = 0
+
+    def enter(root: str, rel: str) -> Tuple[Optional[list], bool]:
+        subdirs, has_init, python = scan(root, rel)
+        entry = [root, has_init, False]
+        kept.append(entry)
+        if python == PY_MARKED:
+            return None, False
+        # [root, rel, children left to visit, index in the walk, entry]
+        return [root, rel, subdirs[::-1], offset + len(kept) - 1, entry], python == PY_FILES
+
+    def flush(start: int) -> Iterator[Tuple[str, bool, bool]]:
+        nonlocal offset
+        tail = kept[start:]
+        del kept[start:]
+        if not start:
+            offset += len(tail)
+        for root, has_init, wanted in tail:
+            yield root, has_init, wanted
+
+    stack: List[list] = []
+    try:
+        frame, found = enter(os.fspath(base_dir), "")
+    except OSError:
+        return
+    while True:
+        if frame is not None:
+            stack.append(frame)
+            if found:
+                for open_frame in stack:
+                    open_frame[4][2] = True
+                yield from flush(0)
+        if not stack:
+            break
+
+        frame = stack[-1]
+        if frame[2]:
+            name = frame[2].pop()
+            try:
+                frame, found = enter(os.path.join(frame[0], name), child_rel(frame[1], name))
+            except OSError:
+                frame = None
+            continue
+
+        # Whatever of this subtree is still buffered can no longer be wanted
+        stack.pop()
+        yield from flush(0 if frame[4][2] else frame[3] - offset)
+        frame = None
+
+    # A marked base dir is never pushed
+    yield from flush(0)
+
+
+class DirGuard:
+    """
+    Keeps a walk linear in the number of unique directories once symlinks
+    are followed: directories are identified by (st_dev, st_ino), and one
+    reached again through a symlink or bind mount is not walked twice,
+    which also ends symlink loops. With one_file_system, directories on
+    another device than the base dir are not entered.
+
+    Visited inodes are kept as one set of ints per device.
+    """
+
+    def __init__(self, follow_symlinks: bool = False, one_file_system: bool = False):
+        self.follow_symlinks = follow_symlinks
+        self.one_file_system = one_file_system
+        self.device: Optional[int] = None
+        self.revisits = 0
+        self.other_mounts = 0
+        self._seen: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def stat(self, path: str) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (st_dev, st_ino) of path, following symlinks, or None
+        if one_file_system keeps it out. The first path is the base dir.
+        """
+        st = os.stat(path)
+        with self._lock:
+            if self.device is None:
+                self.device = st.st_dev
+            elif self.one_file_system and st.st_dev != self.device:
+                self.other_mounts += 1
+                return None
+        return st.st_dev, st.st_ino
+
+    def add(self, key: Tuple[int, int]) -> bool:
+        """
+        Marks key as visited. Returns False if it was already.
+        """
+        dev, ino = key
+        with self._lock:
+            inodes = self._seen.setdefault(dev, set())
+            if ino in inodes:
+                self.revisits += 1
+                return False
+            inodes.add(ino)
+            return True
+
+    def admit(self, path: str) -> bool:
+        key = self.stat(path)
+        return key is not None and self.add(key)
+
+
+def _scan_guarded(
+    path: str, rel: str, excludes: ExcludeMatcher, guard: DirGuard
+) -> Tuple[Optional[Tuple[int, int]], List[str], bool]:
+    # Another mount is not even listed; duplicates are dropped by the caller
+    key = guard.stat(path)
+    if key is None:
+        return None, [], False
+    return (key, *scan_dir(path, rel, excludes, guard.follow_symlinks))
+
+
+def walk_parallel(
+    base_dir: Path, excludes: ExcludeMatcher, jobs: int, rel: str = "", guard: Optional[DirGuard] = None
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Walks base_dir, listing directories concurrently on `jobs` threads.
+    Yields (root, has_init) in sorted pre-order, so the output does not
+    depend on which listing finishes first.
+
+    With a guard, a directory reached twice is only walked at its first
+    path in that order; the check runs here, not on the listing threads,
+    so which path wins does not depend on timing either.
+    """
+    pool = ThreadPoolExecutor(max_workers=jobs)
+
+    def submit(path: str, rel: str):
+        if guard is None:
+            return pool.submit(scan_dir, path, rel, excludes)
+        return pool.submit(_scan_guarded, path, rel, excludes, guard)
+
+    try:
+        top = os.fspath(base_dir)
+        stack = [(top, rel, submit(top, rel))]
+        while stack:
+            root, rel, future = stack.pop()
+            try:
+                result = future.result()
+            except OSError:
+                # Same as os.walk: unreadable directories are skipped
+                continue
+            if guard is None:
+                subdirs, has_init = result
+            else:
+                key, subdirs, has_init = result
+                if key is None or not guard.add(key):
+                    continue
+
+            yield root, has_init
+
+            # Children are submitted as soon as their parent is known so the
+            # pool always has the whole frontier to work on
+            for name in reversed(subdirs):
+                path = os.path.join(root, name)
+                sub_rel = child_rel(rel, name)
+                stack.append((path, sub_rel, submit(path, sub_rel)))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _Frame:
+    """
+    A directory on walk_compact's stack. The subdirectories still to
+    visit are kept as one NUL-joined string (NUL cannot occur in a file
+    name) and an offset into it, instead of a list of str objects.
+    """
+
+    __slots__ = ("path", "rel", "names", "pos")
+
+    def __init__(self, path: str, rel: str, names: str):
+        self.path = path
+        self.rel = rel
+        self.names = names
+        self.pos = 0
+
+    def next_name(self) -> Optional[str]:
+        if self.pos >= len(self.names):
+            return None
+        end = self.names.find("\0", self.pos)
+        if end < 0:
+            end = len(self.names)
+        name = self.names[self.pos : end]
+        self.pos = end + 1
+        return name
+
+
+def walk_compact(
+    base_dir: Path, excludes: ExcludeMatcher, rel: str = "", guard: Optional[DirGuard] = None
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Low-memory walk, in the same sorted pre-order as walk_parallel.
+    os.walk keeps a list of every file name of the directory it is in,
+    which makes peak RSS grow with the widest directory. This walk keeps
+    no file names at all: scan_dir classifies entries by their d_type,
+    without stat calls on most filesystems, and only keeps subdirectory
+    names, packed into one string per directory on the current path.
+    Each directory is released from excludes once its subtree is done,
+    so nested ignore layers are not kept either. A guard is consulted
+    before each directory is listed.
+    """
+    follow_symlinks = guard is not None and guard.follow_symlinks
+
+    def enter(path: str, rel: str) -> Optional[Tuple[_Frame, bool]]:
+        try:
+            if guard is not None and not guard.admit(path):
+                return None
+            subdirs, has_init = scan_dir(path, rel, excludes, follow_symlinks)
+        except OSError:
+            # Same as os.walk: unreadable directories are skipped
+            return None
+        return _Frame(path, rel, "\0".join(subdirs)), has_init
+
+    stack: List[_Frame] = []
+    entered = enter(os.fspath(base_dir), rel)
+    while entered is not None or stack:
+        if entered is not None:
+            frame, has_init = entered
+            yield frame.path, has_init
+            stack.append(frame)
+
+        frame = stack[-1]
+        name = frame.next_name()
+        if name is None:
+            excludes.release(stack.pop().rel)
+            entered = None
+            continue
+        entered = enter(os.path.join(frame.path, name), child_rel(frame.rel, name))
+
+
+def walk(
+    base_dir: Path,
+    excludes: ExcludeMatcher,
+    jobs: int = 1,
+    rel: str = "",
+    low_memory: bool = False,
+    guard: Optional[DirGuard] = None,
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Yields (root, has_init) for every directory under base_dir that is not
+    excluded. jobs=1 uses a plain os.walk; more jobs use walk_parallel.
+    low_memory uses walk_compact on a single thread instead, as does a
+    single-threaded walk with a guard (symlink following or
+    one-file-system). All of them yield in sorted pre-order, so the
+    report does not depend on jobs. rel is base_dir's own path relative
+    to the directory the exclude patterns are anchored at.
+    """
+    if low_memory or (guard is not None and jobs <= 1):
+        yield from walk_compact(base_dir, excludes, rel, guard)
+        return
+    if jobs > 1:
+        yield from walk_parallel(base_dir, excludes, jobs, rel, guard)
+        return
+
+    prefix_len = len(os.path.join(os.fspath(base_dir), ""))
+    for root, dirs, files in os.walk(base_dir):
+        sub_rel = root[prefix_len:].replace(os.sep, "/")
+        root_rel = child_rel(rel, sub_rel) if sub_rel else rel
+        # os.walk has listed root already; waiting here delays the next listing
+        throttle.listing()
+        # Filter out unwanted dirs
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.count("dirs listed")
+            profiling.ACTIVE.count("entries seen", len(dirs) + len(files))
+        dirs[:] = [d for d in dirs if not excludes.match(child_rel(root_rel, d), d)]
+        # Same order as walk_parallel, whatever order readdir returns
+        dirs.sort()
+        yield root, "__init__.py" in files
+
+
+def _scan_shard(
+    roots: List[Tuple[str, str]], excludes: ExcludeMatcher, budget: int
+) -> Tuple[int, int, List[str], List[Tuple[str, str]]]:
+    """
+    Worker side of scan_sharded.
+    Walks the given (root, rel) subtrees until `budget` directories have
+    been listed. Returns (scanned, pruned, missing, leftover) where
+    leftover holds the subtrees that were not visited yet. pruned is only
+    counted when excludes is a stats.PruneCounter, which is unpickled
+    fresh for every shard.
+    """
+    stack = list(reversed(roots))
+    scanned = 0
+    missing = []
+    while stack and scanned < budget:
+        root, rel = stack.pop()
+        try:
+            subdirs, has_init = scan_dir(root, rel, excludes)
+        except OSError:
+            continue
+
+        scanned += 1
+        if not has_init:
+            missing.append(root)
+        stack.extend(
+            (os.path.join(root, name), child_rel(rel, name)) for name in reversed(subdirs)
+        )
+
+    stack.reverse()
+    return scanned, getattr(excludes, "pruned", 0), missing, stack
+
+
+def scan_sharded(
+    base_dir: Path, excludes: ExcludeMatcher, processes: int
+) -> Tuple[int, List[str]]:
+    """
+    Scans base_dir with a pool of worker processes.
+    The tree is split into subtree shards. A worker that runs out of budget
+    returns its unfinished subtrees to the shared queue, where idle workers
+    steal them. Returns the number of scanned dirs and the directories
+    missing __init__.py, in the same order as walk_parallel. Directories
+    pruned in the workers are added back to a stats.PruneCounter.
+    """
+    # Imported here: multiprocessing costs every other run startup time
+    from concurrent.futures import ProcessPoolExecutor
+
+    pending = deque([[(os.fspath(base_dir), "")]])
+    scanned_dirs = pruned_dirs = 0
+    missing = []
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        running = set()
+        while pending or running:
+            while pending and len(running) < processes:
+                budget = SHARD_BUDGET if len(pending) >= processes else SPLIT_BUDGET
+                running.add(pool.submit(_scan_shard, pending.popleft(), excludes, budget))
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                scanned, pruned, shard_missing, leftover = future.result()
+                scanned_dirs += scanned
+                pruned_dirs += pruned
+                missing.extend(shard_missing)
+
+                # Spread the leftovers so every idle worker gets a share
+                step = -(-len(leftover) // processes)
+                for i in range(0, len(leftover), step or 1):
+                    pending.append(leftover[i : i + step])
+
+    if pruned_dirs:
+        excludes.add_pruned(pruned_dirs)
+    # Sorting by path components reproduces the sorted pre-order
+    missing.sort(key=lambda root: root.split(os.sep))
+    return scanned_dirs, missing
+
+
+def walk_changed(
+    base_dir: Path, paths: Iterable[str], excludes: ExcludeMatcher
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Yields (root, has_init) only for the directories between base_dir and
+    each changed path, instead of walking the whole tree.
+    A chain stops at the first excluded, symlinked or missing directory,
+    exactly where the full walk would have pruned it. Paths outside
+    base_dir are ignored. Output is in the same order as walk_parallel.
+    """
+    top = os.fspath(base_dir)
+    abs_top = os.path.abspath(top)
+
+    chains = set()
+    for path in paths:
+        abs_path = os.path.abspath(path)
+        rel = os.path.relpath(abs_path, abs_top)
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            continue
+        parts = () if rel == os.curdir else tuple(rel.split(os.sep))
+        if not os.path.isdir(abs_path):
+            # A changed file (or a deleted path) validates its parent
+            parts = parts[:-1]
+        for i in range(len(parts) + 1):
+            chains.add(parts[:i])
+
+    pruned = set()
+    for parts in sorted(chains):
+        if parts[:-1] in pruned:
+            pruned.add(parts)
+            continue
+
+        root = os.path.join(top, *parts)
+        if parts and (
+            excludes.match("/".join(parts), parts[-1])
+            or os.path.islink(root)
+            or not os.path.isdir(root)
+        ):
+            pruned.add(parts)
+            continue
+
+        init_file = os.path.join(root, "__init__.py")
+        yield root, os.path.lexists(init_file) and not os.path.isdir(init_file)
+
+
+def walk_dir_set(
+    top: str,
+    dirs: Iterable[Tuple[str, ...]],
+    init_dirs: Collection[Tuple[str, ...]],
+    excludes: ExcludeMatcher,
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Walks a directory tree known in advance (relative path tuples, e.g.
+    from an index or an archive) without touching the filesystem.
+    Excluded subtrees are pruned as in the full walk; output is in sorted
+    pre-order.
+    """
+    pruned: List[Tuple[str, ...]] = []
+    for parts in sorted(dirs):
+        # Sorting keeps every subtree contiguous right after its root
+        if pruned and parts[: len(pruned[-1])] == pruned[-1]:
+            continue
+        if parts and excludes.match("/".join(parts), parts[-1]):
+            pruned.append(parts)
+            continue
+        yield os.path.join(top, *parts), parts in init_dirs
@@ -0,0 +1,261 @@
+# src/pyinitgen/watch.py
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .matcher import ExcludeMatcher
+from .walker import child_rel, scan_dir, walk
+from .writer import write_init
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE_SELF | IN_ONLYDIR
+
+_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """
+    Minimal ctypes binding for the Linux inotify API.
+    """
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        # Fails harmlessly if the kernel already dropped the watch
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields (wd, mask, name) for every event currently queued.
+        """
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Watcher:
+    """
+    Keeps a directory tree supplied with __init__.py files as it changes.
+    One initial scan adds a watch on every non-excluded directory; after
+    that only creation and rename events are processed.
+    """
+
+    mask = WATCH_MASK
+
+    def __init__(
+        self,
+        base_dir: Path,
+        excludes: ExcludeMatcher,
+        dry_run: bool = False,
+        check: bool = False,
+        init_content: str = "",
+        rescan_interval: float = 5.0,
+    ):
+        self.base_dir = os.fspath(base_dir)
+        self.excludes = excludes
+        self.dry_run = dry_run
+        self.check = check
+        self.init_content = init_content
+        self.rescan_interval = rescan_interval
+
+        self.inotify = Inotify()
+        self.paths: Dict[int, str] = {}
+        self.wds: Dict[str, int] = {}
+        # Subtrees left unwatched once the watch limit is hit; they are polled
+        self.unwatched: List[str] = []
+        self.limit_reached = False
+        self.created_count = 0
+        self.missing_count = 0
+
+    def _watch(self, path: str) -> bool:
+        if self.limit_reached:
+            return False
+        try:
+            wd = self.inotify.add_watch(path, self.mask)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                self.limit_reached = True
+                logging.warning(
+                    "inotify watch limit reached (see fs.inotify.max_user_watches); "
+                    f"unwatched directories will be rescanned every {self.rescan_interval:g}s"
+                )
+            elif e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                logging.error(f"Failed to watch {path}: {e}")
+            return False
+
+        self.paths[wd] = path
+        self.wds[path] = wd
+        return True
+
+    def _rel(self, path: str) -> str:
+        if path == self.base_dir:
+            return ""
+        return os.path.relpath(path, self.base_dir).replace(os.sep, "/")
+
+    def _unwatch(self, path: str) -> None:
+        prefix = path + os.sep
+        for watched in [p for p in self.wds if p == path or p.startswith(prefix)]:
+            wd = self.wds.pop(watched)
+            self.paths.pop(wd, None)
+            self.inotify.rm_watch(wd)
+
+    def _fix(self, root: str) -> None:
+        init_file = Path(root) / "__init__.py"
+        if self.check:
+            logging.error(f"Missing __init__.py in {root}")
+            self.missing_count += 1
+        elif self.dry_run:
+            logging.info(f"[DRY-RUN] Would create {init_file}")
+        else:
+            try:
+                if write_init(init_file, self.init_content):
+                    logging.info(f"Created {init_file}")
+                    self.created_count += 1
+            except FileNotFoundError:
+                pass  # Directory vanished again
+            except Exception as e:
+                logging.error(f"Failed to create {init_file}: {e}")
+
+    def add_tree(self, top: str) -> int:
+        """
+        Watches and fixes top and everything below it.
+        Each directory is watched before it is listed, so subdirectories
+        created in between are reported by inotify instead of being missed.
+        Returns the number of directories visited.
+        """
+        visited = 0
+        stack = [(top, self._rel(top))]
+        while stack:
+            root, rel = stack.pop()
+            if not self._watch(root):
+                if self.limit_reached and root not in self.unwatched:
+                    self.unwatched.append(root)
+                    for unwatched_root, has_init in walk(Path(root), self.excludes, rel=rel):
+                        visited += 1
+                        if not has_init:
+                            self._fix(unwatched_root)
+                continue
+
+            try:
+                subdirs, has_init = scan_dir(root, rel, self.excludes)
+            except OSError:
+                continue
+
+            visited += 1
+            if not has_init:
+                self._fix(root)
+            stack.extend(
+                (os.path.join(root, name), child_rel(rel, name)) for name in reversed(subdirs)
+            )
+        return visited
+
+    def rescan_unwatched(self) -> None:
+        for top in self.unwatched:
+            for root, has_init in walk(Path(top), self.excludes, rel=self._rel(top)):
+                if not has_init:
+                    self._fix(root)
+
+    def handle(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            logging.warning("inotify queue overflowed; rescanning the whole tree")
+            self.add_tree(self.base_dir)
+            return
+
+        parent = self.paths.get(wd)
+        if mask & IN_IGNORED:
+            if parent is not None:
+                self.paths.pop(wd, None)
+                if self.wds.get(parent) == wd:
+                    del self.wds[parent]
+            return
+        if parent is None or not mask & IN_ISDIR:
+            return
+
+        path = os.path.join(parent, name)
+        if mask & IN_MOVED_FROM:
+            self._unwatch(path)
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            if self.excludes.match(self._rel(path), name) or os.path.islink(path):
+                return
+            self.add_tree(path)
+
+    def drain(self) -> None:
+        """
+        Handles every event already queued, without blocking.
+        """
+        while True:
+            events = list(self.inotify.read_events())
+            if not events:
+                return
+            for wd, mask, name in events:
+                self.handle(wd, mask, name)
+
+    def run(self, stop: Optional[threading.Event] = None, poll_interval: float = 0.5) -> None:
+        """
+        Processes events until stop is set (or forever).
+        """
+        visited = self.add_tree(self.base_dir)
+        logging.info(f"Watching {len(self.wds)} of {visited} directories for changes...")
+
+        last_rescan = time.monotonic()
+        try:
+            while stop is None or not stop.is_set():
+                ready, _, _ = select.select([self.inotify.fd], [], [], poll_interval)
+                if ready:
+                    self.drain()
+
+                if self.unwatched and time.monotonic() - last_rescan >= self.rescan_interval:
+                    self.rescan_unwatched()
+                    last_rescan = time.monotonic()
+        finally:
+            self.inotify.close()
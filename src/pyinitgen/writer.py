@@ -0,0 +1,111 @@
+# src/pyinitgen/writer.py
+
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+from . import throttle
+
+INIT_MODE = 0o644
+
+_CREATE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+_DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_CLOEXEC", 0)
+
+
+class InitWriter:
+    """
+    Creates __init__.py files relative to an open handle on their parent
+    directory. Consecutive siblings (the usual order of a walk) share one
+    handle, so each path is resolved once per parent instead of once per
+    file, and each file is created with O_EXCL: an __init__.py written by
+    a concurrent run is left alone, never truncated.
+
+    Falls back to plain paths where os.open has no dir_fd (Windows).
+    Each file takes a write from the I/O budget unless throttled=False.
+    """
+
+    def __init__(self, init_content: str = "", throttled: bool = True):
+        self.data = init_content.encode("utf-8")
+        self.throttled = throttled
+        self._parent: Optional[str] = None
+        self._parent_fd: Optional[int] = None
+
+    def _open_parent(self, parent: str) -> Optional[int]:
+        if parent != self._parent:
+            self.close()
+            self._parent_fd = os.open(parent or ".", _DIR_FLAGS)
+            self._parent = parent
+        return self._parent_fd
+
+    def create(self, directory: str) -> bool:
+        """
+        Creates directory/__init__.py with mode 0o644. Returns False if
+        the file already exists.
+        """
+        if os.open in os.supports_dir_fd:
+            parent, name = os.path.split(os.fspath(directory))
+            dir_fd = self._open_parent(parent)
+            target = os.path.join(name, "__init__.py") if name else "__init__.py"
+        else:
+            dir_fd = None
+            target = os.path.join(directory, "__init__.py")
+
+        if self.throttled:
+            throttle.write()
+        try:
+            fd = os.open(target, _CREATE_FLAGS, INIT_MODE, dir_fd=dir_fd)
+        except FileExistsError:
+            return False
+        try:
+            view = memoryview(self.data)
+            while view:
+                view = view[os.write(fd, view) :]
+            if hasattr(os, "fchmod"):
+                # The creation mode went through the umask; the file is
+                # always 0o644, as before, without another path lookup
+                os.fchmod(fd, INIT_MODE)
+        finally:
+            os.close(fd)
+        return True
+
+    def close(self) -> None:
+        if self._parent_fd is not None:
+            os.close(self._parent_fd)
+        self._parent = self._parent_fd = None
+
+    def __enter__(self) -> "InitWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_atomic(path: Union[str, Path], data: Union[str, bytes]) -> None:
+    """
+    Replaces path with data in one step, so a reader never sees a
+    half-written file. Text is written as UTF-8. The temp file is unique
+    per process and thread, and is removed again if the write fails.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_init(init_file: Path, init_content: str) -> bool:
+    """
+    Writes a new __init__.py with the given content and 0o644 permissions.
+    Returns False, writing nothing, if it already exists.
+    """
+    with InitWriter(init_content) as writer:
+        return writer.create(os.path.dirname(init_file))
@@ -11,10 +11,48 @@ from pathlib import Path
 # and configured. pyinitgen has it in dev dependencies.
 
 @pytest.fixture(autouse=True)
-def clean_environment(monkeypatch):
+def clean_environment(monkeypatch, tmp_path_factory):
     """
     Ensure environment variables are clean before each test.
     """
+    # --cache indexes go to the user cache dir; keep them out of ~/.cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.getbasetemp() / "xdg-cache"))
     # Prevent tests from being affected by or affecting the real environment variables
     # especially for banner tests.
     monkeypatch.delenv("CREATE_DUMP_PALETTE", raising=False)
+
+
+@pytest.fixture
+def make_tree(tmp_path):
+    """
+    Builds the small real tree the engine tests share under root
+    (tmp_path by default) and returns root:
+
+        pkg/__init__.py
+        pkg/sub/mod.py
+        pkg/build/              excluded
+        pkg/node_modules/dep/   excluded
+        lib/
+
+    A scan lists 4 directories, prunes 2 and finds 3 missing __init__.py.
+    fanout and depth add a wide/ grid of plain directories below root, for
+    tests that need many directories in flight.
+    """
+
+    def make(root=None, fanout=0, depth=0):
+        root = tmp_path if root is None else root
+        for path in ("pkg/sub", "pkg/build", "pkg/node_modules/dep", "lib"):
+            (root / path).mkdir(parents=True)
+        (root / "pkg" / "__init__.py").touch()
+        (root / "pkg" / "sub" / "mod.py").touch()
+
+        paths = [root / "wide"] if fanout else []
+        for path in paths:
+            path.mkdir()
+        for _ in range(depth):
+            paths = [path / f"d{i}" for path in paths for i in range(fanout)]
+            for path in paths:
+                path.mkdir()
+        return root
+
+    return make
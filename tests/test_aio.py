@@ -0,0 +1,160 @@
+# tests/test_aio.py
+
+import asyncio
+
+import pytest
+from pyinitgen import throttle
+from pyinitgen.aio import AdaptiveLimiter, LatencyFS, LocalFS, iter_async_events
+from pyinitgen.cli import create_inits, main
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.events import Created, Done, Error, Missing, Scanned, Synced, iter_events
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.throttle import IOBudget
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+
+def _summary(events):
+    return (
+        sorted(e.path for e in events if isinstance(e, Scanned)),
+        sorted(e.path for e in events if isinstance(e, Missing)),
+        sorted(e.path for e in events if isinstance(e, Created)),
+        events[-1],
+    )
+
+
+def test_async_engine_matches_threads(tmp_path, make_tree):
+    make_tree(tmp_path / "a", fanout=3, depth=3)
+    make_tree(tmp_path / "b", fanout=3, depth=3)
+
+    threaded = _summary(list(iter_events(tmp_path / "a", jobs=4)))
+    asynced = _summary(list(iter_events(tmp_path / "b", engine="async", max_in_flight=8)))
+
+    rebase = lambda paths: [p.replace(str(tmp_path / "a"), str(tmp_path / "b")) for p in paths]
+    assert asynced[:3] == tuple(rebase(paths) for paths in threaded[:3])
+    assert asynced[3] == threaded[3] == Done(44, 43, 43)
+    assert (tmp_path / "b" / "wide" / "d2" / "d2" / "d2" / "__init__.py").exists()
+
+
+def test_latency_fs_overlaps_calls(make_tree):
+    tree = make_tree(fanout=4, depth=2)
+    fs = LatencyFS(latency=0.01, jitter=0.002)
+
+    events = list(iter_async_events(tree, EXCLUDES, fs=fs, max_in_flight=32))
+
+    assert events[-1] == Done(25, 24, 24)
+    assert fs.calls == 49
+    # A serial walk never has more than one call in flight
+    assert fs.peak_in_flight > 4
+
+
+def test_limiter_backs_off_under_congestion():
+    # A server that keeps up with 3 calls in flight and queues the rest
+    def latency(in_flight):
+        return 0.002 + max(0, in_flight - 3) * 0.01
+
+    async def run():
+        limiter = AdaptiveLimiter(initial=16, maximum=32)
+        # The first listing runs alone, so the uncongested latency is seen
+        await limiter.acquire()
+        limiter.release(latency(1))
+        limits = []
+        for _ in range(200):
+            await limiter.acquire()
+            limiter.release(latency(int(limiter.limit)))
+            limits.append(limiter.limit)
+        return limiter, limits
+
+    limiter, limits = asyncio.run(run())
+    assert not limiter.slow_start
+    assert 3 <= min(limits[-50:]) and max(limits[-50:]) < 5
+    assert limiter.peak_limit == 17
+
+
+def test_budget_waits_are_not_timed_as_latency(make_tree, mocker):
+    tree = make_tree()
+    clock = lambda: 0.0
+    budget = IOBudget(listings=10, burst=1, clock=clock)
+    limiter = AdaptiveLimiter()
+    release = mocker.spy(limiter, "release")
+
+    with throttle.throttled(budget):
+        events = list(iter_async_events(tree, EXCLUDES, check=True, limiter=limiter))
+
+    assert events[-1].scanned == 4
+    # The frozen clock makes the later listings wait 0.1s, 0.2s and 0.3s
+    assert budget.waits == 3
+    assert budget.throttled_seconds == pytest.approx(0.6)
+    assert max(latency for (latency,), _ in release.call_args_list) < 0.1
+
+
+def test_limiter_bounds():
+    async def run():
+        limiter = AdaptiveLimiter(initial=2, minimum=1, maximum=3)
+        for _ in range(50):
+            await limiter.acquire()
+            limiter.release(0.001)
+        assert limiter.limit == 3
+        for _ in range(50):
+            await limiter.acquire()
+            limiter.release(1.0)
+        assert limiter.limit == 1
+
+        # A full limiter parks callers until a slot frees up
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        limiter.release(0.001)
+        await waiter
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_async_errors(tmp_path, mocker):
+    (tmp_path / "ok").mkdir()
+    (tmp_path / "unreadable").mkdir()
+    real_scan = LocalFS.scan
+
+    def scan(self, path, rel, excludes):
+        if rel == "unreadable":
+            raise PermissionError("denied")
+        return real_scan(self, path, rel, excludes)
+
+    mocker.patch.object(LocalFS, "scan", scan)
+    mocker.patch.object(LocalFS, "create", side_effect=OSError("read-only"))
+
+    events = list(iter_async_events(tmp_path, EXCLUDES))
+
+    assert sorted(e.path for e in events if isinstance(e, Scanned)) == [str(tmp_path), str(tmp_path / "ok")]
+    errors = [e for e in events if isinstance(e, Error)]
+    assert len(errors) == 2
+    assert "read-only" in errors[0].message
+    assert events[-1] == Done(2, 2, 0)
+
+
+def test_async_stop_early(make_tree):
+    tree = make_tree(fanout=3, depth=3)
+    events = iter_events(tree, engine="async")
+    for event in events:
+        if isinstance(event, Missing):
+            break
+    events.close()
+    # Creations queued after the stop never happen
+    assert len(list(tree.rglob("__init__.py"))) < 44
+
+
+def test_create_inits_async_durable(make_tree):
+    tree = make_tree()
+    assert create_inits(tree, engine="async", durable=True) == (0, 3, 4)
+    events = list(iter_events(tree / "pkg", engine="async", durable=True))
+    assert not any(isinstance(e, Synced) for e in events)
+
+
+@pytest.mark.parametrize("extra", [["--cache"], ["--processes", "2"], ["--only-python"], ["--max-in-flight", "0"]])
+def test_main_async_conflicts(mocker, extra):
+    mocker.patch("sys.argv", ["pyinitgen", "--engine", "async", *extra])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
@@ -0,0 +1,108 @@
+# tests/test_archives.py
+
+import io
+import logging
+import tarfile
+import zipfile
+import pytest
+from pyinitgen.archives import ArchiveError, archive_dirs, check_archive, check_archives, iter_members
+from pyinitgen.cli import main
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.matcher import ExcludeMatcher
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+# Archives are built on the real filesystem with zipfile/tarfile
+
+
+@pytest.fixture
+def wheel(tmp_path):
+    path = tmp_path / "pkg-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("pkg/__init__.py", "")
+        zf.writestr("pkg/sub/mod.py", "")
+        zf.writestr("pkg/sub/deep/__init__.py", "")
+        zf.writestr("pkg/node_modules/x.js", "")
+        zf.writestr("pkg-1.0.dist-info/METADATA", "")
+    return path
+
+
+@pytest.fixture
+def sdist(tmp_path):
+    path = tmp_path / "pkg-1.0.tar.gz"
+    with tarfile.open(path, "w:gz") as tar:
+        for name in ("pkg-1.0/setup.py", "pkg-1.0/src/pkg/__init__.py", "pkg-1.0/src/pkg/util/x.py", "pkg-1.0/pkg.egg-info/PKG-INFO"):
+            info = tarfile.TarInfo(name)
+            tar.addfile(info, io.BytesIO(b""))
+        info = tarfile.TarInfo("pkg-1.0/src/pkg/empty")
+        info.type = tarfile.DIRTYPE
+        tar.addfile(info)
+    return path
+
+
+def test_iter_members_zip(wheel):
+    members = dict(iter_members(str(wheel)))
+    assert members["pkg/__init__.py"] is False
+
+
+def test_iter_members_tar_is_streamed(sdist, mocker):
+    mocker.patch("pyinitgen.archives._TAR_FLUSH_EVERY", 1)
+    members = list(iter_members(str(sdist)))
+    assert ("pkg-1.0/src/pkg/empty", True) in members
+    assert len(members) == 5
+
+
+def test_iter_members_rejects_other_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not an archive")
+    with pytest.raises(ArchiveError):
+        list(iter_members(str(path)))
+
+
+def test_archive_dirs_strips_sdist_root():
+    dirs, init_dirs = archive_dirs([("proj-2.0/src/pkg/__init__.py", False), ("proj-2.0/README", False)])
+    assert dirs == {("src",), ("src", "pkg")}
+    assert init_dirs == {("src", "pkg")}
+
+
+def test_archive_dirs_keeps_lone_package():
+    dirs, _ = archive_dirs([("pkg/mod.py", False), ("../evil.py", False), ("/abs/x.py", False)])
+    assert dirs == {("pkg",), ("abs",)}
+
+
+def test_check_wheel(wheel):
+    scanned, missing = check_archive(str(wheel), EXCLUDES)
+    # dist-info and node_modules are skipped, the archive root is not a package
+    assert scanned == 3
+    assert missing == [f"{wheel}!/pkg/sub"]
+
+
+def test_check_sdist(sdist):
+    scanned, missing = check_archive(str(sdist), EXCLUDES)
+    assert missing == [f"{sdist}!/src", f"{sdist}!/src/pkg/empty", f"{sdist}!/src/pkg/util"]
+    assert scanned == 4
+
+
+def test_check_archives_exit_codes(wheel, tmp_path, caplog):
+    good = tmp_path / "good.zip"
+    with zipfile.ZipFile(good, "w") as zf:
+        zf.writestr("pkg/__init__.py", "")
+
+    with caplog.at_level(logging.INFO):
+        assert check_archives([str(good)], EXCLUDES) == 0
+    assert "all 1 directories" in caplog.text
+
+    assert check_archives([str(good), str(wheel)], EXCLUDES) == 1
+    assert f"Missing __init__.py in {wheel}!/pkg/sub" in caplog.text
+
+    assert check_archives([str(tmp_path / "missing.whl")], EXCLUDES) == 1
+    assert "Failed to read" in caplog.text
+
+
+def test_main_archive(wheel, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--archive", str(wheel), "--base-dir", str(wheel.parent)])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 1
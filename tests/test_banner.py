@@ -1,7 +1,18 @@
 # tests/test_banner.py
 
 import pytest
-from pyinitgen.banner import lerp, blend, print_logo
+from pyinitgen.banner import (
+    FIXED_PALETTES,
+    LOGO,
+    blend,
+    choose_palette,
+    color_depth,
+    lerp,
+    print_logo,
+    procedural_palette,
+    render_logo,
+    row_runs,
+)
 
 # Use the 'mocker' fixture from pytest-mock
 
@@ -36,66 +47,129 @@ def test_blend_edge_cases():
     assert result.startswith("#")
     assert result != "#ffffff"
 
-def test_print_logo(mocker):
-    # Mock 'console' object in pyinitgen.banner
-    mock_console = mocker.patch("pyinitgen.banner.console")
+@pytest.fixture
+def wide_terminal(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("COLUMNS", "120")
+    monkeypatch.setenv("COLORTERM", "truecolor")
+    monkeypatch.delenv("NO_COLOR", raising=False)
+    return tmp_path / "pyinitgen"
 
-    print_logo()
-
-    assert mock_console.print.called
-    assert mock_console.print.call_count > 1
 
-    # Verify the footer by checking the last call
-    # call_args_list returns a list of Call objects (which are tuples)
-    last_call = mock_console.print.call_args_list[-1]
-    # args is the first element of the Call object
-    last_call_args = last_call[0]
-    expected_footer = "[dim]🐍 Automatically generate __init__.py files for Python packages.[/dim]\\n"
-    assert last_call_args[0] == expected_footer
+def test_print_logo_caches_rendering(wide_terminal, mocker, capsys):
+    mocker.patch("pyinitgen.banner.choose_palette", return_value=list(FIXED_PALETTES[0]))
 
-def test_print_logo_procedural_palette(mocker, monkeypatch):
-    """
-    Test that print_logo can generate a procedural palette
-    when no fixed palette is specified.
-    """
-    mock_console = mocker.patch("pyinitgen.banner.console")
-    # Ensure env var is unset (though conftest handles this, being explicit is safe)
-    monkeypatch.delenv("CREATE_DUMP_PALETTE", raising=False)
+    print_logo()
+    first = capsys.readouterr().out
+    assert "\x1b[38;2;" in first
+    assert "Automatically generate __init__.py files" in first
+    assert len(list(wide_terminal.glob("banner-*.ansi"))) == 1
 
+    # Later runs write the cached text without rendering again
+    render = mocker.patch("pyinitgen.banner.render_logo")
     print_logo()
-    assert mock_console.print.called
-    assert mock_console.print.call_count > 1
+    assert capsys.readouterr().out == first
+    render.assert_not_called()
 
-def test_print_logo_with_fixed_palette(mocker, monkeypatch):
-    """
-    Test that print_logo uses a fixed palette when the env var is set.
-    """
-    mock_console = mocker.patch("pyinitgen.banner.console")
-    monkeypatch.setenv("CREATE_DUMP_PALETTE", "0")
 
+def test_print_logo_unwritable_cache(wide_terminal, mocker, capsys):
+    wide_terminal.parent.rmdir()
+    wide_terminal.parent.write_text("not a directory")
     print_logo()
-    assert mock_console.print.called
-    assert mock_console.print.call_count > 1
+    assert "Automatically generate __init__.py files" in capsys.readouterr().out
 
-def test_print_logo_with_invalid_palette_fallback(mocker, monkeypatch):
-    """
-    Test that print_logo falls back to procedural generation
-    if an invalid palette index is provided.
-    """
-    mock_console = mocker.patch("pyinitgen.banner.console")
-    monkeypatch.setenv("CREATE_DUMP_PALETTE", "invalid")
 
+def test_print_logo_narrow_terminal(wide_terminal, monkeypatch, capsys):
+    monkeypatch.setenv("COLUMNS", "40")
     print_logo()
-    assert mock_console.print.called
-    assert mock_console.print.call_count > 1
+    assert "Automatically" in capsys.readouterr().out
+    assert not wide_terminal.exists()
 
-def test_print_logo_with_large_invalid_palette_fallback(mocker, monkeypatch):
+
+def test_render_logo_without_color():
+    text = render_logo(list(FIXED_PALETTES[1]), None)
+    assert "\x1b[38" not in text
+    assert LOGO[3].rstrip() in text
+
+
+def test_row_runs_share_styles():
+    palette = list(FIXED_PALETTES[2])
+    for i, line in enumerate(LOGO):
+        runs = row_runs(palette, i, line)
+        assert "".join(text for text, _ in runs) == line
+        assert all(style.startswith("#") for _, style in runs)
+    # Blanks never start a run of their own
+    assert len(row_runs(palette, 4, LOGO[4])) < len(LOGO[4].replace(" ", ""))
+
+
+def test_procedural_palette_is_deterministic():
+    palette = procedural_palette(7)
+    assert palette == procedural_palette(7)
+    assert len(palette) == 5
+    assert all(0 <= c <= 255 for color in palette for c in color)
+
+
+@pytest.mark.parametrize("env, fixed", [("0", True), ("5", True), ("invalid", False), ("9999", False)])
+def test_choose_palette(monkeypatch, env, fixed):
     """
-    Test fallback for an out-of-range integer palette index.
+    CREATE_DUMP_PALETTE picks a fixed palette; bad values fall back to
+    procedural generation.
     """
-    mock_console = mocker.patch("pyinitgen.banner.console")
-    monkeypatch.setenv("CREATE_DUMP_PALETTE", "9999")
-
-    print_logo()
-    assert mock_console.print.called
-    assert mock_console.print.call_count > 1
+    monkeypatch.setenv("CREATE_DUMP_PALETTE", env)
+    palette = choose_palette()
+    assert len(palette) == 5
+    if fixed:
+        assert sorted(palette) == sorted(FIXED_PALETTES[int(env)])
+
+
+@pytest.mark.parametrize(
+    "env, depth",
+    [
+        ({"NO_COLOR": "1", "COLORTERM": "truecolor"}, None),
+        ({"COLORTERM": "24bit"}, "truecolor"),
+        ({"TERM": "xterm-256color"}, "256"),
+        ({"TERM": "xterm"}, "standard"),
+    ],
+)
+def test_color_depth(monkeypatch, env, depth):
+    for name in ("NO_COLOR", "COLORTERM", "TERM"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    assert color_depth() == depth
+
+
+@pytest.mark.parametrize(
+    "argv, env, tty, shown",
+    [
+        ([], None, True, True),
+        ([], None, False, False),
+        (["--no-banner"], None, True, False),
+        ([], "1", True, False),
+    ],
+)
+def test_show_banner(mocker, monkeypatch, argv, env, tty, shown):
+    from pyinitgen.cli import NO_BANNER_ENV, show_banner
+
+    monkeypatch.delenv(NO_BANNER_ENV, raising=False)
+    if env:
+        monkeypatch.setenv(NO_BANNER_ENV, env)
+    mocker.patch("sys.stdout.isatty", return_value=tty)
+    assert show_banner(argv) is shown
+
+
+def test_main_skips_banner_without_tty(tmp_path, mocker):
+    from pyinitgen.cli import main
+
+    logo = mocker.patch("pyinitgen.banner.print_logo")
+    mocker.patch("sys.stdout.isatty", return_value=False)
+    mocker.patch("sys.argv", ["pyinitgen", "--check", "--base-dir", str(tmp_path)])
+    with pytest.raises(SystemExit):
+        main()
+    logo.assert_not_called()
+
+    mocker.patch("sys.argv", ["pyinitgen", "--check", "--no-banner", "--base-dir", str(tmp_path)])
+    mocker.patch("sys.stdout.isatty", return_value=True)
+    with pytest.raises(SystemExit):
+        main()
+    logo.assert_not_called()
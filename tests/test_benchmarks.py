@@ -0,0 +1,63 @@
+# tests/test_benchmarks.py
+
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+@pytest.fixture
+def bench(monkeypatch):
+    monkeypatch.syspath_prepend(str(BENCHMARKS_DIR))
+    import bench_scan
+    import treegen
+
+    return treegen, bench_scan
+
+
+def _listing(root):
+    return sorted(
+        (os.path.relpath(dirpath, root), sorted(dirnames), sorted(filenames))
+        for dirpath, dirnames, filenames in os.walk(root)
+    )
+
+
+def test_generate_tree_is_deterministic(tmp_path, bench):
+    treegen, _ = bench
+    params = dict(depth=3, fanout=3, files_per_dir=1.5, excluded_ratio=0.3, init_ratio=0.5, seed=7)
+
+    first = treegen.generate_tree(str(tmp_path / "a"), **params)
+    second = treegen.generate_tree(str(tmp_path / "b"), **params)
+
+    assert first == second
+    assert first.dirs == 1 + 3 + 9 + 27
+    assert 0 < first.excluded_dirs < first.dirs
+    assert 0 < first.inits < first.dirs
+    assert _listing(tmp_path / "a") == _listing(tmp_path / "b")
+
+
+def test_run_mode_reports_measurements(tmp_path, bench):
+    treegen, bench_scan = bench
+    stats = treegen.generate_tree(str(tmp_path / "tree"), depth=2, fanout=3, excluded_ratio=0.0, init_ratio=0.0)
+
+    try:
+        result = bench_scan.run_mode(str(tmp_path / "tree"), "check", jobs=1)
+    finally:
+        # run_mode silences logging for its whole (child) process
+        logging.disable(logging.NOTSET)
+
+    assert result["scanned"] == stats.dirs
+    assert result["exit_code"] == 1
+    assert result["wall_s"] > 0
+    assert set(result) >= {"dirs_per_s", "peak_rss_kb", "pyinitgen_version"}
+
+
+def test_startup_imports_nothing_lazy(monkeypatch, capsys):
+    monkeypatch.syspath_prepend(str(BENCHMARKS_DIR))
+    import bench_startup
+
+    assert bench_startup.main(["--repeat", "1", "--budget-ms", "100000"]) == 0
+    assert '"lazy_modules_loaded": []' in capsys.readouterr().out
@@ -0,0 +1,94 @@
+# tests/test_changed_paths.py
+
+import io
+from pathlib import Path
+import pytest
+from pyinitgen.cli import create_inits, main, read_paths
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.walker import walk, walk_changed
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+
+@pytest.fixture
+def repo(fs):
+    fs.create_dir("/repo/src/pkg/sub")
+    fs.create_dir("/repo/src/other")
+    fs.create_dir("/repo/docs/api")
+    fs.create_dir("/elsewhere")
+    fs.create_file("/repo/src/__init__.py")
+    fs.create_file("/repo/src/pkg/sub/mod.py")
+    fs.create_file("/repo/docs/api/conf.py")
+    fs.create_symlink("/repo/src/linked", "/repo/src/pkg")
+    return Path("/repo")
+
+
+def test_walk_changed_visits_only_ancestors(repo):
+    result = list(walk_changed(repo, ["/repo/src/pkg/sub/mod.py"], EXCLUDES))
+    assert result == [
+        ("/repo", False),
+        ("/repo/src", True),
+        ("/repo/src/pkg", False),
+        ("/repo/src/pkg/sub", False),
+    ]
+
+
+def test_walk_changed_agrees_with_full_walk(repo):
+    full = dict(walk(repo, EXCLUDES))
+    changed = dict(walk_changed(repo, ["/repo/src/pkg/sub", "/repo/src/other/x.py"], EXCLUDES))
+    assert changed.items() <= full.items()
+
+
+def test_walk_changed_applies_exclusions(repo):
+    # docs is excluded, the symlink is never walked, deleted dirs vanish
+    paths = [
+        "/repo/docs/api/conf.py",
+        "/repo/src/linked/sub/mod.py",
+        "/repo/src/gone/deleted.py",
+        "/elsewhere/file.py",
+    ]
+    result = [root for root, _ in walk_changed(repo, paths, EXCLUDES)]
+    assert result == ["/repo", "/repo/src"]
+
+
+def test_walk_changed_relative_paths(repo, fs):
+    fs.cwd = "/repo"
+    result = [root for root, _ in walk_changed(Path("."), ["src/other/new.py"], EXCLUDES)]
+    assert result == [".", "./src", "./src/other"]
+
+
+def test_read_paths():
+    assert read_paths(io.StringIO("a.py\n\nb/c.py\n")) == ["a.py", "b/c.py"]
+    assert read_paths(io.StringIO("a b.py\0c\nd.py\0"), null_separated=True) == ["a b.py", "c\nd.py"]
+
+
+def test_create_inits_changed(repo):
+    exit_code, created, scanned = create_inits(repo, changed=["/repo/src/pkg/sub/mod.py"])
+
+    assert (exit_code, created, scanned) == (0, 3, 4)
+    assert (repo / "src" / "pkg" / "sub" / "__init__.py").exists()
+    assert not (repo / "src" / "other" / "__init__.py").exists()
+
+
+def test_main_changed_from_stdin(repo, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", "/repo", "--check", "--changed", "-z"])
+    mocker.patch("sys.stdin", io.StringIO("src/pkg/mod.py\0src/other/x.py\0"))
+    mock_create = mocker.patch("pyinitgen.cli.create_inits")
+    mock_create.return_value = (0, 0, 0)
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert mock_create.call_args.kwargs["changed"] == ["src/pkg/mod.py", "src/other/x.py"]
+
+
+def test_main_changed_arguments(repo, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", "/repo", "--changed", "a.py", "b.py"])
+    mock_create = mocker.patch("pyinitgen.cli.create_inits")
+    mock_create.return_value = (0, 0, 0)
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert mock_create.call_args.kwargs["changed"] == ["a.py", "b.py"]
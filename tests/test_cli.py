@@ -110,7 +110,7 @@ def test_exclude_dirs_content():
     expected_excludes = {
         ".git", ".hg", ".svn", "__pycache__", ".venv", "venv", "env",
         ".mypy_cache", ".pytest_cache", ".ruff_cache", "node_modules",
-        ".vscode", ".idea", ".DS_Store", "build", "dist", "eggs", ".egg-info",
+        ".vscode", ".idea", ".DS_Store", "build", "dist", "eggs", "*.egg-info",
         "docs", "site", ".github", "htmlcov", ".tox", ".nox",
         "pip-wheel-metadata", "tmp", "temp", "data", "assets", "static", "media"
     }
@@ -4,6 +4,7 @@ import pytest
 import logging
 from pathlib import Path
 from pyinitgen.cli import main, create_inits, load_ignore_patterns
+from pyinitgen.walker import default_jobs
 
 @pytest.fixture
 def temp_dir(fs):
@@ -49,7 +50,23 @@ def test_main_arguments(temp_dir, mocker):
         verbose=False,
         use_emoji=False,
         init_content="",
-        check=False
+        check=False,
+        jobs=default_jobs(),
+        processes=0,
+        cache=False,
+        changed=None,
+        source="walk",
+        gitignore=False,
+        only_python=False,
+        stats_json=None,
+        stats_openmetrics=None,
+        durable=False,
+        engine="threads",
+        max_in_flight=64,
+        io_budget=None,
+        low_memory=False,
+        follow_symlinks=False,
+        one_file_system=False,
     )
 
 def test_main_verbose(temp_dir, mocker):
@@ -67,7 +84,23 @@ def test_main_verbose(temp_dir, mocker):
         verbose=True,
         use_emoji=True,
         init_content="",
-        check=False
+        check=False,
+        jobs=default_jobs(),
+        processes=0,
+        cache=False,
+        changed=None,
+        source="walk",
+        gitignore=False,
+        only_python=False,
+        stats_json=None,
+        stats_openmetrics=None,
+        durable=False,
+        engine="threads",
+        max_in_flight=64,
+        io_budget=None,
+        low_memory=False,
+        follow_symlinks=False,
+        one_file_system=False,
     )
 
 def test_main_custom_content(temp_dir, mocker):
@@ -86,15 +119,31 @@ def test_main_custom_content(temp_dir, mocker):
         verbose=False,
         use_emoji=True,
         init_content=content,
-        check=False
+        check=False,
+        jobs=default_jobs(),
+        processes=0,
+        cache=False,
+        changed=None,
+        source="walk",
+        gitignore=False,
+        only_python=False,
+        stats_json=None,
+        stats_openmetrics=None,
+        durable=False,
+        engine="threads",
+        max_in_flight=64,
+        io_budget=None,
+        low_memory=False,
+        follow_symlinks=False,
+        one_file_system=False,
     )
 
 def test_create_inits_error_handling(temp_dir, caplog, mocker, fs):
     # Simulate an error when writing a file
     fs.create_dir(temp_dir / "subdir")
 
-    # Mock open to raise PermissionError
-    mocker.patch("builtins.open", side_effect=PermissionError("Boom"))
+    # Make creating the file raise PermissionError
+    mocker.patch("pyinitgen.writer.os.open", side_effect=PermissionError("Boom"))
 
     exit_code, created, scanned = create_inits(temp_dir)
 
@@ -128,3 +177,51 @@ def test_main_version(mocker):
         main()
 
     assert e.value.code == 0
+
+def test_main_jobs(temp_dir, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(temp_dir), "--jobs", "3"])
+    mock_create = mocker.patch("pyinitgen.cli.create_inits")
+    mock_create.return_value = (0, 0, 0)
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 0
+    assert mock_create.call_args.kwargs["jobs"] == 3
+
+def test_main_invalid_jobs(temp_dir, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(temp_dir), "--jobs", "0"])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 2
+
+def test_main_processes(temp_dir, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(temp_dir), "--processes", "4"])
+    mock_create = mocker.patch("pyinitgen.cli.create_inits")
+    mock_create.return_value = (0, 0, 0)
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert mock_create.call_args.kwargs["processes"] == 4
+
+def test_main_low_memory(temp_dir, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(temp_dir), "--low-memory"])
+    mock_create = mocker.patch("pyinitgen.cli.create_inits")
+    mock_create.return_value = (0, 0, 0)
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert mock_create.call_args.kwargs["low_memory"] is True
+
+@pytest.mark.parametrize("extra", [["--jobs", "4"], ["--processes", "2"], ["--engine", "async"], ["--cache"]])
+def test_main_low_memory_conflicts(temp_dir, mocker, extra):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(temp_dir), "--low-memory", *extra])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 2
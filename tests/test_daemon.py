@@ -0,0 +1,275 @@
+# tests/test_daemon.py
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import pytest
+import pyinitgen
+from pyinitgen import client
+from pyinitgen.cli import main
+from pyinitgen.client import query_missing, request, socket_path
+from pyinitgen.daemon import Daemon, IndexModel, TreeModel, scan_missing
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.matcher import ExcludeMatcher
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+# The daemon needs real sockets and inotify, so these tests use tmp_path
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    base = tmp_path / "project"
+    (base / "pkg" / "sub").mkdir(parents=True)
+    (base / "node_modules" / "lib").mkdir(parents=True)
+    (base / "__init__.py").touch()
+    (base / "pkg" / "__init__.py").touch()
+    return base
+
+
+def _start(daemon):
+    thread = threading.Thread(target=daemon.serve)
+    thread.start()
+    deadline = time.monotonic() + 3
+    while not os.path.exists(daemon.path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return thread
+
+
+@pytest.fixture
+def running_daemon(tree):
+    daemon = Daemon(str(tree), idle_timeout=10)
+    thread = _start(daemon)
+    yield daemon
+    request(str(tree), {"cmd": "stop"})
+    thread.join()
+
+
+def test_socket_path_is_per_base_dir(tree):
+    assert socket_path("/a") != socket_path("/b")
+    assert socket_path("/a").startswith(str(tree.parent))
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_tree_model_follows_changes(tree):
+    model = TreeModel(str(tree), EXCLUDES)
+    model.add_tree(str(tree))
+    assert model.missing_under(str(tree)) == [str(tree / "pkg" / "sub")]
+
+    (tree / "pkg" / "sub" / "__init__.py").touch()
+    (tree / "new" / "deep").mkdir(parents=True)
+    (tree / "pkg" / "__init__.py").unlink()
+    assert model.missing_under(str(tree)) == [
+        str(tree / "new"),
+        str(tree / "new" / "deep"),
+        str(tree / "pkg"),
+    ]
+    assert model.missing_under(str(tree / "new" / "deep")) == [str(tree / "new" / "deep")]
+
+    (tree / "new" / "deep").rmdir()
+    (tree / "new").rename(tree.parent / "moved_out")
+    assert model.missing_under(str(tree)) == [str(tree / "pkg")]
+    model.close()
+
+
+def test_index_model_revalidates_by_mtime(tree):
+    model = IndexModel(str(tree), EXCLUDES)
+    assert model.missing_under(str(tree)) == [str(tree / "pkg" / "sub")]
+
+    (tree / "other").mkdir()
+    assert model.missing_under(str(tree)) == [str(tree / "other"), str(tree / "pkg" / "sub")]
+    assert model.missing_under(str(tree / "pkg")) == [str(tree / "pkg" / "sub")]
+
+
+def test_daemon_answers_queries(running_daemon, tree):
+    assert query_missing(str(tree), str(tree)) == [str(tree / "pkg" / "sub")]
+
+    (tree / "pkg" / "sub" / "__init__.py").touch()
+    assert query_missing(str(tree), str(tree)) == []
+    assert request(str(tree), {"cmd": "bogus"}) == {"error": "Unknown command 'bogus'"}
+
+
+def test_daemon_rejects_malformed_requests(running_daemon, tree):
+    assert "error" in request(str(tree), [])
+    assert "error" in request(str(tree), "x")
+    assert "error" in request(str(tree), {"path": 5})
+    # Still serving
+    assert query_missing(str(tree), str(tree)) == [str(tree / "pkg" / "sub")]
+
+
+def test_query_falls_back_on_error_replies(running_daemon, tree):
+    assert request(str(tree), {"cmd": "missing", "path": 5}) == {"error": "Invalid path 5"}
+    assert query_missing(str(tree), 5) is None
+
+
+@pytest.mark.parametrize("reply", [None, b"", b"not json", b"[1]"])
+def test_query_falls_back_when_the_daemon_does_not_answer(tree, reply):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path(str(tree)))
+    server.listen(1)
+    done = threading.Event()
+
+    def serve():
+        conn, _ = server.accept()
+        conn.recv(65536)
+        if reply is None:
+            # Busy: never answers
+            done.wait(5)
+        else:
+            conn.sendall(reply)
+        conn.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    try:
+        assert request(str(tree), {"cmd": "missing", "path": str(tree)}, timeout=0.2) is None
+    finally:
+        done.set()
+        thread.join()
+        server.close()
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_daemon_reloads_changed_config(tree, mocker, inotify):
+    if not inotify:
+        mocker.patch.object(TreeModel, "__init__", side_effect=OSError("no inotify"))
+    elif not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux only")
+    daemon = Daemon(str(tree), idle_timeout=10)
+    thread = _start(daemon)
+
+    try:
+        (tree / "svc" / "gen").mkdir(parents=True)
+        assert query_missing(str(tree), str(tree / "svc")) == [str(tree / "svc"), str(tree / "svc" / "gen")]
+
+        (tree / "svc" / ".pyinitgenignore").write_text("gen\n")
+        assert query_missing(str(tree), str(tree / "svc")) == [str(tree / "svc")]
+
+        (tree / ".pyinitgenignore").write_text("svc\n")
+        assert query_missing(str(tree), str(tree)) == [str(tree / "pkg" / "sub")]
+        # Without watches, nested ignore files are read on every query anyway
+        assert daemon.reloads == (2 if inotify else 1)
+    finally:
+        request(str(tree), {"cmd": "stop"})
+        thread.join()
+
+
+def test_client_ignores_sockets_of_other_users(running_daemon, tree, mocker):
+    mocker.patch("pyinitgen.client._uid", return_value=os.getuid() + 1)
+    mocker.patch("pyinitgen.client.socket_path", return_value=running_daemon.path)
+    assert request(str(tree), {"cmd": "missing"}) is None
+
+
+def test_socket_dir_must_be_private(tree, monkeypatch):
+    # Socket paths are limited to about 100 bytes, too few for tmp_path
+    temp_dir = tempfile.mkdtemp(prefix="pyi")
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    monkeypatch.setattr(tempfile, "tempdir", temp_dir)
+    daemon = Daemon(str(tree))
+
+    sock = daemon._bind()
+    sock.close()
+    directory = os.path.dirname(daemon.path)
+    assert directory == os.path.join(temp_dir, f"pyinitgen-{os.getuid()}")
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+    os.unlink(daemon.path)
+    os.chmod(directory, 0o755)
+    try:
+        with pytest.raises(RuntimeError, match="private"):
+            daemon._bind()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_query_does_not_load_the_scan_modules(running_daemon, tree):
+    code = (
+        "import sys\n"
+        "from pyinitgen.cli import main\n"
+        f"sys.argv = ['pyinitgen', 'query', '--base-dir', {str(tree)!r}]\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in ('pyinitgen.events', 'pyinitgen.walker', 'tomllib') if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pyinitgen.__file__)))
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert "Missing __init__.py" in result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_second_daemon_refuses_to_start(running_daemon, tree):
+    with pytest.raises(RuntimeError):
+        Daemon(str(tree))._bind()
+
+
+def test_daemon_exits_when_idle(tree):
+    # A stale socket from a crashed daemon is replaced
+    stale = socket_path(str(tree))
+    open(stale, "w").close()
+
+    daemon = Daemon(str(tree), idle_timeout=0.05)
+    daemon.serve()
+
+    assert not os.path.exists(daemon.path)
+
+
+def test_daemon_falls_back_without_inotify(tree, mocker, caplog):
+    mocker.patch("pyinitgen.daemon.TreeModel", side_effect=OSError("no inotify"))
+
+    daemon = Daemon(str(tree))
+
+    assert isinstance(daemon.model, IndexModel)
+    assert "revalidating by mtime" in caplog.text
+
+
+def test_query_without_daemon(tree):
+    assert query_missing(str(tree), str(tree)) is None
+    assert scan_missing(str(tree), str(tree / "pkg")) == [str(tree / "pkg" / "sub")]
+    assert scan_missing(str(tree), str(tree / "node_modules" / "lib")) == []
+    assert scan_missing(str(tree), str(tree.parent)) == []
+
+
+def test_query_command(running_daemon, tree, mocker, capsys):
+    mocker.patch("sys.argv", ["pyinitgen", "query", "--base-dir", str(tree)])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 1
+    assert f"Missing __init__.py in {tree / 'pkg' / 'sub'}" in capsys.readouterr().err
+
+
+def test_query_command_spawns_daemon(tree, mocker, capsys):
+    spawn = mocker.patch.object(client, "spawn_daemon")
+
+    exit_code = client.main(["--base-dir", str(tree), "--spawn", str(tree / "pkg")])
+
+    assert exit_code == 1
+    spawn.assert_called_once_with(str(tree))
+    assert "sub" in capsys.readouterr().err
+
+
+def test_daemon_command(tree, mocker):
+    serve = mocker.patch.object(Daemon, "serve")
+    mocker.patch("sys.argv", ["pyinitgen", "daemon", "--base-dir", str(tree), "-q"])
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 0
+    serve.assert_called_once()
+
+
+def test_daemon_command_already_running(tree, mocker):
+    mocker.patch.object(Daemon, "serve", side_effect=RuntimeError("already serving"))
+    from pyinitgen.daemon import main as daemon_main
+
+    assert daemon_main(["--base-dir", str(tree)]) == 1
@@ -0,0 +1,102 @@
+# tests/test_durability.py
+
+import logging
+import os
+
+import pyinitgen.events as events_module
+import pytest
+from pyinitgen import Synced
+from pyinitgen.cli import create_inits, main
+from pyinitgen.durability import SYNC_BATCH, sync_inits
+from pyinitgen.events import Done, Error, iter_events
+
+
+def test_sync_inits_files_then_dirs(tmp_path, mocker):
+    roots = []
+    for i in range(SYNC_BATCH + 3):
+        root = tmp_path / f"pkg{i}"
+        root.mkdir()
+        (root / "__init__.py").touch()
+        roots.append(str(root))
+    fsync = mocker.spy(os, "fsync")
+
+    report = sync_inits(roots, jobs=4)
+
+    assert (report.files, report.dirs, report.errors) == (len(roots), len(roots), [])
+    assert report.seconds >= 0
+    assert fsync.call_count == 2 * len(roots)
+
+
+def test_sync_inits_reports_errors(tmp_path):
+    (tmp_path / "gone").mkdir()
+    report = sync_inits([str(tmp_path / "gone")], jobs=1)
+    # The directory itself still syncs
+    assert len(report.errors) == 1
+    path, message = report.errors[0]
+    assert path == str(tmp_path / "gone" / "__init__.py")
+    assert message.startswith("Failed to sync")
+
+
+def test_iter_events_durable(tmp_path, mocker):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "__init__.py").touch()
+    sync = mocker.spy(events_module, "sync_inits")
+
+    events = list(iter_events(tmp_path, durable=True, jobs=2))
+
+    assert isinstance(events[-2], Synced)
+    assert (events[-2].files, events[-2].dirs) == (2, 2)
+    assert events[-1] == Done(3, 2, 2)
+    sync.assert_called_once_with([str(tmp_path), str(tmp_path / "a" / "b")], 2)
+
+
+def test_iter_events_sync_errors(tmp_path, mocker):
+    (tmp_path / "a").mkdir()
+    mocker.patch("pyinitgen.durability.fsync_path", side_effect=OSError("EIO"))
+    errors = [e for e in iter_events(tmp_path, durable=True) if isinstance(e, Error)]
+    assert len(errors) == 4
+    assert "EIO" in errors[0].message
+
+
+def test_files_created_before_an_error_are_synced(tmp_path, mocker, caplog):
+    caplog.set_level(logging.INFO)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "__init__.py").touch()
+    real_create = events_module.InitWriter.create
+
+    def create(self, root):
+        if root.endswith("b"):
+            raise OSError("read-only")
+        return real_create(self, root)
+
+    mocker.patch.object(events_module.InitWriter, "create", create)
+    sync = mocker.spy(events_module, "sync_inits")
+
+    # create_inits stops at the first error; threaded walks are sorted
+    assert create_inits(tmp_path, durable=True, jobs=2) == (1, 1, 3)
+    sync.assert_called_once_with([str(tmp_path / "a")], 2)
+    assert "Failed to create" in caplog.text
+    assert "Synced 1 files and 1 directories to disk before stopping" in caplog.text
+
+
+def test_nothing_to_sync(tmp_path, mocker):
+    (tmp_path / "__init__.py").touch()
+    sync = mocker.patch("pyinitgen.events.sync_inits")
+    assert not any(isinstance(e, Synced) for e in iter_events(tmp_path, durable=True))
+    assert not any(isinstance(e, Synced) for e in iter_events(tmp_path / "x", durable=True, check=True))
+    sync.assert_not_called()
+
+
+def test_create_inits_reports_sync_time(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    (tmp_path / "a").mkdir()
+    assert create_inits(tmp_path, durable=True) == (0, 2, 2)
+    assert "Synced 2 files and 2 directories to disk in" in caplog.text
+
+
+def test_main_durable_conflicts_with_watch(mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--watch", "--durable"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
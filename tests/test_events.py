@@ -0,0 +1,80 @@
+# tests/test_events.py
+
+from pathlib import Path
+
+import pyinitgen
+from pyinitgen import Created, Done, Error, Missing, Scanned, iter_events, iter_missing
+
+
+def test_public_api_is_exported():
+    assert pyinitgen.iter_events is iter_events
+    assert "iter_missing" in pyinitgen.__all__
+
+
+def test_events_in_walk_order(fs):
+    fs.create_dir("src/pkg")
+    fs.create_file("src/__init__.py")
+
+    events = list(iter_events(Path("src")))
+
+    assert events == [
+        Scanned("src", True),
+        Scanned("src/pkg", False),
+        Missing("src/pkg"),
+        Created(str(Path("src/pkg/__init__.py"))),
+        Done(scanned=2, missing=1, created=1),
+    ]
+    assert Path("src/pkg/__init__.py").exists()
+
+
+def test_check_and_dry_run_never_write(fs):
+    fs.create_dir("src/pkg")
+
+    for options in ({"check": True}, {"dry_run": True}):
+        events = list(iter_events(Path("src"), **options))
+        assert not any(isinstance(event, Created) for event in events)
+        assert events[-1] == Done(scanned=2, missing=2, created=0)
+    assert not Path("src/pkg/__init__.py").exists()
+
+
+def test_stopping_early_writes_nothing_more(fs):
+    for name in ("a", "b", "c"):
+        fs.create_dir(f"src/{name}")
+
+    events = iter_events(Path("src"))
+    for event in events:
+        if isinstance(event, Created):
+            break
+    events.close()
+
+    # Only the base dir was fixed before the consumer stopped
+    created = [p for p in ("src", "src/a", "src/b", "src/c") if Path(p, "__init__.py").exists()]
+    assert created == ["src"]
+
+
+def test_write_errors_are_reported(fs, mocker):
+    fs.create_dir("src/pkg")
+    mocker.patch("pyinitgen.writer.InitWriter.create", side_effect=PermissionError("Boom"))
+
+    errors = [event for event in iter_events(Path("src")) if isinstance(event, Error)]
+
+    assert len(errors) == 2
+    assert errors[0].path == str(Path("src/__init__.py"))
+    assert "Boom" in errors[0].message
+
+
+def test_git_index_errors_are_reported(fs):
+    fs.create_dir("src")
+    events = list(iter_events(Path("src"), source="git-index"))
+    assert len(events) == 1
+    assert isinstance(events[0], Error)
+    assert "not inside a git repository" in events[0].message
+
+
+def test_iter_missing(fs):
+    fs.create_dir("src/pkg/sub")
+    fs.create_file("src/pkg/__init__.py")
+
+    assert list(iter_missing(Path("src"))) == ["src", "src/pkg/sub"]
+    assert not Path("src/__init__.py").exists()
+    assert list(iter_missing(Path("src"), source="git-index")) == []
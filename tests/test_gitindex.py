@@ -0,0 +1,131 @@
+# tests/test_gitindex.py
+
+import shutil
+import subprocess
+from pathlib import Path
+import pytest
+from pyinitgen.cli import create_inits
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.gitindex import GitIndexError, find_git_dir, read_index_paths, walk_git_index
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+# Real repositories are created with the git binary; the parser never runs it
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def _make_repo(path, *init_args):
+    """
+    A repository with tracked packages, a tracked excluded dir and an
+    untracked build tree.
+    """
+    _git(path.parent, "init", "-q", *init_args, str(path))
+    for rel in (
+        "src/pkg/__init__.py",
+        "src/pkg/sub/mod.py",
+        "src/other/deep/data.json",
+        "docs/conf.py",
+        "setup.py",
+    ):
+        (path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (path / rel).write_text("")
+    (path / "untracked" / "cache").mkdir(parents=True)
+    _git(path, "add", "src", "docs", "setup.py")
+    return path
+
+
+EXPECTED = [
+    ("", False),
+    ("src", False),
+    ("src/other", False),
+    ("src/other/deep", False),
+    ("src/pkg", True),
+    ("src/pkg/sub", False),
+]
+
+
+def _relative(repo, results):
+    relative = []
+    for root, has_init in results:
+        rel = Path(root).relative_to(repo).as_posix()
+        relative.append(("" if rel == "." else rel, has_init))
+    return relative
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_walk_git_index_versions(tmp_path, version):
+    repo = _make_repo(tmp_path / "repo")
+    _git(repo, "update-index", "--index-version", version)
+
+    assert _relative(repo, walk_git_index(repo, EXCLUDES)) == EXPECTED
+
+
+def test_walk_git_index_sha256(tmp_path):
+    repo = _make_repo(tmp_path / "repo", "--object-format=sha256")
+    assert _relative(repo, walk_git_index(repo, EXCLUDES)) == EXPECTED
+
+
+def test_walk_git_index_subdirectory(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    results = list(walk_git_index(repo / "src" / "pkg", EXCLUDES))
+    assert results == [(str(repo / "src" / "pkg"), True), (str(repo / "src" / "pkg" / "sub"), False)]
+
+
+def test_read_index_paths(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    paths = [path for path, _ in read_index_paths(repo / ".git")]
+    assert b"src/pkg/sub/mod.py" in paths
+    assert len(paths) == 5
+
+
+def test_gitdir_file_is_followed(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    (repo / ".git").rename(tmp_path / "moved.git")
+    (repo / ".git").write_text("gitdir: ../moved.git\n")
+
+    work_tree, git_dir = find_git_dir(repo / "src")
+    assert work_tree == repo
+    assert git_dir == repo / "../moved.git"
+    assert len(list(walk_git_index(repo, EXCLUDES))) == len(EXPECTED)
+
+
+def test_not_a_repository(tmp_path):
+    with pytest.raises(GitIndexError):
+        find_git_dir(tmp_path)
+
+
+def test_corrupt_index(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+    index = repo / ".git" / "index"
+    index.write_bytes(index.read_bytes()[:40])
+
+    with pytest.raises(GitIndexError):
+        list(read_index_paths(repo / ".git"))
+
+    index.write_bytes(b"JUNK")
+    with pytest.raises(GitIndexError):
+        list(read_index_paths(repo / ".git"))
+
+
+def test_create_inits_from_git_index(tmp_path):
+    repo = _make_repo(tmp_path / "repo")
+
+    exit_code, created, scanned = create_inits(repo, check=True, source="git-index")
+    assert (exit_code, created, scanned) == (1, 0, 6)
+
+    exit_code, created, scanned = create_inits(repo, source="git-index")
+    assert (exit_code, created, scanned) == (0, 5, 6)
+    assert not (repo / "untracked" / "__init__.py").exists()
+    assert not (repo / "docs" / "__init__.py").exists()
+
+
+def test_create_inits_git_index_error(tmp_path, caplog):
+    exit_code, _, _ = create_inits(tmp_path, source="git-index")
+
+    assert exit_code == 1
+    assert "not inside a git repository" in caplog.text
@@ -0,0 +1,115 @@
+# tests/test_ignores.py
+
+import pickle
+from pathlib import Path
+
+import pytest
+from pyinitgen.cli import create_inits, main
+from pyinitgen.ignores import IgnoreTree, collect_ignores
+from pyinitgen.walker import walk
+
+
+@pytest.fixture
+def monorepo(fs):
+    for path in (
+        "svc_a/gen/deep",
+        "svc_a/src/gen",
+        "svc_a/keep",
+        "svc_b/out/x",
+        "svc_b/src",
+        "svc_c/gen",
+        "svc_d/gen",
+    ):
+        fs.create_dir(path)
+    # Anchored to svc_a: svc_a/src/gen is not affected
+    fs.create_file("svc_a/.pyinitgenignore", contents="/gen\n")
+    fs.create_file("svc_b/.gitignore", contents="out/\n")
+    # Identical files in siblings share one compiled matcher
+    fs.create_file("svc_c/.pyinitgenignore", contents="gen\n")
+    fs.create_file("svc_d/.pyinitgenignore", contents="gen\n")
+    return Path(".")
+
+
+def _rels(tree, excludes):
+    return sorted(
+        root[2:] if root.startswith("./") else ""
+        for root, _ in walk(tree, excludes)
+    )
+
+
+def test_nested_ignore_files_are_anchored_to_their_dir(monorepo):
+    roots = _rels(monorepo, collect_ignores(monorepo))
+
+    assert "svc_a/gen" not in roots
+    assert "svc_a/gen/deep" not in roots
+    assert "svc_a/src/gen" in roots
+    assert "svc_c/gen" not in roots
+    # .gitignore is only read when asked for
+    assert "svc_b/out" in roots
+
+
+def test_gitignore_files_are_optional(monorepo):
+    roots = _rels(monorepo, collect_ignores(monorepo, gitignore=True))
+    assert "svc_b/out" not in roots
+    assert "svc_b/src" in roots
+
+
+def test_deeper_files_take_precedence(fs):
+    fs.create_dir("pkg/build/sub")
+    fs.create_file("pkg/.pyinitgenignore", contents="!build\n")
+
+    roots = _rels(Path("."), collect_ignores(Path(".")))
+    assert "pkg/build/sub" in roots
+
+
+def test_pyinitgenignore_wins_over_gitignore(fs):
+    fs.create_dir("pkg/gen")
+    fs.create_file("pkg/.gitignore", contents="gen\n")
+    fs.create_file("pkg/.pyinitgenignore", contents="!gen\n")
+
+    excludes = collect_ignores(Path("."), gitignore=True)
+    assert excludes.match("pkg/gen", "gen") is False
+
+
+def test_layers_are_cached_and_shared(monorepo, mocker):
+    excludes = collect_ignores(monorepo)
+    load = mocker.spy(excludes, "_load")
+
+    list(walk(monorepo, excludes))
+    loaded = load.call_count
+    list(walk(monorepo, excludes))
+
+    # A second walk reads no ignore file again
+    assert load.call_count == loaded
+    c_layer = excludes.layers("svc_c")[-1][1]
+    d_layer = excludes.layers("svc_d")[-1][1]
+    assert c_layer is d_layer
+    assert excludes.layers("svc_a/src") is excludes.layers("svc_a")
+
+
+def test_ignore_tree_survives_pickling(monorepo):
+    excludes = collect_ignores(monorepo, gitignore=True)
+    clone = pickle.loads(pickle.dumps(excludes))
+
+    assert isinstance(clone, IgnoreTree)
+    assert clone.gitignore is True
+    assert clone.match("svc_b/out", "out") is True
+    assert clone.excludes_path("svc_a/gen/deep") is True
+
+
+def test_create_inits_honours_nested_ignores(monorepo):
+    create_inits(monorepo, use_emoji=False)
+
+    assert Path("svc_a/src/gen/__init__.py").exists()
+    assert not Path("svc_a/gen/__init__.py").exists()
+    assert Path("svc_b/out/__init__.py").exists()
+
+
+def test_main_gitignore_flag(monorepo, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--gitignore", "--no-emoji"])
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 0
+    assert not Path("svc_b/out/__init__.py").exists()
+    assert Path("svc_b/src/__init__.py").exists()
@@ -0,0 +1,166 @@
+# tests/test_index.py
+
+import json
+import os
+from pathlib import Path
+import pytest
+from pyinitgen.cli import create_inits
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.index import DirIndex, index_key, index_path
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+
+# These tests run on the real filesystem: pyfakefs does not update
+# directory mtimes when entries are added.
+
+@pytest.fixture
+def project(tmp_path, mocker):
+    """
+    A small tree whose directory mtimes are old enough to be trusted.
+    """
+    # Pretend every mtime is outside the racy window
+    mocker.patch("pyinitgen.index.RACY_WINDOW_NS", -10**18)
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "other").mkdir()
+    (tmp_path / "node_modules" / "lib").mkdir(parents=True)
+    (tmp_path / "pkg" / "__init__.py").touch()
+    return tmp_path
+
+
+def test_index_key_changes_with_excludes():
+    assert index_key(ExcludeMatcher(["a", "b"])) == index_key(ExcludeMatcher(["a", "b"]))
+    assert index_key(ExcludeMatcher(["a"])) != index_key(ExcludeMatcher(["a", "b"]))
+    # Order decides which negation wins, so it is part of the key
+    assert index_key(ExcludeMatcher(["a", "!a"])) != index_key(ExcludeMatcher(["!a", "a"]))
+
+
+def test_index_key_changes_with_version(mocker):
+    key = index_key(ExcludeMatcher(["a"]))
+    mocker.patch("pyinitgen.index.__version__", "999.0")
+    assert index_key(ExcludeMatcher(["a"])) != key
+
+
+def test_load_missing_or_corrupt_index(project):
+    cache_file = index_path(project)
+    index = DirIndex.load(cache_file, "k")
+    assert index.entries == {}
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text("not json")
+    index = DirIndex.load(cache_file, "k")
+    assert index.entries == {}
+
+
+def test_cached_walk_matches_walk_and_reuses_entries(project):
+    cache_file = index_path(project)
+    key = index_key(EXCLUDES)
+
+    seen = {}
+    first = list(DirIndex(key).walk(project, EXCLUDES, seen))
+    assert first == [
+        (str(project), False),
+        (str(project / "other"), False),
+        (str(project / "pkg"), True),
+        (str(project / "pkg" / "sub"), False),
+    ]
+    DirIndex(key).save(cache_file, seen)
+
+    index = DirIndex.load(cache_file, key)
+    second = list(index.walk(project, EXCLUDES, {}))
+    assert second == first
+    assert index.reused == 4
+
+
+def test_cached_walk_picks_up_changes(project):
+    cache_file = index_path(project)
+    key = index_key(EXCLUDES)
+    seen = {}
+    list(DirIndex(key).walk(project, EXCLUDES, seen))
+    DirIndex(key).save(cache_file, seen)
+
+    (project / "pkg" / "sub" / "new").mkdir()
+    (project / "other" / "__init__.py").touch()
+    # Make sure the new mtimes differ from the recorded ones
+    for path in (project / "pkg" / "sub", project / "other"):
+        os.utime(path, ns=(1, 1))
+
+    index = DirIndex.load(cache_file, key)
+    roots = dict(index.walk(project, EXCLUDES, {}))
+    assert roots[str(project / "pkg" / "sub" / "new")] is False
+    assert roots[str(project / "other")] is True
+
+
+def test_stale_key_discards_index(project):
+    cache_file = index_path(project)
+    seen = {}
+    list(DirIndex("old").walk(project, EXCLUDES, seen))
+    DirIndex("old").save(cache_file, seen)
+
+    assert DirIndex.load(cache_file, "new").entries == {}
+    assert DirIndex.load(cache_file, "old").entries != {}
+
+
+def test_racy_entries_are_not_trusted(project, mocker):
+    mocker.patch("pyinitgen.index.RACY_WINDOW_NS", 10**18)
+    cache_file = index_path(project)
+    seen = {}
+    list(DirIndex("k").walk(project, EXCLUDES, seen))
+    DirIndex("k").save(cache_file, seen)
+
+    with open(cache_file) as f:
+        entries = json.load(f)["entries"]
+    assert all(entry[0] is None for entry in entries.values())
+
+
+def test_create_inits_with_cache(project):
+    exit_code, created, scanned = create_inits(project, check=True, cache=True)
+    assert (exit_code, created, scanned) == (1, 0, 4)
+    assert index_path(project).exists()
+
+    exit_code, created, scanned = create_inits(project, cache=True)
+    assert (exit_code, created, scanned) == (0, 3, 4)
+
+    exit_code, created, scanned = create_inits(project, check=True, cache=True)
+    assert (exit_code, created, scanned) == (0, 0, 4)
+
+
+def test_index_is_kept_outside_the_tree(project, mocker):
+    assert index_path(project).parent == Path(os.environ["XDG_CACHE_HOME"]) / "pyinitgen" / "index"
+    assert index_path(project) != index_path(project / "pkg")
+    # Keyed by the real path, however the base dir is spelled
+    assert index_path(project / "pkg" / "..") == index_path(project)
+
+    before = sorted(os.listdir(project))
+    create_inits(project, check=True, cache=True)
+    load = mocker.spy(DirIndex, "load")
+    create_inits(project, check=True, cache=True)
+
+    assert sorted(os.listdir(project)) == before
+    # The base dir's own entry survives runs, so nothing is listed again
+    assert load.spy_return.reused == 4
+
+
+def test_create_inits_cache_write_failure(project, mocker, caplog):
+    mocker.patch.object(DirIndex, "save", side_effect=OSError("read-only"))
+
+    exit_code, _, _ = create_inits(project, check=True, cache=True)
+
+    assert exit_code == 1
+    assert "Could not write" in caplog.text
+
+
+def test_edited_nested_ignore_file_applies_to_cached_entries(project):
+    ignore_file = project / "pkg" / ".pyinitgenignore"
+    ignore_file.write_text("# nothing yet\n")
+    exit_code, _, scanned = create_inits(project, check=True, cache=True)
+    assert scanned == 4
+
+    # Editing the file in place leaves the directory mtime alone
+    mtime = os.stat(project / "pkg").st_mtime_ns
+    ignore_file.write_text("sub\n")
+    os.utime(project / "pkg", ns=(mtime, mtime))
+
+    exit_code, _, scanned = create_inits(project, check=True, cache=True)
+    assert scanned == 3
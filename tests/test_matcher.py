@@ -0,0 +1,123 @@
+# tests/test_matcher.py
+
+import pickle
+from pathlib import Path
+
+import pytest
+from pyinitgen.cli import create_inits
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.ignores import collect_excludes
+from pyinitgen.matcher import ExcludeMatcher, translate
+
+
+@pytest.mark.parametrize(
+    "pattern, rel, name, expected",
+    [
+        # Bare names match at any depth
+        ("build", "build", "build", True),
+        ("build", "src/build", "build", True),
+        ("build", "builds", "builds", False),
+        # Suffix and prefix globs
+        ("*.egg-info", "foo.egg-info", "foo.egg-info", True),
+        ("*.egg-info", "src/foo.egg-info", "foo.egg-info", True),
+        ("tmp*", "tmp_data", "tmp_data", True),
+        ("tmp*", "a/xtmp", "xtmp", False),
+        # General globs
+        ("x[0-9]", "a/x7", "x7", True),
+        ("x[!0-9]", "a/x7", "x7", False),
+        ("?ache", "cache", "cache", True),
+        # Anchored patterns are relative to the base dir
+        ("/top", "top", "top", True),
+        ("/top", "a/top", "top", False),
+        ("a/b", "a/b", "b", True),
+        ("a/b", "x/a/b", "b", False),
+        ("a/*/c", "a/b/c", "c", True),
+        ("a/*/c", "a/b/d/c", "c", False),
+        ("build/", "src/build", "build", True),
+        # ** spans any number of directories
+        ("**/gen", "gen", "gen", True),
+        ("**/gen", "a/b/gen", "gen", True),
+        ("src/**/gen", "src/gen", "gen", True),
+        ("src/**/gen", "src/a/b/gen", "gen", True),
+        ("src/**", "src/a/b", "b", True),
+        ("src/**", "src", "src", False),
+        ("**/gen/**", "a/gen", "gen", False),
+        ("**/gen/**", "a/gen/x/y", "y", True),
+        ("a/**/b/**", "a/x/b/c", "c", True),
+    ],
+)
+def test_single_pattern(pattern, rel, name, expected):
+    assert ExcludeMatcher([pattern]).match(rel, name) is expected
+
+
+def test_last_matching_pattern_wins():
+    matcher = ExcludeMatcher(["tmp*", "!tmp_keep", "tmp_keep"])
+    assert matcher.match("tmp_keep", "tmp_keep") is True
+
+    matcher = ExcludeMatcher(["data", "!/data"])
+    assert matcher.match("data", "data") is False
+    assert matcher.match("pkg/data", "data") is True
+    assert matcher.verdict("data", "data") is False
+    assert matcher.verdict("other", "other") is None
+
+
+def test_comments_blanks_and_escapes():
+    matcher = ExcludeMatcher(["# comment", "", "   ", "\\#hash", "\\!bang"])
+    assert matcher.match("comment", "comment") is False
+    assert matcher.match("#hash", "#hash") is True
+    assert matcher.match("!bang", "!bang") is True
+
+
+def test_translate_edge_cases():
+    assert translate("a[") == r"a\["
+    assert translate("[]x]") == "[]x]"
+    assert translate(r"a\*") == r"a\*"
+
+
+def test_excludes_path_checks_ancestors():
+    matcher = ExcludeMatcher(["node_modules", "/vendor"])
+    assert matcher.excludes_path("") is False
+    assert matcher.excludes_path("a/node_modules/lib") is True
+    assert matcher.excludes_path("vendor/x") is True
+    assert matcher.excludes_path("src/vendor") is False
+
+
+def test_matcher_survives_pickling():
+    matcher = ExcludeMatcher(["build", "!/build", "**/gen/**"])
+    clone = pickle.loads(pickle.dumps(matcher))
+    assert clone.patterns == matcher.patterns
+    assert clone.match("a/gen/b", "b") is True
+    assert clone.match("build", "build") is False
+
+
+def test_many_patterns():
+    patterns = [f"name{i}" for i in range(2000)] + [f"*.ext{i}" for i in range(2000)]
+    patterns += [f"dir{i}/sub*" for i in range(2000)]
+    matcher = ExcludeMatcher(patterns)
+    assert matcher.match("x/name1999", "name1999") is True
+    assert matcher.match("x/a.ext7", "a.ext7") is True
+    assert matcher.match("dir1500/sub_x", "sub_x") is True
+    assert matcher.match("dir1500/x", "x") is False
+
+
+def test_collect_excludes_keeps_builtins_first(fs):
+    fs.create_file(".pyinitgenignore", contents="!docs\nsrc/gen\n")
+    matcher = collect_excludes(Path("."))
+    assert matcher.patterns[: len(EXCLUDE_DIRS)] == tuple(sorted(EXCLUDE_DIRS))
+    assert matcher.match("docs", "docs") is False
+    assert matcher.match("src/gen", "gen") is True
+    assert matcher.match("gen", "gen") is False
+
+
+def test_create_inits_with_glob_and_negation(fs):
+    for path in ("pkg/sub", "pkg/foo.egg-info", "src/gen/x", "docs/api", "build"):
+        fs.create_dir(path)
+    fs.create_file(".pyinitgenignore", contents="/src/gen\n!docs\n")
+
+    create_inits(Path("."), use_emoji=False)
+
+    assert Path("pkg/sub/__init__.py").exists()
+    assert not Path("pkg/foo.egg-info/__init__.py").exists()
+    assert not Path("src/gen/__init__.py").exists()
+    assert Path("docs/api/__init__.py").exists()
+    assert not Path("build/__init__.py").exists()
@@ -0,0 +1,150 @@
+# tests/test_only_python.py
+
+from pathlib import Path
+
+import pytest
+from pyinitgen.cli import create_inits, main
+from pyinitgen.config import EXCLUDE_DIRS, load_python_free_markers
+from pyinitgen.index import DirIndex, index_key
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.walker import PY_FILES, PY_MARKED, PY_NONE, scan_python_dir, walk_python
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+
+def _make_tree(make_dir, make_file):
+    for path in (
+        "src/pkg/sub",
+        "src/pkg/empty",
+        "fixtures/images/large",
+        "proto_out/a/b",
+        "tools/deep/er",
+        "cache/nested",
+    ):
+        make_dir(path)
+    make_file("src/pkg/sub/mod.py")
+    make_file("src/pkg/__init__.py")
+    make_file("fixtures/images/large/photo.png")
+    make_file("proto_out/a/b/msg.pb")
+    make_file("tools/deep/er/script.py")
+    # Python inside a marked tree is not looked for
+    make_file("cache/CACHEDIR.TAG")
+    make_file("cache/nested/generated.py")
+
+
+@pytest.fixture
+def tree(fs):
+    _make_tree(fs.create_dir, fs.create_file)
+    return Path(".")
+
+
+def _rel(root):
+    return root[2:] if root.startswith("./") else ""
+
+
+def _rels(results):
+    return [(_rel(root), has_init) for root, has_init, wanted in results if wanted]
+
+
+def test_scan_python_dir(tree):
+    assert scan_python_dir("src/pkg", "src/pkg", EXCLUDES) == (["empty", "sub"], True, PY_FILES)
+    assert scan_python_dir("fixtures", "fixtures", EXCLUDES) == (["images"], False, PY_NONE)
+    assert scan_python_dir("cache", "cache", EXCLUDES, ["CACHEDIR.TAG"])[2] == PY_MARKED
+
+
+def test_walk_python_keeps_only_paths_to_sources(tree):
+    results = _rels(walk_python(tree, EXCLUDES, ["CACHEDIR.TAG"]))
+    assert results == [
+        ("", False),
+        ("src", False),
+        ("src/pkg", True),
+        ("src/pkg/sub", False),
+        ("tools", False),
+        ("tools/deep", False),
+        ("tools/deep/er", False),
+    ]
+
+
+def test_walk_python_does_not_list_marked_trees(tree, mocker):
+    scan = mocker.patch("pyinitgen.walker.scan_python_dir", wraps=scan_python_dir)
+    list(walk_python(tree, EXCLUDES, ["CACHEDIR.TAG"]))
+
+    listed = {call.args[0] for call in scan.call_args_list}
+    assert "./cache" in listed
+    assert "./cache/nested" not in listed
+
+
+def test_walk_python_reports_every_listed_dir(tree, mocker):
+    scan = mocker.patch("pyinitgen.walker.scan_python_dir", wraps=scan_python_dir)
+    results = list(walk_python(tree, EXCLUDES, ["CACHEDIR.TAG"]))
+
+    listed = sorted(call.args[0] for call in scan.call_args_list)
+    assert sorted(root for root, _, _ in results) == listed
+    unwanted = {_rel(root) for root, _, wanted in results if not wanted}
+    assert unwanted == {
+        "src/pkg/empty",
+        "fixtures",
+        "fixtures/images",
+        "fixtures/images/large",
+        "proto_out",
+        "proto_out/a",
+        "proto_out/a/b",
+        "cache",
+    }
+
+
+def test_walk_python_without_sources(fs):
+    fs.create_dir("data_only/x")
+    results = list(walk_python(Path("data_only"), EXCLUDES))
+    assert sorted(results) == [("data_only", False, False), ("data_only/x", False, False)]
+
+
+def test_python_free_markers_from_config(fs):
+    fs.create_file(
+        "pyproject.toml",
+        contents='[tool.pyinitgen]\npython_free_markers = ["package.json"]\n',
+    )
+    assert load_python_free_markers(Path(".")) == ["CACHEDIR.TAG", "package.json"]
+
+
+def test_create_inits_only_python(tree):
+    exit_code, created, scanned = create_inits(tree, only_python=True, use_emoji=False)
+
+    assert exit_code == 0
+    assert created == 6
+    # Every listed directory is reported, not only the ones written to
+    assert scanned == 15
+    assert Path("src/pkg/sub/__init__.py").exists()
+    assert Path("tools/deep/er/__init__.py").exists()
+    assert not Path("src/pkg/empty/__init__.py").exists()
+    assert not Path("fixtures/__init__.py").exists()
+    assert not Path("cache/nested/__init__.py").exists()
+
+
+def test_cached_walk_python_matches_walk_python(tmp_path, mocker):
+    mocker.patch("pyinitgen.index.RACY_WINDOW_NS", -10**18)
+    _make_tree(
+        lambda p: (tmp_path / p).mkdir(parents=True),
+        lambda p: (tmp_path / p).touch(),
+    )
+    markers = ["CACHEDIR.TAG"]
+    expected = list(walk_python(tmp_path, EXCLUDES, markers))
+
+    key = index_key(EXCLUDES, markers)
+    seen = {}
+    assert list(DirIndex(key).walk_python(tmp_path, EXCLUDES, seen, markers)) == expected
+
+    index = DirIndex(key, DirIndex.settle(seen))
+    assert list(index.walk_python(tmp_path, EXCLUDES, {}, markers)) == expected
+    assert index.reused == len(seen)
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [["--processes", "2"], ["--changed", "x.py"], ["--source", "git-index"], ["--watch"]],
+)
+def test_main_only_python_conflicts(fs, mocker, extra):
+    mocker.patch("sys.argv", ["pyinitgen", "--only-python", *extra])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
@@ -0,0 +1,214 @@
+# tests/test_plan.py
+
+import os
+import time
+
+import pytest
+from pyinitgen.cli import main
+from pyinitgen.plan import (
+    Plan,
+    PlanEntry,
+    PlanError,
+    decode_plan,
+    encode_plan,
+    iter_apply,
+    make_plan,
+    read_plan,
+    stale_entries,
+    write_plan,
+)
+from pyinitgen.events import Created, Done
+
+# An hour ago: well outside the racy window
+OLD = time.time_ns() - 3600 * 10**9
+
+
+@pytest.fixture
+def tree(tmp_path):
+    base = tmp_path / "project"
+    for path in ("pkg/sub", "pkg/sub2", "node_modules/lib", "tools"):
+        (base / path).mkdir(parents=True)
+    (base / "pkg" / "__init__.py").touch()
+    for root, dirs, _ in os.walk(base):
+        os.utime(root, ns=(OLD, OLD))
+    return base
+
+
+def _run(mocker, *argv):
+    mocker.patch("sys.argv", ["pyinitgen", *map(str, argv)])
+    with pytest.raises(SystemExit) as e:
+        main()
+    return e.value.code
+
+
+def test_encode_round_trip():
+    entries = [
+        PlanEntry("", OLD),
+        PlanEntry("a/b", OLD - 5, OLD),
+        PlanEntry("a/bc/é", None, None),
+        PlanEntry("a/bd", OLD + 10**12, OLD - 7),
+    ]
+    plan = Plan("/srv/x", "k" * 64, True, "# pkg\n", 1700000000.5, entries)
+    data = encode_plan(plan)
+
+    assert decode_plan(data) == plan
+    # Shared prefixes and small mtime deltas keep the records short
+    assert len(data) - len(encode_plan(plan._replace(entries=[]))) < 50
+
+
+@pytest.mark.parametrize(
+    "mangle, message",
+    [
+        (lambda data: data[:10], "truncated"),
+        (lambda data: b"NOTAPLAN" + data[8:], "not a pyinitgen plan"),
+        (lambda data: data[:8] + b"\x09\x00" + data[10:], "format 9"),
+        (lambda data: data[:-5] + bytes([data[-5] ^ 1]) + data[-4:], "checksum"),
+    ],
+)
+def test_decode_rejects_bad_plans(mangle, message):
+    data = encode_plan(Plan("/x", "k", False, "", 0.0, [PlanEntry("a", 1)]))
+    with pytest.raises(PlanError, match=message):
+        decode_plan(mangle(data))
+
+
+def test_make_plan_and_apply(tree, tmp_path):
+    plan, scanned = make_plan(tree, init_content="x = 1\n", jobs=2)
+
+    assert scanned == 5
+    assert [entry.rel for entry in plan.entries] == ["", "pkg/sub", "pkg/sub2", "tools"]
+    assert all(entry.mtime_ns == OLD for entry in plan.entries)
+    # The base dir's parent is outside the tree
+    assert [entry.parent_mtime_ns for entry in plan.entries] == [None, OLD, OLD, OLD]
+
+    write_plan(tmp_path / "plan.bin", plan)
+    plan = read_plan(tmp_path / "plan.bin")
+    assert stale_entries(plan) == []
+
+    # Something else created one of the files in the meantime
+    (tree / "tools" / "__init__.py").write_text("keep")
+    events = list(iter_apply(plan))
+    assert sum(isinstance(e, Created) for e in events) == 3
+    assert events[-1] == Done(4, 4, 3)
+    assert (tree / "pkg" / "sub" / "__init__.py").read_text() == "x = 1\n"
+    assert (tree / "tools" / "__init__.py").read_text() == "keep"
+
+
+def test_stale_entries(tree):
+    plan, _ = make_plan(tree)
+    (tree / "pkg" / "sub" / "new").mkdir()
+    os.rmdir(tree / "tools")
+    (tree / "pkg" / "sub2" / "x").mkdir()
+    os.utime(tree / "pkg" / "sub2", ns=(time.time_ns(), time.time_ns()))
+
+    stale = {entry.rel: reason for entry, reason in stale_entries(plan)}
+    # Removing tools changed the base dir too
+    assert stale == {
+        "": "changed since the plan was made",
+        "pkg/sub": "changed since the plan was made",
+        "pkg/sub2": "changed since the plan was made",
+        "tools": "no longer exists",
+    }
+
+    # Revalidated directories are only written if they are still there
+    events = list(iter_apply(plan, set(stale)))
+    assert [e.path for e in events if isinstance(e, Created)] == [
+        str(tree / "__init__.py"),
+        str(tree / "pkg" / "sub" / "__init__.py"),
+        str(tree / "pkg" / "sub2" / "__init__.py"),
+    ]
+
+
+def test_revalidate_stops_at_symlinked_ancestors(tree, tmp_path):
+    plan, _ = make_plan(tree)
+    outside = tmp_path / "outside"
+    (outside / "sub").mkdir(parents=True)
+    os.rename(tree / "pkg", tmp_path / "old_pkg")
+    os.symlink(outside, tree / "pkg")
+
+    stale = {entry.rel for entry, _ in stale_entries(plan)}
+    assert "pkg/sub" in stale
+    list(iter_apply(plan, stale))
+    # A full walk never follows pkg, so neither does revalidation
+    assert not (outside / "sub" / "__init__.py").exists()
+    assert (tree / "tools" / "__init__.py").exists()
+
+
+def test_recent_mtimes_are_not_trusted(tree):
+    os.utime(tree / "tools")
+    plan, _ = make_plan(tree)
+    assert [(entry.rel, reason) for entry, reason in stale_entries(plan)] == [
+        ("tools", "was modified just before the plan was made")
+    ]
+
+
+def test_replaced_directory_is_stale(tree):
+    plan, _ = make_plan(tree)
+    # Same name and mtime, but another directory
+    os.rename(tree / "pkg" / "sub", tree / "pkg" / "old")
+    (tree / "pkg" / "sub").mkdir()
+    os.utime(tree / "pkg" / "sub", ns=(OLD, OLD))
+
+    stale = {entry.rel: reason for entry, reason in stale_entries(plan)}
+    assert stale == {
+        "pkg/sub": "has a parent that changed since the plan was made",
+        "pkg/sub2": "has a parent that changed since the plan was made",
+    }
+
+
+def test_config_change_refuses(tree):
+    plan, _ = make_plan(tree)
+    (tree / ".pyinitgenignore").write_text("tools\n")
+    with pytest.raises(PlanError, match="configuration"):
+        stale_entries(plan)
+
+
+def test_nested_ignore_change_refuses(tree):
+    plan, _ = make_plan(tree)
+    # Below every planned directory: does not decide what is planned
+    (tree / "tools" / ".pyinitgenignore").write_text("x\n")
+    os.utime(tree / "tools", ns=(OLD, OLD))
+    assert stale_entries(plan) == []
+
+    # Excludes pkg/sub, which the plan would still write to
+    (tree / "pkg" / ".pyinitgenignore").write_text("sub\n")
+    os.utime(tree / "pkg", ns=(OLD, OLD))
+    with pytest.raises(PlanError, match="ignore files"):
+        stale_entries(plan)
+
+
+def test_main_plan_then_apply(tree, tmp_path, mocker):
+    plan_file = tmp_path / "plan.bin"
+    assert _run(mocker, "plan", "--base-dir", tree, "--out", plan_file, "--init-content", "# x") == 0
+    assert not (tree / "tools" / "__init__.py").exists()
+
+    walk = mocker.spy(os, "scandir")
+    assert _run(mocker, "apply", plan_file) == 0
+    # Applying never lists a directory
+    walk.assert_not_called()
+    assert (tree / "tools" / "__init__.py").read_text() == "# x"
+
+
+def test_main_apply_refuses_stale_plan(tree, tmp_path, mocker, caplog):
+    plan_file = tmp_path / "plan.bin"
+    assert _run(mocker, "plan", "--base-dir", tree, "--out", plan_file, "-q") == 0
+    (tree / "tools" / "new").mkdir()
+
+    assert _run(mocker, "apply", plan_file) == 1
+    assert "changed since the plan was made" in caplog.text
+    assert not (tree / "__init__.py").exists()
+
+    assert _run(mocker, "apply", plan_file, "--revalidate") == 0
+    assert (tree / "tools" / "__init__.py").exists()
+
+
+def test_main_apply_errors(tree, tmp_path, mocker, caplog):
+    assert _run(mocker, "apply", tmp_path / "missing.bin") == 1
+    assert "Cannot apply" in caplog.text
+
+    plan_file = tmp_path / "plan.bin"
+    assert _run(mocker, "plan", "--base-dir", tree, "--out", plan_file) == 0
+    mocker.patch("pyinitgen.writer.InitWriter.create", side_effect=OSError("read-only"))
+    assert _run(mocker, "apply", plan_file) == 1
+    assert "read-only" in caplog.text
+
+    assert _run(mocker, "plan", "--out", plan_file, "--jobs", "0") == 2
@@ -0,0 +1,117 @@
+# tests/test_profiling.py
+
+import pstats
+
+import pytest
+from pyinitgen import profiling
+from pyinitgen.cli import create_inits, main
+from pyinitgen.profiling import Profiler, TimedMatcher
+
+
+def test_profiler_spans_and_counters():
+    profiler = Profiler()
+    with profiler.span("a"):
+        pass
+    with profiler.span("a"):
+        pass
+    profiler.count("x")
+    profiler.count("x", 4)
+    assert list(profiler.spans) == ["a"]
+    assert profiler.spans["a"] >= 0
+    assert profiler.counters == {"x": 5}
+
+    lines = profiler.format_summary().splitlines()
+    assert lines[0].split() == ["Phase", "ms"]
+    assert lines[1].startswith("a ")
+    assert lines[-1].split() == ["x", "5"]
+
+
+def test_timed_closes_wrapped_iterator():
+    closed = []
+
+    def source():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(True)
+
+    profiler = Profiler()
+    timed = profiler.timed("walking", source())
+    assert next(timed) == 1
+    timed.close()
+    assert closed == [True]
+    assert "walking" in profiler.spans
+
+
+def test_timed_matcher_counts_pruned():
+    class Matcher:
+        patterns = ["build"]
+
+        def match(self, rel, name):
+            return name == "build"
+
+    profiler = Profiler()
+    matcher = TimedMatcher(Matcher(), profiler)
+    assert matcher.match("build", "build")
+    assert not matcher.match("src", "src")
+    assert matcher.patterns == ["build"]
+    assert profiler.counters == {"pruned subtrees": 1}
+    assert "exclude matching" in profiler.spans
+
+
+def test_disabled_profiling_is_a_no_op():
+    assert profiling.ACTIVE is None
+    with profiling.span("ignored"):
+        pass
+    profiling.count("ignored")
+    assert profiling.span("a") is profiling.span("b")
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_profiling_create_inits(tmp_path, make_tree, jobs):
+    make_tree()
+    stats_file = tmp_path / "run.pstats"
+    with profiling.profiling(str(stats_file)) as profiler:
+        assert profiling.ACTIVE is profiler
+        exit_code, created, scanned = create_inits(tmp_path, jobs=jobs)
+    assert profiling.ACTIVE is None
+
+    assert (exit_code, created, scanned) == (0, 3, 4)
+    assert profiler.counters["dirs listed"] == 4
+    # pkg, lib, __init__.py, sub, build, node_modules, mod.py; run.pstats
+    # comes later
+    assert profiler.counters["entries seen"] == 7
+    assert profiler.counters["pruned subtrees"] == 2
+    assert profiler.counters["writes"] == 3
+    assert {"loading config", "walking", "exclude matching", "writing"} <= set(profiler.spans)
+    assert pstats.Stats(str(stats_file)).total_calls > 0
+
+
+def test_profiling_counts_errors(tmp_path, make_tree, mocker):
+    make_tree()
+    mocker.patch("pyinitgen.writer.InitWriter.create", side_effect=OSError("read-only"))
+    with profiling.profiling() as profiler:
+        assert create_inits(tmp_path)[0] == 1
+    assert profiler.counters["errors"] == 1
+    assert "writes" not in profiler.counters
+
+
+def test_main_profile(tmp_path, make_tree, mocker, capsys):
+    make_tree()
+    mocker.patch("pyinitgen.cli.show_banner", return_value=True)
+    mocker.patch("pyinitgen.banner.print_logo")
+    stats_file = tmp_path / "out.pstats"
+    mocker.patch(
+        "sys.argv",
+        ["pyinitgen", "--base-dir", str(tmp_path), "--check", "--profile-output", str(stats_file)],
+    )
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
+
+    err = capsys.readouterr().err
+    for line in ("importing rich", "banner", "walking", "dirs listed", "peak RSS (KiB)"):
+        assert line in err
+    assert f"cProfile stats written to {stats_file}" in err
+    assert stats_file.exists()
@@ -0,0 +1,89 @@
+# tests/test_scanner.py
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pyinitgen import Scanner
+from pyinitgen.ignores import collect_ignores
+from pyinitgen.index import DirIndex
+
+
+@pytest.fixture
+def project(tmp_path):
+    for path in ("pkg/sub", "pkg/gen", "legacy/old"):
+        (tmp_path / path).mkdir(parents=True)
+    (tmp_path / "pkg" / "__init__.py").touch()
+    (tmp_path / "pyproject.toml").write_text('[tool.pyinitgen]\nexclude_dirs = ["legacy"]\n')
+    return tmp_path
+
+
+def test_check_and_apply(project):
+    scanner = Scanner(project)
+
+    result = scanner.check()
+    assert result.scanned == 4
+    assert result.missing == [str(project), str(project / "pkg" / "gen"), str(project / "pkg" / "sub")]
+    assert result.created == [] and not result.ok
+
+    result = scanner.apply()
+    assert result.ok
+    assert len(result.created) == 3
+    assert scanner.check().ok
+
+
+def test_config_is_loaded_once(project, mocker):
+    load = mocker.patch("pyinitgen.scanner.collect_ignores", wraps=collect_ignores)
+    scanner = Scanner(project)
+
+    for _ in range(3):
+        scanner.check()
+    assert load.call_count == 1
+    assert scanner.reloads == 1
+
+
+def test_config_is_reloaded_when_it_changes(project):
+    scanner = Scanner(project)
+    assert str(project / "legacy") not in scanner.check().missing
+
+    pyproject = project / "pyproject.toml"
+    pyproject.write_text('[tool.pyinitgen]\nexclude_dirs = ["gen"]\n')
+    os.utime(pyproject, ns=(1, 1))
+
+    missing = scanner.check().missing
+    assert scanner.reloads == 2
+    assert str(project / "legacy") in missing
+    assert str(project / "pkg" / "gen") not in missing
+
+
+def test_nested_ignore_files_are_reread(project):
+    scanner = Scanner(project)
+    scanner.check()
+
+    (project / "pkg" / ".pyinitgenignore").write_text("gen\n")
+    assert str(project / "pkg" / "gen") not in scanner.check().missing
+    assert scanner.reloads == 1
+
+
+def test_concurrent_calls(project):
+    scanner = Scanner(project, jobs=2, cache=True)
+    expected = scanner.check()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: scanner.check(), range(16)))
+
+    assert all(result == expected for result in results)
+    assert scanner.reloads == 1
+
+
+def test_does_not_configure_logging(project, mocker):
+    mocker.patch.object(DirIndex, "save", side_effect=OSError("read-only"))
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    level = root.level
+
+    Scanner(project, cache=True).check()
+
+    assert root.handlers == handlers
+    assert root.level == level
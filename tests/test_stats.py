@@ -0,0 +1,98 @@
+# tests/test_stats.py
+
+import json
+import pickle
+
+import pytest
+from pyinitgen import __version__
+from pyinitgen.cli import create_inits, main
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.stats import PruneCounter, RunStats, format_json, format_openmetrics, peak_rss_bytes
+
+STATS = RunStats("/srv/a \"b\"", 1200000, 3, 5, 4, 1, 2.0, 1700000000.5)
+
+
+def test_format_openmetrics():
+    text = format_openmetrics(STATS)
+    lines = text.splitlines()
+    assert lines[-1] == "# EOF"
+    labels = f'{{base_dir="/srv/a \\"b\\"",version="{__version__}"}}'
+    assert f"pyinitgen_scanned_dirs{labels} 1200000" in lines
+    assert f"pyinitgen_dirs_per_second{labels} 600000.0" in lines
+    assert "# UNIT pyinitgen_duration_seconds seconds" in lines
+    assert sum(line.startswith("# TYPE") for line in lines) == 10
+
+
+def test_format_json():
+    data = json.loads(format_json(STATS))
+    assert data["version"] == __version__
+    assert data["pruned"] == 3
+    assert data["failures"] == 1
+    assert data["dirs_per_second"] == 600000.0
+    assert RunStats("/", 0, 0, 0, 0, 0, 0.0, 0.0).dirs_per_second == 0.0
+
+
+def test_prune_counter_pickles_with_a_fresh_count():
+    counter = PruneCounter(ExcludeMatcher(["build"]))
+    assert counter.match("x/build", "build")
+    assert not counter.match("x/src", "src")
+    assert counter.pruned == 1
+    assert counter.patterns == ("build",)
+    clone = pickle.loads(pickle.dumps(counter))
+    assert clone.pruned == 0
+    assert clone.match("build", "build")
+    counter.add_pruned(clone.pruned)
+    assert counter.pruned == 2
+
+
+def test_create_inits_stats_count_pruned_in_workers(tmp_path, make_tree):
+    tree = make_tree(tmp_path / "tree")
+    json_path = tmp_path / "stats.json"
+
+    create_inits(tree, check=True, processes=2, stats_json=json_path)
+    assert json.loads(json_path.read_text())["pruned"] == 2
+
+
+@pytest.mark.parametrize("check", [False, True])
+def test_create_inits_writes_stats(tmp_path, make_tree, check):
+    tree = make_tree(tmp_path / "tree")
+    json_path = tmp_path / "stats.json"
+    prom_path = tmp_path / "pyinitgen.prom"
+
+    exit_code, created, scanned = create_inits(
+        tree, check=check, jobs=2, stats_json=json_path, stats_openmetrics=prom_path
+    )
+    assert scanned == 4
+
+    data = json.loads(json_path.read_text())
+    assert data["scanned"] == 4
+    assert data["pruned"] == 2
+    assert data["missing"] == 3
+    assert data["created"] == created == (0 if check else 3)
+    assert data["failures"] == 0
+    assert data["duration_seconds"] > 0
+    assert data["base_dir"] == str(tree)
+    assert data["peak_rss_bytes"] == peak_rss_bytes() > 0
+    assert "pyinitgen_pruned_dirs{" in prom_path.read_text()
+    # Only the final files are left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["pyinitgen.prom", "stats.json", "tree"]
+
+
+def test_create_inits_stats_count_failures(tmp_path, make_tree, mocker, caplog):
+    make_tree(tmp_path / "tree")
+    mocker.patch("pyinitgen.writer.InitWriter.create", side_effect=OSError("read-only"))
+    json_path = tmp_path / "stats.json"
+    assert create_inits(tmp_path / "tree", stats_json=json_path)[0] == 1
+    assert json.loads(json_path.read_text())["failures"] == 1
+
+    # An unwritable stats file is reported but does not fail the run
+    assert create_inits(tmp_path / "tree", check=True, stats_json=tmp_path / "nope" / "s.json")[0] == 1
+    assert "Could not write run statistics" in caplog.text
+
+
+def test_main_stats_conflicts_with_watch(mocker):
+    mocker.patch("pyinitgen.banner.print_logo")
+    mocker.patch("sys.argv", ["pyinitgen", "--watch", "--stats-json", "s.json"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
@@ -0,0 +1,115 @@
+# tests/test_symlinks.py
+
+from pathlib import Path
+
+import pytest
+from pyinitgen.cli import create_inits, main
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.events import iter_events
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.profiling import profiling
+from pyinitgen.walker import DirGuard, walk
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+
+@pytest.fixture
+def repo(fs):
+    """
+    A repo with a vendored package symlinked into place, a second link to
+    it, a link back to the repo root and a link to a missing target.
+    """
+    fs.create_dir("/vendor/lib/sub")
+    fs.create_dir("/repo/src/pkg")
+    fs.create_dir("/repo/other")
+    fs.create_symlink("/repo/src/vendored", "/vendor/lib")
+    fs.create_symlink("/repo/other/again", "/vendor/lib")
+    fs.create_symlink("/repo/src/pkg/loop", "/repo")
+    fs.create_symlink("/repo/dangling", "/nowhere")
+    return Path("/repo")
+
+
+def _roots(base_dir, **options):
+    guard = DirGuard(**options)
+    return [root for root, _ in walk(base_dir, EXCLUDES, guard=guard)], guard
+
+
+def test_symlinks_are_skipped_by_default(repo):
+    roots = sorted(root for root, _ in walk(repo, EXCLUDES))
+    assert roots == ["/repo", "/repo/other", "/repo/src", "/repo/src/pkg"]
+
+
+def test_follow_symlinks_walks_each_directory_once(repo):
+    roots, guard = _roots(repo, follow_symlinks=True)
+
+    # /repo/other/again comes first in walk order; the loop back to /repo ends
+    assert roots == [
+        "/repo",
+        "/repo/other",
+        "/repo/other/again",
+        "/repo/other/again/sub",
+        "/repo/src",
+        "/repo/src/pkg",
+    ]
+    assert guard.revisits == 2
+    assert sum(len(inodes) for inodes in guard._seen.values()) == len(roots)
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_follow_symlinks_is_deterministic_with_threads(repo, low_memory):
+    serial, _ = _roots(repo, follow_symlinks=True)
+    guard = DirGuard(follow_symlinks=True)
+    threaded = [root for root, _ in walk(repo, EXCLUDES, jobs=4, low_memory=low_memory, guard=guard)]
+    assert threaded == serial
+    assert guard.revisits == 2
+
+
+def test_bind_mount_duplicates_without_following(fs):
+    # Two paths to one inode, as a bind mount would give
+    fs.create_dir("/repo/a")
+    fs.create_dir("/repo/b")
+    a, b = fs.get_object("/repo/a"), fs.get_object("/repo/b")
+    b.st_ino = a.st_ino
+
+    roots, guard = _roots(Path("/repo"))
+    assert roots == ["/repo", "/repo/a"]
+    assert guard.revisits == 1
+
+
+def test_one_file_system(repo, fs):
+    fs.add_mount_point("/repo/mnt")
+    fs.create_dir("/repo/mnt/pkg")
+
+    roots, guard = _roots(repo, one_file_system=True)
+    assert "/repo/mnt" not in roots
+    assert guard.other_mounts == 1
+
+    roots, _ = _roots(repo)
+    assert "/repo/mnt/pkg" in roots
+
+
+def test_create_inits_follows_vendored_packages(repo):
+    assert create_inits(repo, jobs=4, follow_symlinks=True) == (0, 6, 6)
+    assert Path("/vendor/lib/sub/__init__.py").exists()
+
+    with profiling() as profiler:
+        events = list(iter_events(repo, check=True, follow_symlinks=True))
+    assert events[-1].missing == 0
+    assert profiler.counters["dirs reached again"] == 2
+    assert profiler.counters["other mounts skipped"] == 0
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [
+        ["--follow-symlinks", "--processes", "2"],
+        ["--follow-symlinks", "--engine", "async"],
+        ["--one-file-system", "--cache"],
+        ["--one-file-system", "--changed", "a.py"],
+    ],
+)
+def test_main_symlink_conflicts(mocker, extra):
+    mocker.patch("sys.argv", ["pyinitgen", *extra])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
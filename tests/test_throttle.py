@@ -0,0 +1,141 @@
+# tests/test_throttle.py
+
+import json
+import threading
+
+import pytest
+from pyinitgen import throttle
+from pyinitgen.cli import create_inits, main
+from pyinitgen.throttle import IOBudget, TokenBucket, lower_io_priority, parse_io_budget
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(10, burst=3, clock=clock, sleep=clock.sleep)
+
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(0.1)
+    assert bucket.take() == pytest.approx(0.1)
+
+    # Idle time refills the bucket, up to the burst size
+    clock.now += 60
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() > 0
+    assert clock.now == pytest.approx(60.3)
+
+
+def test_token_bucket_threads_queue_up():
+    clock = FakeClock()
+    lock = threading.Lock()
+
+    def sleep(seconds):
+        with lock:
+            clock.slept.append(seconds)
+
+    bucket = TokenBucket(100, burst=1, clock=clock, sleep=sleep)
+    threads = [threading.Thread(target=bucket.take) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each caller reserves the next slot, none gets the same one
+    assert sorted(clock.slept) == pytest.approx([0.01, 0.02, 0.03, 0.04])
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+@pytest.mark.parametrize(
+    "spec, listings, writes",
+    [("500", 500, None), ("listings=2.5", 2.5, None), ("writes=50", None, 50), (" listings=500 , writes=50", 500, 50)],
+)
+def test_parse_io_budget(spec, listings, writes):
+    budget = parse_io_budget(spec)
+    assert (budget.listings and budget.listings.rate) == listings
+    assert (budget.writes and budget.writes.rate) == writes
+
+
+@pytest.mark.parametrize("spec", ["", "reads=5", "listings=5,listings=6", "listings=fast", "0", "writes=-1"])
+def test_parse_io_budget_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_io_budget(spec)
+
+
+def test_budget_throttles_listings_and_writes(tmp_path, make_tree):
+    make_tree()
+    clock = FakeClock()
+    budget = IOBudget(listings=100, writes=10, burst=1, clock=clock, sleep=clock.sleep)
+
+    with throttle.throttled(budget):
+        assert throttle.ACTIVE is budget
+        assert create_inits(tmp_path, jobs=2) == (0, 3, 4)
+    assert throttle.ACTIVE is None
+
+    # 4 listings at 100/s overlap with 3 writes at 10/s on the fake clock
+    assert budget.waits >= 3
+    assert budget.throttled_seconds == pytest.approx(sum(clock.slept))
+    assert budget.describe() == "100 listings/s, 10 writes/s"
+
+
+def test_create_inits_reports_throttling(tmp_path, make_tree, caplog):
+    make_tree()
+    stats_path = tmp_path / "stats.json"
+    clock = FakeClock()
+    budget = IOBudget(listings=1000, burst=1, clock=clock, sleep=clock.sleep)
+
+    with caplog.at_level("INFO"):
+        create_inits(tmp_path / "pkg", check=True, jobs=1, io_budget=budget, stats_json=stats_path)
+
+    # Two listings, one token at a time: the second waits 1ms
+    assert budget.waits == 1
+    assert clock.slept == pytest.approx([0.001])
+    assert "to stay within 1000 listings/s" in caplog.text
+    assert json.loads(stats_path.read_text())["throttled_seconds"] == budget.throttled_seconds > 0
+
+
+def test_lower_io_priority(mocker):
+    mocker.patch("platform.system", return_value="Linux")
+    mocker.patch("platform.machine", return_value="x86_64")
+    libc = mocker.patch("ctypes.CDLL").return_value
+    libc.syscall.return_value = 0
+    assert lower_io_priority() is True
+    # ioprio_set(IOPRIO_WHO_PROCESS, self, best-effort level 7)
+    libc.syscall.assert_called_once_with(251, 1, 0, (2 << 13) | 7)
+
+    libc.syscall.return_value = -1
+    assert lower_io_priority() is False
+
+    mocker.patch("platform.system", return_value="Darwin")
+    assert lower_io_priority() is False
+
+
+def test_main_io_budget(tmp_path, make_tree, mocker):
+    make_tree()
+    lower = mocker.patch("pyinitgen.throttle.lower_io_priority", return_value=False)
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(tmp_path), "--io-budget", "listings=1000,writes=1000", "--ionice"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 0
+    lower.assert_called_once_with()
+    assert (tmp_path / "pkg" / "sub" / "__init__.py").exists()
+
+
+@pytest.mark.parametrize("extra", [["--io-budget", "fast"], ["--io-budget", "10", "--processes", "2"], ["--io-budget", "10", "--watch"]])
+def test_main_io_budget_errors(mocker, extra):
+    mocker.patch("sys.argv", ["pyinitgen", *extra])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
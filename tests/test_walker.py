@@ -0,0 +1,207 @@
+# tests/test_walker.py
+
+import os
+import tracemalloc
+from pathlib import Path
+import pytest
+from pyinitgen.cli import create_inits
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.ignores import collect_ignores
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.walker import _Frame, _scan_shard, scan_dir, scan_sharded, walk, walk_compact, walk_parallel
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+
+@pytest.fixture
+def tree(fs):
+    """
+    A tree with a mix of packages, excluded dirs and a symlinked dir.
+    """
+    fs.create_dir("/tree/pkg_b/sub")
+    fs.create_dir("/tree/pkg_a/sub_1/deep")
+    fs.create_dir("/tree/pkg_a/sub_2")
+    fs.create_dir("/tree/node_modules/lib")
+    fs.create_dir("/tree/.git/objects")
+    fs.create_file("/tree/pkg_a/__init__.py")
+    fs.create_file("/tree/pkg_a/sub_1/__init__.py")
+    fs.create_file("/tree/pkg_b/module.py")
+    fs.create_symlink("/tree/link_to_pkg_b", "/tree/pkg_b")
+    return Path("/tree")
+
+
+def test_scan_dir(tree):
+    subdirs, has_init = scan_dir(str(tree / "pkg_a"), "pkg_a", EXCLUDES)
+    assert subdirs == ["sub_1", "sub_2"]
+    assert has_init is True
+
+    subdirs, has_init = scan_dir(str(tree), "", EXCLUDES)
+    # Excluded and symlinked dirs are not descended into
+    assert subdirs == ["pkg_a", "pkg_b"]
+    assert has_init is False
+
+
+def test_walk_parallel_matches_serial_walk(tree):
+    serial = list(walk(tree, EXCLUDES, jobs=1))
+    parallel = list(walk_parallel(tree, EXCLUDES, jobs=4))
+
+    assert parallel == serial
+    assert len(parallel) == 7
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_walk_is_sorted_pre_order(tree, jobs):
+    # pkg_b was created first, so readdir lists it first
+    roots = [root for root, _ in walk(tree, EXCLUDES, jobs=jobs)]
+    assert roots == [
+        "/tree",
+        "/tree/pkg_a",
+        "/tree/pkg_a/sub_1",
+        "/tree/pkg_a/sub_1/deep",
+        "/tree/pkg_a/sub_2",
+        "/tree/pkg_b",
+        "/tree/pkg_b/sub",
+    ]
+
+
+def test_walk_parallel_skips_unreadable_dirs(tree, mocker):
+    real_scandir = os.scandir
+
+    def flaky_scandir(path):
+        if str(path).endswith("pkg_b"):
+            raise PermissionError("denied")
+        return real_scandir(path)
+
+    mocker.patch("pyinitgen.walker.os.scandir", side_effect=flaky_scandir)
+    roots = [root for root, _ in walk_parallel(tree, EXCLUDES, jobs=2)]
+
+    assert "/tree/pkg_b" not in roots
+    assert "/tree/pkg_b/sub" not in roots
+    assert "/tree/pkg_a" in roots
+
+
+def test_walk_compact_matches_walk_parallel(tree, mocker):
+    real_scandir = os.scandir
+
+    def flaky_scandir(path):
+        if str(path).endswith("sub_1"):
+            raise PermissionError("denied")
+        return real_scandir(path)
+
+    assert list(walk(tree, EXCLUDES, low_memory=True)) == list(walk_parallel(tree, EXCLUDES, jobs=2))
+
+    mocker.patch("pyinitgen.walker.os.scandir", side_effect=flaky_scandir)
+    roots = [root for root, _ in walk_compact(tree, EXCLUDES)]
+    assert roots == ["/tree", "/tree/pkg_a", "/tree/pkg_a/sub_2", "/tree/pkg_b", "/tree/pkg_b/sub"]
+    assert list(walk_compact(tree / "pkg_a" / "sub_1", EXCLUDES)) == []
+
+
+def test_frame_packs_names():
+    frame = _Frame("/t", "", "\0".join(["a", "bb", "c d"]))
+    assert [frame.next_name() for _ in range(4)] == ["a", "bb", "c d", None]
+    assert _Frame("/t", "", "").next_name() is None
+    assert not hasattr(frame, "__dict__")
+
+
+def test_walk_compact_memory_does_not_grow_with_files(tmp_path):
+    wide = tmp_path / "wide"
+    wide.mkdir()
+    for i in range(5000):
+        (wide / f"data_{i:06d}.parquet").touch()
+    (wide / "sub").mkdir()
+
+    def peak(walker):
+        tracemalloc.start()
+        try:
+            for _ in walker:
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # os.walk holds all 5000 file names at once, the compact walk none
+    assert peak(walk_compact(tmp_path, EXCLUDES)) * 4 < peak(walk(tmp_path, EXCLUDES, jobs=1))
+
+
+def test_walk_compact_releases_ignore_layers(tmp_path):
+    for i in range(50):
+        (tmp_path / f"svc_{i:02d}" / "gen" / "deep").mkdir(parents=True)
+        (tmp_path / f"svc_{i:02d}" / "src" / "mod").mkdir(parents=True)
+    (tmp_path / "svc_07" / ".pyinitgenignore").write_text("gen\n")
+    excludes = collect_ignores(tmp_path)
+
+    largest = 0
+    roots = []
+    for root, _ in walk_compact(tmp_path, excludes):
+        largest = max(largest, len(excludes._layers))
+        roots.append(root)
+
+    # Only the layers of the directories on the current path are kept
+    assert largest <= 4
+    assert excludes._layers == {"": ()}
+    assert str(tmp_path / "svc_07" / "gen") not in roots
+    assert str(tmp_path / "svc_08" / "gen" / "deep") in roots
+    assert len(roots) == 1 + 50 * 5 - 2
+
+
+def test_create_inits_parallel_matches_serial(tree):
+    exit_code, created, scanned = create_inits(tree, check=True, jobs=4)
+    assert (exit_code, created, scanned) == (1, 0, 7)
+
+    exit_code, created, scanned = create_inits(tree, jobs=4)
+    assert exit_code == 0
+    assert created == 5
+    assert scanned == 7
+    assert (tree / "pkg_b" / "sub" / "__init__.py").exists()
+    assert not (tree / "node_modules" / "__init__.py").exists()
+
+
+def _make_real_tree(base, width=3, depth=3):
+    """
+    Builds a small tree on the real filesystem for the process pool tests.
+    """
+    paths = [base]
+    for _ in range(depth):
+        paths = [p / f"d{i}" for p in paths for i in range(width)]
+        for p in paths:
+            p.mkdir(parents=True)
+    (base / "d0" / "__init__.py").touch()
+    (base / "node_modules" / "lib").mkdir(parents=True)
+
+
+def test_scan_shard_hands_back_leftovers(tmp_path):
+    _make_real_tree(tmp_path)
+
+    scanned, pruned, missing, leftover = _scan_shard([(str(tmp_path), "")], EXCLUDES, budget=2)
+
+    assert scanned == 2
+    assert str(tmp_path) in missing
+    assert str(tmp_path / "d0") not in missing
+    # The rest of the tree comes back as unvisited subtrees, in walk order
+    assert leftover[0] == (str(tmp_path / "d0" / "d0"), "d0/d0")
+    assert leftover[-1] == (str(tmp_path / "d2"), "d2")
+
+
+def test_scan_sharded_matches_serial_walk(tmp_path, mocker):
+    _make_real_tree(tmp_path)
+    # Force many tiny shards so work is handed back and stolen
+    mocker.patch("pyinitgen.walker.SPLIT_BUDGET", 1)
+    mocker.patch("pyinitgen.walker.SHARD_BUDGET", 2)
+
+    scanned, missing = scan_sharded(tmp_path, EXCLUDES, processes=3)
+
+    expected = list(walk_parallel(tmp_path, EXCLUDES, jobs=2))
+    assert scanned == len(expected) == 40
+    assert missing == [root for root, has_init in expected if not has_init]
+
+
+def test_create_inits_with_processes(tmp_path):
+    _make_real_tree(tmp_path)
+
+    exit_code, created, scanned = create_inits(tmp_path, check=True, processes=2)
+    assert (exit_code, created, scanned) == (1, 0, 40)
+
+    exit_code, created, scanned = create_inits(tmp_path, processes=2)
+    assert (exit_code, created, scanned) == (0, 39, 40)
+    assert (tmp_path / "d2" / "d2" / "d2" / "__init__.py").exists()
+    assert not (tmp_path / "node_modules" / "__init__.py").exists()
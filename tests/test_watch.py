@@ -0,0 +1,143 @@
+# tests/test_watch.py
+
+import errno
+import logging
+import sys
+import threading
+import time
+import pytest
+from pyinitgen.cli import main
+from pyinitgen.config import EXCLUDE_DIRS
+from pyinitgen.matcher import ExcludeMatcher
+from pyinitgen.watch import IN_ISDIR, IN_MOVED_FROM, IN_Q_OVERFLOW, Watcher
+
+EXCLUDES = ExcludeMatcher(sorted(EXCLUDE_DIRS))
+
+# inotify needs a real filesystem, so these tests use tmp_path instead of pyfakefs
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def running_watcher(tmp_path):
+    """
+    Starts a Watcher on tmp_path in a background thread.
+    """
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "node_modules").mkdir()
+    watcher = Watcher(tmp_path, EXCLUDES, rescan_interval=0.05)
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, kwargs={"stop": stop, "poll_interval": 0.02})
+    thread.start()
+    assert _wait_for(lambda: str(tmp_path / "pkg") in watcher.wds)
+    yield watcher
+    stop.set()
+    thread.join()
+
+
+def test_initial_scan_fixes_and_watches_tree(running_watcher, tmp_path):
+    assert (tmp_path / "__init__.py").exists()
+    assert (tmp_path / "pkg" / "__init__.py").exists()
+    assert not (tmp_path / "node_modules" / "__init__.py").exists()
+    assert str(tmp_path / "node_modules") not in running_watcher.wds
+
+
+def test_new_directories_are_fixed(running_watcher, tmp_path):
+    (tmp_path / "pkg" / "new" / "nested").mkdir(parents=True)
+    (tmp_path / "build" / "out").mkdir(parents=True)
+
+    assert _wait_for(lambda: (tmp_path / "pkg" / "new" / "nested" / "__init__.py").exists())
+    assert (tmp_path / "pkg" / "new" / "__init__.py").exists()
+    assert not (tmp_path / "build" / "__init__.py").exists()
+    assert str(tmp_path / "build") not in running_watcher.wds
+
+
+def test_moved_directories_are_fixed(running_watcher, tmp_path):
+    outside = tmp_path.parent / f"{tmp_path.name}_outside"
+    (outside / "sub").mkdir(parents=True)
+    outside.rename(tmp_path / "pkg" / "moved")
+
+    assert _wait_for(lambda: (tmp_path / "pkg" / "moved" / "sub" / "__init__.py").exists())
+
+
+def test_check_mode_reports_without_writing(tmp_path, caplog):
+    watcher = Watcher(tmp_path, EXCLUDES, check=True)
+    (tmp_path / "pkg").mkdir()
+    watcher.add_tree(str(tmp_path))
+    watcher.inotify.close()
+
+    assert watcher.missing_count == 2
+    assert "Missing __init__.py in" in caplog.text
+    assert not (tmp_path / "pkg" / "__init__.py").exists()
+
+
+def test_moved_away_directories_are_unwatched(tmp_path):
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    watcher = Watcher(tmp_path, EXCLUDES, dry_run=True)
+    watcher.add_tree(str(tmp_path))
+    wd = watcher.wds[str(tmp_path)]
+
+    watcher.handle(wd, IN_MOVED_FROM | IN_ISDIR, "pkg")
+    watcher.inotify.close()
+
+    assert list(watcher.wds) == [str(tmp_path)]
+
+
+def test_watch_limit_falls_back_to_polling(tmp_path, mocker, caplog):
+    (tmp_path / "pkg").mkdir()
+    watcher = Watcher(tmp_path, EXCLUDES, dry_run=True)
+    mocker.patch.object(
+        watcher.inotify, "add_watch", side_effect=OSError(errno.ENOSPC, "No space left on device")
+    )
+
+    watcher.add_tree(str(tmp_path))
+    assert watcher.limit_reached
+    assert watcher.unwatched == [str(tmp_path)]
+    assert "watch limit reached" in caplog.text
+
+    (tmp_path / "later").mkdir()
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        watcher.rescan_unwatched()
+    assert "Would create" in caplog.text and "later" in caplog.text
+    watcher.inotify.close()
+
+
+def test_queue_overflow_triggers_rescan(tmp_path, mocker):
+    watcher = Watcher(tmp_path, EXCLUDES, dry_run=True)
+    add_tree = mocker.patch.object(watcher, "add_tree")
+
+    watcher.handle(-1, IN_Q_OVERFLOW, "")
+    watcher.inotify.close()
+
+    add_tree.assert_called_once_with(str(tmp_path))
+
+
+def test_main_watch_unavailable(tmp_path, mocker, caplog):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(tmp_path), "--watch"])
+    mocker.patch("pyinitgen.watch.Watcher", side_effect=OSError(errno.ENOSYS, "no inotify"))
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 1
+    assert "Watch mode is unavailable" in caplog.text
+
+
+def test_main_watch_stops_on_interrupt(tmp_path, mocker):
+    mocker.patch("sys.argv", ["pyinitgen", "--base-dir", str(tmp_path), "--watch"])
+    watcher = mocker.patch("pyinitgen.watch.Watcher")
+    watcher.return_value.run.side_effect = KeyboardInterrupt
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 0
@@ -0,0 +1,88 @@
+# tests/test_writer.py
+
+import os
+import stat
+
+import pytest
+from pyinitgen.events import Created, Missing, iter_events
+from pyinitgen.writer import InitWriter, write_atomic, write_init
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_create_writes_content_with_mode(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    old_umask = os.umask(0o077)
+    try:
+        with InitWriter("__all__ = ['é']\n") as writer:
+            assert writer.create(str(tmp_path / "pkg"))
+    finally:
+        os.umask(old_umask)
+
+    init_file = tmp_path / "pkg" / "__init__.py"
+    assert init_file.read_text(encoding="utf-8") == "__all__ = ['é']\n"
+    assert _mode(init_file) == 0o644
+
+
+def test_create_never_truncates(tmp_path):
+    init_file = tmp_path / "__init__.py"
+    init_file.write_text("keep")
+    with InitWriter("new") as writer:
+        assert not writer.create(str(tmp_path))
+    assert init_file.read_text() == "keep"
+
+    write_init(init_file, "new")
+    assert init_file.read_text() == "keep"
+
+
+def test_siblings_share_parent_handle(tmp_path, mocker, monkeypatch):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "a" / "deep").mkdir()
+    spy = mocker.spy(os, "open")
+    monkeypatch.setattr(os, "supports_dir_fd", os.supports_dir_fd | {spy})
+
+    with InitWriter() as writer:
+        for name in ("a", "b", "c", "a/deep"):
+            assert writer.create(str(tmp_path / name))
+
+    dirs_opened = [c.args[0] for c in spy.call_args_list if c.kwargs.get("dir_fd") is None]
+    assert dirs_opened == [str(tmp_path), str(tmp_path / "a")]
+    assert all((tmp_path / name / "__init__.py").exists() for name in ("a", "b", "c", "a/deep"))
+
+
+def test_relative_paths_without_dir_fd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(os, "supports_dir_fd", set())
+    (tmp_path / "pkg").mkdir()
+    with InitWriter("x") as writer:
+        assert writer.create("pkg")
+        assert not writer.create("pkg")
+    assert (tmp_path / "pkg" / "__init__.py").read_text() == "x"
+
+
+def test_concurrent_creation_is_not_reported(tmp_path, mocker):
+    (tmp_path / "pkg").mkdir()
+    mocker.patch("pyinitgen.writer.InitWriter.create", return_value=False)
+
+    events = list(iter_events(tmp_path))
+
+    assert sum(isinstance(e, Missing) for e in events) == 2
+    assert not any(isinstance(e, Created) for e in events)
+    assert events[-1].created == 0
+
+
+def test_write_atomic_replaces_and_cleans_up(tmp_path, mocker):
+    target = tmp_path / "stats.json"
+    write_atomic(target, "{}\n")
+    write_atomic(target, b"new")
+    assert target.read_bytes() == b"new"
+
+    mocker.patch("os.replace", side_effect=OSError("disk full"))
+    with pytest.raises(OSError, match="disk full"):
+        write_atomic(target, "lost")
+    # The old file is intact and no temp file is left behind
+    assert target.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["stats.json"]